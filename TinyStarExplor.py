@@ -1,14 +1,28 @@
+import time
+STARTED = time.perf_counter()  # відлік запуску (дія 'startup') — до імпорту решти
+
 import os
-import shutil
+import stat
 import datetime
-import subprocess
-from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 
+import archives
+import perf_trace
+import session
+from dir_scanner import entry_sort_key
+from directory_model import DirectoryModel, format_size
+from virtual_tree import VirtualTreeview
+from transfer_plan import OVERWRITE
+from perf_overlay import PerfOverlay
+# Індекс, дерево, перегляд, розміри папок, пошук і панель прогресу — з першим використанням
+
+FILTER_DELAY_MS = 150  # пауза у введенні перед фільтрацією списку
+
 class TinyStarExplor(tk.Tk):
     def __init__(self):
         super().__init__()
+        perf_trace.start('startup', started=STARTED, app='TinyStarExplor')  # час до першого рядка
         
         # Парамитри ВІКНА
         self.title("StarExplor")
@@ -23,17 +37,38 @@ class TinyStarExplor(tk.Tk):
         
         self.configure(bg=self.bg_dark)
         
-        self.current_path = str(Path.home())
-        self.history = [self.current_path]
-        self.history_index = 0
-        self.selected_items = []
-        self.clipboard_items = []
-        self.clipboard_operation = None
+        # Шлях, історія, завантаження, сортування, фільтр, inotify, буфер і фонові операції — без Tk
+        self.model = DirectoryModel(self, on_load=self.on_load, on_rows=self.on_rows, on_done=self.on_scan_done,
+                                    on_error=self.on_scan_error, on_changed=self.on_rows_changed,
+                                    on_sorted=self.on_sorted, on_gone=lambda: self.status_bar.configure(text="Директорію видалено"))
+        self.usage_cache = None  # UsageCache — з першим підрахунком (usage_scan)
+        self.dir_sizes = None  # DiskUsageScan для колонки розміру папок
+        self.tree_search = None
+        self.filter_job = None  # швидкий фільтр списку
+        self.tree_mode = False  # дерево папок замість плаского списку
+        self.file_index = None  # відкривається в start_session
         
         self.setup_styles()
         self.create_widgets()
         self.create_context_menu()
-        self.load_directory()
+        self.after_idle(self.start_session)  # вікно з'являється одразу, список — уже з циклу подій
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def start_session(self):
+        perf_trace.mark('startup', 'mainloop')
+        try: self.model.restore(session.read())  # знімок минулої сесії — одразу, перевірка — у фоні
+        except Exception as e: messagebox.showerror("Помилка", f"Доступ обмежено: {e}")
+        import sqlite3
+        from file_index import FileIndex, IndexUpdater
+        try: self.file_index = FileIndex()
+        except (sqlite3.Error, OSError): self.file_index = None
+        pending = self.model.deleter.resume_pending()  # недовидалене з минулого запуску
+        if pending: self.show_transfer(pending)
+        if self.file_index: self.after(2000, IndexUpdater(self.file_index).start)  # індексатор — після першого показу
+
+    def on_close(self):
+        session.write(self.model.snapshot())
+        self.destroy()
         
     def setup_styles(self):
         style = ttk.Style()
@@ -64,9 +99,15 @@ class TinyStarExplor(tk.Tk):
         btn_opts = {"bg": self.accent, "fg": self.fg_white, "relief": "flat", 
                     "activebackground": self.highlight, "font": ("Arial", 8)}
         
-        tk.Button(self.nav_frame, text="Назад", command=self.go_back, **btn_opts).pack(side="left", padx=2)
-        tk.Button(self.nav_frame, text="Вперед", command=self.go_forward, **btn_opts).pack(side="left", padx=2)
+        tk.Button(self.nav_frame, text="Назад", command=self.model.go_back, **btn_opts).pack(side="left", padx=2)
+        tk.Button(self.nav_frame, text="Вперед", command=self.model.go_forward, **btn_opts).pack(side="left", padx=2)
         tk.Button(self.nav_frame, text="Оновити", command=self.load_directory, **btn_opts).pack(side="left", padx=2)
+        # Пошук за індексом імен: підрядок або glob
+        self.search_entry = tk.Entry(self.nav_frame, bg=self.bg_field, fg=self.fg_white, insertbackground="white", relief="flat", width=12)
+        self.search_entry.pack(side="right", padx=2)
+        self.search_entry.bind("<Return>", lambda e: self.search_index())
+        self.search_entry.bind("<Escape>", lambda e: self.load_directory(use_cache=True))
+        self.search_entry.bind("<KeyRelease>", self.schedule_filter)
 
         self.path_entry = tk.Entry(self.nav_frame, bg=self.bg_field, fg=self.fg_white, 
                                    insertbackground="white", relief="flat")
@@ -80,22 +121,48 @@ class TinyStarExplor(tk.Tk):
         columns = ('size', 'modified')
         self.tree = ttk.Treeview(self.main_frame, columns=columns, show='tree headings')
         
-        self.tree.heading('#0', text='Назва', command=lambda: self.sort_column('#0', False))
-        self.tree.heading('size', text='Розмір', command=lambda: self.sort_column('size', False))
-        self.tree.heading('modified', text='Змінено', command=lambda: self.sort_column('modified', False))
+        self.column_titles = {'#0': 'Назва', 'size': 'Розмір', 'modified': 'Змінено'}
+        for col, title in self.column_titles.items():
+            self.tree.heading(col, text=title, command=lambda c=col: self.sort_column(c))
         
         self.tree.column('#0', width=180)
         self.tree.column('size', width=70)
         self.tree.column('modified', width=120)
         
+        self.preview = None  # панель перегляду — з першим увімкненням з меню
         self.tree.pack(fill="both", expand=True)
+        self.view = VirtualTreeview(self.tree, None, self.format_row, on_select=self.on_select,
+                                    on_visible=self.on_rows_visible)
+        self.model.rows = self.view
         
         self.tree.bind('<Double-Button-1>', lambda e: self.open_selected())
         self.tree.bind('<Button-3>', self.show_context_menu)
-        self.tree.bind('<<TreeviewSelect>>', self.on_select)
+
+        # Дерево: вміст папки читається у фоні при розгортанні (або заздалегідь при наведенні)
+        self.hier_tree = ttk.Treeview(self.main_frame, columns=columns, show='tree headings')
+        for col, title in self.column_titles.items(): self.hier_tree.heading(col, text=title)
+        for col, width in (('#0', 180), ('size', 70), ('modified', 120)): self.hier_tree.column(col, width=width)
+        self.lazy_tree = None  # LazyTree — з першим перемиканням у дерево (set_tree_mode)
+        self.hier_tree.bind('<Button-3>', self.show_context_menu)
         
         self.status_bar = tk.Label(self, text="", anchor="w", bg=self.bg_dark, fg="#888888", font=('Arial', 8))
         self.status_bar.pack(fill="x", padx=5)
+        self.perf_overlay = PerfOverlay(self, self.status_bar, padx=5, bg=self.bg_dark, fg="#888888", font=('Arial', 8))  # F12, Shift+F12 — профіль
+        self.stop_btn = tk.Button(self, text="Зупинити пошук", command=self.stop_tree_search, bg=self.accent, fg=self.fg_white, relief="flat", font=('Arial', 8))
+        self.transfer_panel = None  # панель прогресу — з першим завданням (show_transfer)
+
+    def show_transfer(self, job):
+        if self.transfer_panel is None:
+            from transfer_panel import TransferPanel
+            self.transfer_panel = TransferPanel(self, self.model.transfers, format_size, self.on_transfer_finished,
+                                                before=self.status_bar, bg=self.bg_dark, fg=self.fg_white,
+                                                button_bg=self.accent, font=('Arial', 8))
+        self.transfer_panel.add_job(job)
+
+    def usage_scan(self, roots):
+        from disk_usage import DiskUsageScan, UsageCache
+        if self.usage_cache is None: self.usage_cache = UsageCache()  # кеш зведень папок за mtime
+        return DiskUsageScan(roots, self.usage_cache).start()
 
     def create_context_menu(self):
         self.menu = tk.Menu(self, tearoff=0, bg=self.bg_field, fg=self.fg_white, activebackground=self.highlight)
@@ -111,69 +178,204 @@ class TinyStarExplor(tk.Tk):
         self.menu.add_command(label="Перейменувати", command=self.rename_item)
         self.menu.add_command(label="Видалити", command=self.delete_items)
         self.menu.add_separator()
+        self.menu.add_command(label="Розмір папок", command=self.compute_dir_sizes)
+        self.menu.add_command(label="Шукати тут...", command=self.search_here)
+        self.menu.add_command(label="Шукати у файлах...", command=self.search_in_files)
+        self.menu.add_command(label="Знайти дублікати...", command=self.find_duplicates)
+        self.menu.add_command(label="Дерево / список", command=lambda: self.set_tree_mode(not self.tree_mode))
+        self.menu.add_command(label="Перегляд", command=self.toggle_preview)
         self.menu.add_command(label="Властивості", command=self.show_properties)
 
     def show_context_menu(self, event):
-        item = self.tree.identify_row(event.y)
-        if item:
-            self.tree.selection_set(item)
+        if not self.tree_mode: self.view.select_at(event.y)
+        elif self.hier_tree.identify_row(event.y) not in self.hier_tree.selection(): self.hier_tree.selection_set(self.hier_tree.identify_row(event.y))
         self.menu.post(event.x_root, event.y_root)
 
-    def load_directory(self):
-        try:
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            self.path_entry.delete(0, "end")
-            self.path_entry.insert(0, self.current_path)
-            
-            items = sorted(os.scandir(self.current_path), key=lambda x: (not x.is_dir(), x.name.lower()))
-            for entry in items:
-                try:
-                    stat = entry.stat()
-                    size = self.format_size(stat.st_size) if entry.is_file() else ""
-                    modified = datetime.datetime.fromtimestamp(stat.st_mtime).strftime("%d.%m.%Y %H:%M")
-                    self.tree.insert('', 'end', text=entry.name, values=(size, modified), tags=(entry.path,))
-                except: continue
-            self.status_bar.configure(text=f"Елементів: {len(items)}")
-        except Exception as e:
-            messagebox.showerror("Помилка", f"Доступ обмежено: {e}")
-
-    def sort_column(self, col, reverse):
-        l = [(self.tree.set(k, col) if col != '#0' else self.tree.item(k, 'text'), k) for k in self.tree.get_children('')]
-        l.sort(reverse=reverse)
-        for index, (val, k) in enumerate(l):
-            self.tree.move(k, '', index)
-        self.tree.heading(col, command=lambda: self.sort_column(col, not reverse))
-
-    def format_size(self, size):
-        for unit in ['Б', 'КБ', 'МБ', 'ГБ']:
-            if size < 1024: return f"{size:.1f} {unit}"
-            size /= 1024
-        return f"{size:.1f} ТБ"
+    def load_directory(self, use_cache=False):
+        try: self.model.load(use_cache=use_cache)
+        except Exception as e: messagebox.showerror("Помилка", f"Доступ обмежено: {e}")
+
+    def on_load(self, path):
+        if self.filter_job: self.after_cancel(self.filter_job)
+        self.filter_job = None
+        self.search_entry.delete(0, "end")
+        if self.dir_sizes: self.dir_sizes.cancel()
+        self.dir_sizes = None
+        self.stop_tree_search()
+        self.tree_search = None
+        self.path_entry.delete(0, "end")
+        self.path_entry.insert(0, path)
+        self.status_bar.configure(text="Завантаження...")
+        if self.tree_mode: self.lazy_tree.set_root(path)
+
+    def on_rows(self, entries):
+        self.status_bar.configure(text=f"Елементів: {len(self.view)}...")
+
+    def on_rows_changed(self):
+        if not self.model.search_mode: self.status_bar.configure(text=f"Елементів: {len(self.view)}")
+        self.on_select(None)
+
+    def format_row(self, entry):
+        size = self.dir_size_text(entry.path) if entry.is_dir else "…" if entry.size is None else format_size(entry.size)
+        modified = "…" if entry.mtime is None else datetime.datetime.fromtimestamp(entry.mtime).strftime("%d.%m.%Y %H:%M")
+        return entry.name, (size, modified)
+
+    def dir_size_text(self, path):
+        totals = self.dir_sizes.totals.get(path) if self.dir_sizes else None
+        if totals is None: return ""
+        return format_size(totals.apparent) + ("" if self.dir_sizes.done else "…")
+
+    def compute_dir_sizes(self):
+        # Підсумки всіх папок списку паралельно; колонка оновлюється по ходу
+        if self.dir_sizes: self.dir_sizes.cancel()
+        self.dir_sizes = self.usage_scan([row.path for row in self.view.rows if row.is_dir])
+        self.poll_dir_sizes(self.dir_sizes)
+
+    def poll_dir_sizes(self, scan):
+        if scan is not self.dir_sizes: return
+        self.view.refresh()
+        if self.tree_mode: self.lazy_tree.refresh_rows()
+        if scan.done: self.status_bar.configure(text=f"Розміри папок: {scan.elapsed:.2f} с")
+        else: self.after(200, self.poll_dir_sizes, scan)
+
+    def schedule_filter(self, event=None):
+        if self.filter_job: self.after_cancel(self.filter_job)
+        self.filter_job = self.after(FILTER_DELAY_MS, self.apply_filter)
+
+    def apply_filter(self):
+        # Доповнений запит звужує вже відібрані рядки, а не весь список
+        self.filter_job = None
+        query = self.search_entry.get().strip()
+        if not self.model.set_filter(query): return
+        self.status_bar.configure(text=f"Фільтр «{query}»: {len(self.view)} з {len(self.view.index)}" if query
+                                  else f"Елементів: {len(self.view)}")
+        self.on_select(None)
+
+    def clear_filter(self):
+        if self.filter_job: self.after_cancel(self.filter_job)
+        self.filter_job = None
+        self.model.clear_filter()
+
+    def search_index(self):
+        query = self.search_entry.get().strip()
+        if not query or not self.file_index: return self.load_directory(use_cache=True)
+        self.model.loader.cancel()
+        self.stop_tree_search()
+        self.tree_search = None
+        self.clear_filter()
+        self.set_tree_mode(False)
+        from file_index import search_async
+        search_async(self, self.file_index, query, lambda entries, error: self.show_search_results(query, entries, error))
+
+    def show_search_results(self, query, entries, error):
+        if error: return messagebox.showerror("Помилка", str(error))
+        self.model.enter_search()
+        self.model.filter_query = query  # набраний запит не фільтрує ще й результати
+        entries.sort(key=entry_sort_key)
+        self.view.set_rows(entries)
+        self.status_bar.configure(text=f"«{query}»: {len(entries)}  |  {self.file_index.stats_text()}")
+
+    def search_in_files(self):
+        from content_search_window import ContentSearchWindow  # пули процесів — лише при відкритті
+        ContentSearchWindow(self, self.model.current_path, self.open_path, format_size,
+                            bg=self.bg_field, fg=self.fg_white, button_bg=self.accent, font=('Arial', 8))
+
+    def find_duplicates(self):
+        from duplicates_window import DuplicatesWindow
+        DuplicatesWindow(self, self.model.current_path, self.open_path, format_size,
+                         bg=self.bg_field, fg=self.fg_white, button_bg=self.accent, font=('Arial', 8))
+
+    def open_path(self, path):
+        # Файл з архіву спершу розпаковується в кеш — лише він один
+        if archives.is_member(path): return archives.extract_async(self, path, self.on_member_extracted)
+        import subprocess  # лише для відкриття файлів, не при запуску
+        try: subprocess.Popen(['xdg-open', path])
+        except OSError: messagebox.showerror("Помилка", f"Не вдалося відкрити {path}")
+
+    def on_member_extracted(self, path, error):
+        if error: messagebox.showerror("Помилка", f"Не вдалося розпакувати:\n{error}")
+        else: self.open_path(path)
+
+    def search_here(self):
+        from search_dialog import SearchHereDialog
+        SearchHereDialog(self, self.model.current_path, self.start_tree_search, pattern=self.search_entry.get().strip(),
+                         bg=self.bg_field, fg=self.fg_white, button_bg=self.accent, font=('Arial', 8))
+
+    def start_tree_search(self, criteria):
+        # Результати дописуються в кінець у порядку знаходження
+        self.stop_tree_search()
+        self.clear_filter()
+        self.set_tree_mode(False)
+        self.model.enter_search(sort_key=None)
+        self.view.set_rows([])
+        from tree_search import RecursiveSearch
+        self.tree_search = RecursiveSearch(self.model.current_path, criteria).start()
+        self.stop_btn.pack(anchor="e", padx=5, before=self.status_bar)
+        self.poll_tree_search(self.tree_search)
+
+    def poll_tree_search(self, search):
+        if search is not self.tree_search: return
+        rows = search.take()
+        if rows: self.view.append_rows(rows)
+        text = f"Знайдено: {search.found}, {search.rate():.0f}/с, папок: {search.dirs_scanned}"
+        if search.done:
+            self.stop_btn.pack_forget()
+            self.status_bar.configure(text=text + (" (зупинено)" if search.cancelled.is_set() else f" за {search.elapsed:.2f} с"))
+        else:
+            self.status_bar.configure(text=text + "...")
+            self.after(100, self.poll_tree_search, search)
+
+    def stop_tree_search(self):
+        if self.tree_search: self.tree_search.cancel()
+        self.stop_btn.pack_forget()
+
+    def on_scan_done(self, count):
+        self.status_bar.configure(text=f"Елементів: {count}  |  {self.model.listing_cache.stats_text()}  |  {self.model.prefetcher.stats_text()}")
+
+    def on_scan_error(self, error):
+        self.status_bar.configure(text="")
+        messagebox.showerror("Помилка", f"Доступ обмежено: {error}")
+
+    def sort_column(self, col):
+        self.model.sort_column(col)  # повторний клік по тій самій колонці змінює напрямок
+
+    def on_sorted(self, col, reverse):
+        for c, title in self.column_titles.items():
+            self.tree.heading(c, text=title + ((" ▼" if reverse else " ▲") if c == col else ""))
 
     def open_selected(self):
-        if self.selected_items:
-            path = self.selected_items[0]
-            if os.path.isdir(path):
-                self.current_path = path
-                self.history = self.history[:self.history_index + 1]
-                self.history.append(path)
-                self.history_index = len(self.history) - 1
-                self.load_directory()
-            else:
-                try:
-                    if os.name == 'nt': os.startfile(path)
-                    else: subprocess.Popen(['xdg-open', path])
-                except: self.show_properties()
+        if not self.model.selected_items: return
+        path = self.model.selected_items[0]
+        if self.model.navigate_to(path): return  # папка чи архів
+        if archives.is_member(path): return self.open_path(path)
+        import subprocess
+        try:
+            if os.name == 'nt': os.startfile(path)
+            else: subprocess.Popen(['xdg-open', path])
+        except: self.show_properties()
 
     def show_properties(self):
-        if not self.selected_items: return
-        path = self.selected_items[0]
-        stats = os.stat(path)
+        if not self.model.selected_items: return
+        path = self.model.selected_items[0]
+        in_archive = archives.is_member(path)
+        try:
+            # Члена архіву немає на диску: розмір і дата — з індексу архіву
+            if in_archive: is_dir, size, mtime = archives.member_stat(path)
+            else:
+                try: stats = os.stat(path)  # посилання — властивості цілі
+                except FileNotFoundError: stats = os.lstat(path)  # бите посилання
+                is_dir, size, mtime = stat.S_ISDIR(stats.st_mode), stats.st_size, stats.st_mtime
+        except OSError as e: return messagebox.showerror("Помилка", str(e))
+        size_text = "обчислення..." if is_dir else format_size(size)
+        disk_text = content_text = "" if is_dir else "—"
+        if in_archive and is_dir:
+            dirs, files = archives.walk(path)
+            size_text, content_text = format_size(sum(s for _, s in files)), f"{len(files)} файлів, {max(len(dirs) - 1, 0)} папок"
+        elif not in_archive and not is_dir: disk_text = format_size(stats.st_blocks * 512)
         
         prop_win = tk.Toplevel(self)
         prop_win.title("Властивості")
-        prop_win.geometry("320x220")
+        prop_win.geometry("320x290")
         prop_win.configure(bg=self.bg_field)
         prop_win.resizable(False, False)
         
@@ -182,86 +384,144 @@ class TinyStarExplor(tk.Tk):
         
         info = [
             ("Назва:", os.path.basename(path)),
-            ("Тип:", "Папка" if os.path.isdir(path) else "Файл"),
-            ("Розмір:", self.format_size(stats.st_size)),
-            ("Змінено:", datetime.datetime.fromtimestamp(stats.st_mtime).strftime("%d.%m.%Y %H:%M")),
+            ("Тип:", "Папка" if is_dir else "Файл"),
+            ("Розмір:", size_text),
+            ("На диску:", disk_text),
+            ("Вміст:", content_text),
+            ("Змінено:", datetime.datetime.fromtimestamp(mtime).strftime("%d.%m.%Y %H:%M")),
             ("Шлях:", path)
         ]
         
+        values = {}
         for label, val in info:
             f = tk.Frame(container, bg=self.bg_field)
             f.pack(fill="x", pady=2)
             tk.Label(f, text=label, bg=self.bg_field, fg="#aaaaaa", font=("Arial", 9, "bold")).pack(side="left")
-            tk.Label(f, text=val, bg=self.bg_field, fg=self.fg_white, font=("Arial", 9), wraplength=220, justify="left").pack(side="left", padx=5)
+            values[label] = tk.Label(f, text=val, bg=self.bg_field, fg=self.fg_white, font=("Arial", 9), wraplength=220, justify="left")
+            values[label].pack(side="left", padx=5)
+        if is_dir and not in_archive: self.show_dir_usage(prop_win, container, path, values)
 
-    def navigate_to_path(self):
-        path = self.path_entry.get()
-        if os.path.isdir(path):
-            self.current_path = path
-            self.load_directory()
-        else:
-            messagebox.showerror("Помилка", "Шлях не знайдено")
+    def show_dir_usage(self, prop_win, container, path, values):
+        # Розмір папки рахується у фоні, вікно показує проміжні підсумки
+        scans = [self.usage_scan([path])]
+
+        def poll():
+            if not prop_win.winfo_exists(): return
+            scan = scans[-1]
+            t = scan.totals[path]
+            more = "" if scan.done else "…"
+            values["Розмір:"].configure(text=f"{format_size(t.apparent)}{more}")
+            values["На диску:"].configure(text=f"{format_size(t.disk)}{more}")
+            values["Вміст:"].configure(text=f"{t.files} файлів, {max(t.dirs - 1, 0)} папок" + (f", помилок: {t.errors}" if t.errors else ""))
+            if not scan.done: prop_win.after(200, poll)
 
-    def go_back(self):
-        if self.history_index > 0:
-            self.history_index -= 1
-            self.current_path = self.history[self.history_index]
-            self.load_directory()
+        def recount():
+            scans[-1].cancel()
+            self.usage_cache.discard_tree(path)
+            scans.append(self.usage_scan([path]))
+            poll()
 
-    def go_forward(self):
-        if self.history_index < len(self.history) - 1:
-            self.history_index += 1
-            self.current_path = self.history[self.history_index]
-            self.load_directory()
+        tk.Button(container, text="Перерахувати", command=recount, bg=self.accent, fg=self.fg_white, relief="flat", font=("Arial", 8)).pack(anchor="e", pady=(5, 0))
+        prop_win.bind("<Destroy>", lambda e: scans[-1].cancel() if e.widget is prop_win else None)
+        poll()
+
+    def navigate_to_path(self):
+        if not self.model.navigate_to(self.path_entry.get()): messagebox.showerror("Помилка", "Шлях не знайдено")
 
     def on_select(self, event):
-        self.selected_items = [self.tree.item(i, 'tags')[0] for i in self.tree.selection()]
+        paths = self.lazy_tree.selected_paths() if self.tree_mode else [row.path for row in self.view.selected_rows()]
+        self.model.select(paths, prefetch=not self.tree_mode)
+        if self.preview and self.preview.winfo_manager():
+            rows = [self.lazy_tree.entries.get(p) for p in paths[:1]] if self.tree_mode else self.view.selected_rows()[:1]
+            entry = rows[0] if rows else None
+            if entry is not self.preview.current: self.preview.show(entry)
+
+    def on_rows_visible(self, rows):
+        self.model.stat_filler.prioritize(rows)
+        if self.preview and self.preview.winfo_manager(): self.preview.prioritize(rows)
+
+    def toggle_preview(self):
+        if self.preview and self.preview.winfo_manager(): self.preview.pack_forget(); self.preview.show(None); return
+        if self.preview is None:
+            from preview_pane import PreviewPane  # мініатюри — у фоні
+            self.preview = PreviewPane(self.main_frame, format_size, bg=self.bg_dark, fg=self.fg_white,
+                                       text_bg=self.bg_field, font=('Arial', 8), width=180)
+        self.preview.pack(side="right", fill="y", before=self.hier_tree if self.tree_mode else self.tree); self.on_select(None)
+
+    def set_tree_mode(self, enabled):
+        if enabled == self.tree_mode: return
+        self.tree_mode = enabled
+        (self.hier_tree if enabled else self.tree).pack(fill="both", expand=True)
+        (self.tree if enabled else self.hier_tree).pack_forget()
+        if enabled and self.lazy_tree is None:
+            from lazy_tree import LazyTree
+            self.lazy_tree = LazyTree(self.hier_tree, self.format_row, cache=self.model.listing_cache,
+                                      on_error=lambda path, e: self.status_bar.configure(text=f"Помилка: {path}: {e.strerror or e}"))
+            self.hier_tree.bind('<<TreeviewSelect>>', self.on_select, add='+')
+            self.hier_tree.bind('<Double-Button-1>', lambda e: self.open_item(self.hier_tree.identify_row(e.y)), add='+')
+        if enabled: self.lazy_tree.set_root(self.model.current_path)
+        else: self.lazy_tree.stop()
+        self.on_select(None)
+
+    def open_item(self, path):
+        # Файл з дерева відкривається, папка розгортається самим Treeview, архів — як папка
+        entry = self.lazy_tree.entries.get(path)
+        if entry is None or entry.is_dir: return
+        if not self.model.navigate_to(path): self.open_path(path)
 
     def create_folder(self):
         name = simpledialog.askstring("Папка", "Назва:")
         if name:
-            os.makedirs(os.path.join(self.current_path, name), exist_ok=True)
-            self.load_directory()
+            try: self.model.create_folder(name)
+            except OSError as e: messagebox.showerror("Помилка", str(e))
 
     def create_file(self):
         name = simpledialog.askstring("Файл", "Назва:")
         if name:
-            Path(os.path.join(self.current_path, name)).touch()
-            self.load_directory()
+            try: self.model.create_file(name)
+            except OSError as e: messagebox.showerror("Помилка", str(e))
 
     def copy_items(self):
-        self.clipboard_items = self.selected_items.copy()
-        self.clipboard_operation = 'copy'
+        self.model.copy(self.model.selected_items)
 
     def cut_items(self):
-        self.clipboard_items = self.selected_items.copy()
-        self.clipboard_operation = 'cut'
+        self.model.cut(self.model.selected_items)
 
     def paste_items(self):
-        if not self.clipboard_items: return
-        for item in self.clipboard_items:
-            dest = os.path.join(self.current_path, os.path.basename(item))
-            if self.clipboard_operation == 'copy':
-                if os.path.isdir(item): shutil.copytree(item, dest, dirs_exist_ok=True)
-                else: shutil.copy2(item, dest)
-            else: shutil.move(item, dest)
-        self.load_directory()
+        self.model.plan_paste(self.confirm_paste)
+
+    def confirm_paste(self, plan):
+        if not plan.walks and not plan.renames:
+            if plan.errors: messagebox.showerror("Помилка", "\n".join(f"{p}: {e}" for p, e in plan.errors[:10]))
+            return
+        from plan_dialog import PlanDialog
+        PlanDialog(self, plan, format_size, self.start_transfer, policy=OVERWRITE,
+                   bg=self.bg_field, fg=self.fg_white, button_bg=self.accent, font=('Arial', 8))
+
+    def start_transfer(self, plan, pairs):
+        self.show_transfer(self.model.start_transfer(plan, pairs))
+
+    def on_transfer_finished(self, job):
+        self.model.job_finished(job)
+        if job.errors: messagebox.showerror("Помилка", "\n".join(f"{path}: {error}" for path, error in job.errors[:10]))
+        elif job.operation != 'delete': self.status_bar.configure(text=f"Вставлено ({job.method_summary()})")
 
     def delete_items(self):
+        if not self.model.selected_items: return
         if messagebox.askyesno("Видалення", "Видалити вибране?"):
-            for item in self.selected_items:
-                if os.path.isdir(item): shutil.rmtree(item)
-                else: os.remove(item)
-            self.load_directory()
+            # Миттєве від'єднання у відстійник, вміст видаляється у фоні
+            self.show_transfer(self.model.delete(self.model.selected_items))
 
     def rename_item(self):
-        if not self.selected_items: return
-        old = self.selected_items[0]
+        if not self.model.selected_items: return
+        old = self.model.selected_items[0]
         new_name = simpledialog.askstring("Назва", "Нова назва:", initialvalue=os.path.basename(old))
         if new_name:
-            os.rename(old, os.path.join(os.path.dirname(old), new_name))
-            self.load_directory()
+            try: self.model.rename(old, new_name)
+            except OSError as e: messagebox.showerror("Помилка", str(e))
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()  # для пулу процесів пошуку у файлах (spawn, PyInstaller)
     app = TinyStarExplor()
     app.mainloop()
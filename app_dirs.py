@@ -0,0 +1,33 @@
+"""Каталоги даних, кешу і налаштувань провідників (за XDG)"""
+import os
+
+APP_NAME = 'starexplor'
+
+
+def _xdg(var, default):
+    base = os.environ.get(var) or os.path.join(os.path.expanduser('~'), default)
+    return os.path.join(base, APP_NAME)
+
+
+def data_dir(create=True):
+    """~/.local/share/starexplor"""
+    path = _xdg('XDG_DATA_HOME', os.path.join('.local', 'share'))
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
+
+
+def cache_dir(create=True):
+    """~/.cache/starexplor"""
+    path = _xdg('XDG_CACHE_HOME', '.cache')
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
+
+
+def config_dir(create=True):
+    """~/.config/starexplor"""
+    path = _xdg('XDG_CONFIG_HOME', '.config')
+    if create:
+        os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,613 @@
+"""Архіви zip і tar як віртуальні папки (без розпакування).
+
+Шлях усередині архіву записується як звичайний: /тека/logs.tar.gz/2023/a.log.
+Список вмісту будується один раз з індексу членів — центрального
+каталогу zip або одного проходу заголовками tar із запам'ятовуванням
+зсувів — і кешується за шляхом і відбитком архіву. Індекс tar
+зберігається ще й на диску: стиснений tar не має каталогу, тож без
+цього кожне відкриття означало б повне розпакування потоку.
+
+Перегляд ніколи не розпаковує вміст файлів; копіювання члена читає
+лише його (для zip — лише його стиснені дані, для нестисненого tar —
+лише його байти за збереженим зсувом).
+"""
+import bz2
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import queue
+import struct
+import threading
+import time
+import zipfile
+import zlib
+from collections import OrderedDict
+
+import app_dirs
+
+ZIP_SUFFIXES = ('.zip', '.jar', '.whl', '.apk', '.epub')
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+# Скільки індексів тримати в пам'яті
+MAX_INDEXES = 8
+COPY_CHUNK = 1024 * 1024
+# Назва методу копіювання для підсумку перенесення
+EXTRACT = 'extract'
+INDEX_VERSION = 1
+
+# Записи zip: кінець каталогу (і Zip64), запис каталогу (без полів,
+# які не потрібні: версії, диск, атрибути), локальний заголовок
+_EOCD = struct.Struct('<4s4H2LH')
+_EOCD64_LOCATOR = struct.Struct('<4sLQL')
+_EOCD64 = struct.Struct('<4sQ2H2L4Q')
+_CENTRAL = struct.Struct('<4s4x4H3L3H8xL')
+_LOCAL = struct.Struct('<4s2B4HL2L2H')
+# Типи звичайних файлів tar ('\0' — старий формат, '7' — суцільний файл)
+_TAR_REGULAR = (b'0', b'\0', b'7')
+
+_lock = threading.Lock()
+_indexes = OrderedDict()  # шлях архіву -> ArchiveIndex
+_dos_times = {}
+
+
+def is_archive(name):
+    name = name.lower()
+    return name.endswith(ZIP_SUFFIXES) or name.endswith(TAR_SUFFIXES)
+
+
+def split_path(path):
+    """(архів, шлях усередині) для шляху в архіві або самого архіву, інакше None
+
+    Для звичайних шляхів без «архівних» назв диск не чіпається.
+    """
+    path = os.path.normpath(path)
+    parts = path.split(os.sep)
+    for i in range(1, len(parts) + 1):
+        if not is_archive(parts[i - 1]):
+            continue
+        archive = os.sep.join(parts[:i]) or os.sep
+        if os.path.isfile(archive):
+            return archive, '/'.join(parts[i:])
+    return None
+
+
+def is_member(path):
+    """Чи вказує шлях на щось усередині архіву (не на сам архів)"""
+    split = split_path(path)
+    return split is not None and split[1] != ''
+
+
+def archive_stamp(archive):
+    try:
+        st = os.stat(archive)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ArchiveIndex:
+    """Члени архіву: шлях -> (is_dir, size, mtime, посилання на дані)
+
+    Посилання — назва члена для zip або зсув даних для tar; children —
+    назви вмісту кожної папки ('' — корінь архіву).
+    """
+
+    def __init__(self, archive, kind, stamp):
+        self.archive = archive
+        self.kind = kind
+        self.stamp = stamp
+        self.members = {'': (True, 0, 0.0, None)}
+        self.children = {'': []}
+
+    def add(self, inner, is_dir, size, mtime, ref):
+        inner = inner.strip('/')
+        if '//' in inner or '/.' in '/' + inner:
+            # Рідкісні назви з «.», «..» чи порожніми частинами
+            parts = [p for p in inner.split('/') if p and p != '.']
+            if '..' in parts:
+                # Шляхи, що виходять за межі архіву, не показуються
+                return
+            inner = '/'.join(parts)
+        if not inner:
+            return
+        parent, _, name = inner.rpartition('/')
+        if parent not in self.members:
+            self._add_dir(parent, mtime)
+        known = self.members.get(inner)
+        if known is None:
+            self.children[parent].append(name)
+            if is_dir:
+                self.children[inner] = []
+        elif known[0]:
+            if not is_dir:
+                return
+            ref = known[3]
+        self.members[inner] = (is_dir, size, mtime, ref)
+
+    def _add_dir(self, path, mtime):
+        """Папка, якої немає окремим членом, додається неявно"""
+        parent, _, name = path.rpartition('/')
+        if parent not in self.members:
+            self._add_dir(parent, mtime)
+        self.members[path] = (True, 0, mtime, None)
+        self.children[parent].append(name)
+        self.children[path] = []
+
+    def rows(self):
+        return [[inner, is_dir, size, mtime, ref]
+                for inner, (is_dir, size, mtime, ref) in self.members.items() if inner]
+
+
+def _dos_time(d, t):
+    """Час зміни з полів дати/часу DOS (однакові значення обчислюються раз)"""
+    key = (d << 16) | t
+    mtime = _dos_times.get(key)
+    if mtime is None:
+        try:
+            mtime = time.mktime(((d >> 9) + 1980, (d >> 5) & 0xF, d & 0x1F,
+                                 t >> 11, (t >> 5) & 0x3F, (t & 0x1F) * 2, 0, 0, -1))
+        except (OverflowError, ValueError):
+            mtime = 0.0
+        if len(_dos_times) < 100_000:
+            _dos_times[key] = mtime
+    return mtime
+
+
+def _zip64_extra(extra, usize, csize, offset):
+    """Справжні розміри і зсув з поля Zip64 (0x0001), якщо в заголовку 0xFFFFFFFF"""
+    pos = 0
+    while pos + 4 <= len(extra):
+        tag, length = struct.unpack_from('<HH', extra, pos)
+        if tag == 1:
+            values = iter(struct.unpack_from(f'<{length // 8}Q', extra, pos + 4))
+            if usize == 0xFFFFFFFF:
+                usize = next(values)
+            if csize == 0xFFFFFFFF:
+                csize = next(values)
+            if offset == 0xFFFFFFFF:
+                offset = next(values)
+            break
+        pos += 4 + length
+    return usize, csize, offset
+
+
+def _central_directory(f):
+    """(байти центрального каталогу, кількість записів, зсув початку zip у файлі)"""
+    size = f.seek(0, os.SEEK_END)
+    tail_size = min(size, _EOCD.size + 0xFFFF)
+    f.seek(size - tail_size)
+    tail = f.read(tail_size)
+    pos = tail.rfind(b'PK\x05\x06')
+    if pos < 0:
+        raise zipfile.BadZipFile("немає кінця центрального каталогу")
+    eocd_pos = size - tail_size + pos
+    _, _, _, _, count, cd_size, cd_offset, _ = _EOCD.unpack_from(tail, pos)
+    end = eocd_pos
+    locator = pos - _EOCD64_LOCATOR.size
+    if locator >= 0 and tail[locator:locator + 4] == b'PK\x06\x07':
+        f.seek(_EOCD64_LOCATOR.unpack_from(tail, locator)[2])
+        record = f.read(_EOCD64.size)
+        if record[:4] == b'PK\x06\x06':
+            count, cd_size, cd_offset = _EOCD64.unpack(record)[7:10]
+            end = eocd_pos - _EOCD64_LOCATOR.size - _EOCD64.size
+    # Дані перед zip (саморозпакувальні архіви) зсувають усі зсуви
+    concat = end - cd_size - cd_offset
+    f.seek(cd_offset + concat)
+    return f.read(cd_size), count, concat
+
+
+def _read_zip(archive, stamp):
+    index = ArchiveIndex(archive, 'zip', stamp)
+    # Читається лише центральний каталог наприкінці файлу; записи
+    # розбираються напряму, без створення ZipInfo на кожен член
+    with open(archive, 'rb') as f:
+        data, count, concat = _central_directory(f)
+    pos = 0
+    unpack = _CENTRAL.unpack_from
+    for _ in range(count):
+        (sig, flags, method, t, d, crc, csize, usize,
+         name_len, extra_len, comment_len, offset) = unpack(data, pos)
+        if sig != b'PK\x01\x02':
+            raise zipfile.BadZipFile("пошкоджений центральний каталог")
+        start = pos + _CENTRAL.size
+        name = data[start:start + name_len].decode('utf-8' if flags & 0x800 else 'cp437', 'replace')
+        if 0xFFFFFFFF in (usize, csize, offset):
+            usize, csize, offset = _zip64_extra(data[start + name_len:start + name_len + extra_len],
+                                                usize, csize, offset)
+        pos = start + name_len + extra_len + comment_len
+        if name.endswith('/'):
+            index.add(name, True, 0, _dos_time(d, t), None)
+        else:
+            index.add(name, False, usize, _dos_time(d, t), (offset + concat, method, csize, crc, flags))
+    return index
+
+
+def _open_tar(archive):
+    """Потік tar: нестиснений файл або розпакування gzip/bzip2/xz за сигнатурою"""
+    with open(archive, 'rb') as f:
+        magic = f.read(6)
+    if magic[:2] == b'\x1f\x8b':
+        return gzip.open(archive, 'rb')
+    if magic[:3] == b'BZh':
+        return bz2.open(archive, 'rb')
+    if magic == b'\xfd7zXZ\x00':
+        return lzma.open(archive, 'rb')
+    return open(archive, 'rb')
+
+
+def _tar_number(field):
+    if field[0] & 0x80:
+        # Двійкове кодування GNU для великих розмірів
+        return int.from_bytes(field[1:], 'big')
+    return int(field.split(b'\0', 1)[0].strip() or b'0', 8)
+
+
+def _tar_text(field):
+    return field.split(b'\0', 1)[0].decode('utf-8', 'surrogateescape')
+
+
+def _tar_checksums(block):
+    """Суми байтів заголовка (поле суми — пробіли): без знака і зі знаком"""
+    unsigned = sum(block[:148]) + 256 + sum(block[156:])
+    if unsigned == _tar_number(block[148:156]):
+        return (unsigned,)
+    signed = sum(struct.unpack_from('148b', block)) + 256 + sum(struct.unpack_from('356b', block, 156))
+    return unsigned, signed
+
+
+def _pax_records(data):
+    records = {}
+    pos = 0
+    while pos < len(data):
+        space = data.find(b' ', pos)
+        if space < 0:
+            break
+        length = int(data[pos:space])
+        key, _, value = data[space + 1:pos + length - 1].partition(b'=')
+        records[key.decode('utf-8', 'replace')] = value.decode('utf-8', 'surrogateescape')
+        pos += length
+    return records
+
+
+def _tar_members(f):
+    """(назва, тип, розмір, mtime, зсув даних) членів одним проходом заголовками
+
+    Вміст членів пропускається через seek (для стисненого потоку —
+    розпаковується і відкидається). Довгі назви GNU і записи pax
+    враховуються.
+    """
+    pos = 0
+    long_name = None
+    pax = {}
+    while True:
+        f.seek(pos)
+        block = f.read(512)
+        if pos == 0 and (len(block) < 512 or _tar_number(block[148:156]) not in _tar_checksums(block)):
+            # Сума перевіряється лише в першому заголовку — щоб відрізнити не-tar
+            raise ValueError("це не архів tar")
+        if len(block) < 512 or not block.strip(b'\0'):
+            return
+        kind = block[156:157]
+        size = _tar_number(block[124:136])
+        data_pos = pos + 512
+        if kind in (b'L', b'x'):
+            data = f.read(size)
+            if kind == b'L':
+                long_name = _tar_text(data)
+            else:
+                pax = _pax_records(data)
+            pos = data_pos + (size + 511) // 512 * 512
+            continue
+        name = _tar_text(block[:100])
+        if block[257:262] == b'ustar' and block[345]:
+            name = _tar_text(block[345:500]) + '/' + name
+        mtime = _tar_number(block[136:148])
+        if long_name is not None:
+            name, long_name = long_name, None
+        if pax:
+            name = pax.get('path', name)
+            size = int(pax.get('size', size))
+            mtime = float(pax.get('mtime', mtime))
+            if any(key.startswith('GNU.sparse') for key in pax):
+                kind = b'S'
+            pax = {}
+        if kind != b'g':
+            yield name, kind, size, float(mtime), data_pos
+        pos = data_pos + (size + 511) // 512 * 512
+
+
+def _read_tar(archive, stamp):
+    index = ArchiveIndex(archive, 'tar', stamp)
+    # Розбираються лише потрібні поля заголовків: TarInfo на кожен член
+    # у кілька разів повільніший
+    with _open_tar(archive) as f:
+        try:
+            for name, kind, size, mtime, offset in _tar_members(f):
+                if kind == b'5' or (kind in _TAR_REGULAR and name.endswith('/')):
+                    index.add(name, True, 0, mtime, None)
+                elif kind in _TAR_REGULAR:
+                    index.add(name, False, size, mtime, offset)
+                # Посилання, пристрої і розріджені файли не показуються
+        except (ValueError, IndexError) as e:
+            raise OSError(f"пошкоджений заголовок tar: {e}")
+    return index
+
+
+def _index_file(archive):
+    digest = hashlib.md5(os.path.abspath(archive).encode('utf-8', 'surrogateescape')).hexdigest()
+    return os.path.join(app_dirs.cache_dir(), 'archives', digest + '.json')
+
+
+def _load_saved(archive, stamp):
+    try:
+        with open(_index_file(archive), encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('version') != INDEX_VERSION or data.get('path') != archive or tuple(data.get('stamp', ())) != stamp:
+        return None
+    index = ArchiveIndex(archive, data['kind'], stamp)
+    for inner, is_dir, size, mtime, ref in data['members']:
+        index.add(inner, is_dir, size, mtime, ref)
+    return index
+
+
+def _save(index):
+    path = _index_file(index.archive)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'path': index.archive, 'kind': index.kind,
+                       'stamp': list(index.stamp), 'members': index.rows()}, f, separators=(',', ':'))
+        os.replace(tmp, path)
+    except (OSError, ValueError):
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def get_index(archive):
+    """Індекс архіву з кешу або прочитаний заново (OSError, якщо це не архів)"""
+    stamp = archive_stamp(archive)
+    if stamp is None:
+        raise FileNotFoundError(archive)
+    with _lock:
+        index = _indexes.get(archive)
+        if index is not None and index.stamp == stamp:
+            _indexes.move_to_end(archive)
+            return index
+    try:
+        if archive.lower().endswith(ZIP_SUFFIXES):
+            index = _read_zip(archive, stamp)
+        else:
+            index = _load_saved(archive, stamp)
+            if index is None:
+                index = _read_tar(archive, stamp)
+                _save(index)
+    except (zipfile.BadZipFile, lzma.LZMAError, struct.error, EOFError) as e:
+        raise NotADirectoryError(f"{archive}: {e}")
+    with _lock:
+        _indexes[archive] = index
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def _lookup(path):
+    split = split_path(path)
+    if split is None:
+        raise NotADirectoryError(path)
+    archive, inner = split
+    index = get_index(archive)
+    member = index.members.get(inner)
+    if member is None:
+        raise FileNotFoundError(path)
+    return index, inner, member
+
+
+def is_dir(path):
+    """Чи можна відкрити шлях як папку: звичайна папка, архів або папка в архіві"""
+    if os.path.isdir(path):
+        return True
+    split = split_path(path)
+    if split is None:
+        return False
+    if split[1] == '':
+        return True
+    try:
+        return _lookup(path)[2][0]
+    except OSError:
+        return False
+
+
+def list_dir(path):
+    """Вміст папки архіву: [(назва, повний шлях, is_dir, size, mtime)]"""
+    index, inner, member = _lookup(path)
+    if not member[0]:
+        raise NotADirectoryError(path)
+    path = os.path.normpath(path)
+    result = []
+    for name in index.children.get(inner, ()):
+        is_dir, size, mtime, _ = index.members[f'{inner}/{name}' if inner else name]
+        result.append((name, os.path.join(path, name), is_dir, size, mtime))
+    return result
+
+
+def stamp_for(path):
+    """Відбиток папки всередині архіву — відбиток самого архіву (або None)"""
+    split = split_path(path)
+    return archive_stamp(split[0]) if split is not None else None
+
+
+def member_stat(path):
+    """(is_dir, size, mtime) члена архіву"""
+    return _lookup(path)[2][:3]
+
+
+def walk(path):
+    """Вміст члена для копіювання: (відносні папки, [(відносний шлях, розмір)])"""
+    index, inner, (is_dir, size, _, _) = _lookup(path)
+    if not is_dir:
+        return [], [('', size)]
+    dirs, files = [], []
+    stack = ['']
+    while stack:
+        rel = stack.pop()
+        dirs.append(rel)
+        base = f'{inner}/{rel}' if inner and rel else inner or rel
+        for name in index.children.get(base, ()):
+            child_rel = f'{rel}/{name}' if rel else name
+            child_is_dir, child_size, _, _ = index.members[f'{base}/{name}' if base else name]
+            if child_is_dir:
+                stack.append(child_rel)
+            else:
+                files.append((child_rel.replace('/', os.sep), child_size))
+    return [d.replace('/', os.sep) for d in dirs], files
+
+
+def copy_member(path, dest, progress=None, checkpoint=None):
+    """Записати вміст одного файлу архіву в dest, читаючи лише його дані"""
+    index, inner, (is_dir, size, mtime, ref) = _lookup(path)
+    if is_dir:
+        raise IsADirectoryError(path)
+    try:
+        if index.kind == 'zip':
+            with open(index.archive, 'rb') as f:
+                _copy_stream(_ZipMember(f, *ref), dest, progress, checkpoint)
+        else:
+            # Член читається за збереженим зсувом, без повторного обходу
+            with _open_tar(index.archive) as f:
+                f.seek(ref)
+                _copy_stream(_TarMember(f, size), dest, progress, checkpoint)
+    except (zlib.error, lzma.LZMAError, EOFError) as e:
+        # Помилки розпакування — як помилки читання: їх ловлять разом з OSError
+        raise OSError(f"{path}: пошкоджені дані архіву: {e}") from e
+    os.utime(dest, (mtime, mtime))
+
+
+class _ZipMember:
+    """Читання одного члена zip за зсувом його локального заголовка"""
+
+    def __init__(self, f, offset, method, csize, crc, flags):
+        if flags & 0x1:
+            raise OSError("зашифрований член архіву не підтримується")
+        if method == zipfile.ZIP_STORED:
+            self.decompressor = None
+        elif method == zipfile.ZIP_DEFLATED:
+            self.decompressor = zlib.decompressobj(-15)
+        elif method == zipfile.ZIP_BZIP2:
+            self.decompressor = bz2.BZ2Decompressor()
+        else:
+            raise OSError(f"метод стиснення {method} не підтримується")
+        f.seek(offset)
+        header = f.read(_LOCAL.size)
+        if len(header) < _LOCAL.size or header[:4] != b'PK\x03\x04':
+            raise OSError("пошкоджений локальний заголовок zip")
+        name_len, extra_len = _LOCAL.unpack(header)[-2:]
+        f.seek(offset + _LOCAL.size + name_len + extra_len)
+        self.f = f
+        self.left = csize
+        self.crc = crc
+        self.running = 0
+
+    def read(self, n):
+        while self.left > 0:
+            raw = self.f.read(min(n, self.left))
+            if not raw:
+                raise OSError("архів обрізано")
+            self.left -= len(raw)
+            data = raw if self.decompressor is None else self.decompressor.decompress(raw)
+            if data:
+                self.running = zlib.crc32(data, self.running)
+                return data
+        if hasattr(self.decompressor, 'flush'):
+            data, self.decompressor = self.decompressor.flush(), None
+            if data:
+                self.running = zlib.crc32(data, self.running)
+                return data
+        if self.running != self.crc:
+            raise OSError("контрольна сума члена архіву не збігається")
+        return b''
+
+
+class _TarMember:
+    """Читання size байтів з поточної позиції потоку tar"""
+
+    def __init__(self, f, size):
+        self.f = f
+        self.left = size
+
+    def read(self, n):
+        if self.left <= 0:
+            return b''
+        data = self.f.read(min(n, self.left))
+        if not data:
+            raise OSError("архів обрізано")
+        self.left -= len(data)
+        return data
+
+
+def _copy_stream(src, dest, progress, checkpoint):
+    with open(dest, 'wb') as out:
+        while True:
+            if checkpoint:
+                checkpoint()
+            chunk = src.read(COPY_CHUNK)
+            if not chunk:
+                break
+            out.write(chunk)
+            if progress:
+                progress(len(chunk))
+
+
+def extract_temp(path):
+    """Розпакувати один файл архіву в тимчасову папку кешу (для відкриття)"""
+    split = split_path(path)
+    digest = hashlib.md5(os.path.normpath(path).encode('utf-8', 'surrogateescape')).hexdigest()[:12]
+    folder = os.path.join(app_dirs.cache_dir(), 'opened', digest)
+    os.makedirs(folder, exist_ok=True)
+    dest = os.path.join(folder, os.path.basename(split[1]))
+    _, size, mtime = member_stat(path)
+    try:
+        st = os.stat(dest)
+        if st.st_size == size and int(st.st_mtime) == int(mtime):
+            return dest
+    except OSError:
+        pass
+    tmp = dest + '.part'
+    try:
+        copy_member(path, tmp)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    os.replace(tmp, dest)
+    return dest
+
+
+def extract_async(widget, path, on_ready, interval_ms=50):
+    """extract_temp у фоновому потоці; on_ready(шлях або None, помилка) через after()"""
+    result = queue.Queue()
+
+    def worker():
+        try:
+            result.put((extract_temp(path), None))
+        except Exception as e:
+            # Будь-яка помилка має дійти до on_ready, інакше poll чекатиме вічно
+            result.put((None, e))
+
+    def poll():
+        try:
+            extracted, error = result.get_nowait()
+        except queue.Empty:
+            widget.after(interval_ms, poll)
+            return
+        on_ready(extracted, error)
+
+    threading.Thread(target=worker, daemon=True).start()
+    widget.after(interval_ms, poll)
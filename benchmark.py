@@ -0,0 +1,669 @@
+"""Безголовий бенчмарк: читання списку, сортування, малювання, вставлення і видалення.
+
+Генерує синтетичні дерева (широке — усе в одній папці, глибоке —
+вкладені папки, і кілька великих файлів) і міряє для FileExplorer і
+TinyStarExplor етапи load_directory: scandir (разом з упорядкуванням за
+назвою, як у DirectoryScan), stat, format_row, вставку в Treeview через
+VirtualTreeview і повне завантаження через DirectoryLoader (перші рядки,
+увесь список, усі метадані); sort_column — для кожної колонки; запуск —
+імпорт модуля провідника в новому процесі, читання знімка сесії і час до
+першого рядка з ним. Вставлення
+(план і копіювання) і видалення (від'єднання і фонове видалення) в обох
+провідниках — той самий код, тож міряються один раз.
+
+Treeview справжній, якщо Tk може відкрити дисплей (напр., під xvfb-run),
+інакше — заглушка, яка ще й рахує виклики Tk. Кеш сторінок теплий:
+кожен замір повторюється --repeat разів і береться найкращий.
+
+    python3 benchmark.py --sizes 10k,100k --json bench.json
+    python3 benchmark.py --sizes 10k --save-baseline bench_baseline.json
+    python3 benchmark.py --sizes 10k --baseline bench_baseline.json
+
+З --baseline різниці друкуються таблицею, а регресії (повільніше більш
+ніж на --tolerance і на --min-delta) дають код виходу 1.
+"""
+import argparse
+import datetime
+import heapq
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Реєстр видалення і кеші — у робочій папці бенчмарку, а не в домашній
+WORKDIR = os.path.join(tempfile.gettempdir(), 'starexplor-bench')
+
+DEFAULT_SIZES = '10k'
+DEFAULT_SHAPES = 'wide,deep,huge'
+APPS = ('FileExplorer', 'TinyStarExplor')
+STAGES = ('list', 'sort', 'startup', 'paste', 'delete')
+# Видимих рядків у вікні, для якого міряється малювання
+VISIBLE_ROWS = 40
+# Порція рядків, як у DirectoryLoader
+CHUNK = 200
+# Глибоке дерево: підпапок і файлів у кожній папці
+DEEP_FANOUT = 2
+DEEP_FILES = 8
+HUGE_COUNT = 4
+HUGE_MB = 64
+TOLERANCE = 0.25
+MIN_DELTA = 0.005
+LOAD_TIMEOUT = 600
+
+
+def parse_size(text):
+    """'10k' -> 10000, '1m' -> 1000000"""
+    text = text.strip().lower()
+    factor = {'k': 1000, 'm': 1000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * factor)
+
+
+def size_label(n):
+    if n >= 1000_000 and n % 1000_000 == 0:
+        return f'{n // 1000_000}m'
+    if n >= 1000 and n % 1000 == 0:
+        return f'{n // 1000}k'
+    return str(n)
+
+
+# ---- Синтетичні дерева ----
+
+def _small_file(path, i):
+    with open(path, 'wb') as f:
+        f.write(b'x' * (i * 37 % 512))
+
+
+def make_wide(root, n):
+    """n записів в одній папці: кожен двадцятий — порожня папка"""
+    for i in range(n):
+        path = os.path.join(root, f'item{i}.log' if i % 20 else f'dir{i}')
+        if i % 20:
+            _small_file(path, i)
+        else:
+            os.mkdir(path)
+
+
+def make_deep(root, n):
+    """n записів у дереві: у кожній папці DEEP_FILES файлів і DEEP_FANOUT підпапок"""
+    created = 0
+    level = [root]
+    while created < n:
+        next_level = []
+        for folder in level:
+            for i in range(DEEP_FILES):
+                if created >= n:
+                    return
+                _small_file(os.path.join(folder, f'file{i}.txt'), created)
+                created += 1
+            for i in range(DEEP_FANOUT):
+                if created >= n:
+                    return
+                sub = os.path.join(folder, f'sub{i}')
+                os.mkdir(sub)
+                next_level.append(sub)
+                created += 1
+        level = next_level
+
+
+def make_huge(root, count=HUGE_COUNT, megabytes=HUGE_MB):
+    """Кілька великих файлів зі справжніми даними (не розріджених)"""
+    block = os.urandom(1024 * 1024)
+    for i in range(count):
+        with open(os.path.join(root, f'huge{i}.bin'), 'wb') as f:
+            for _ in range(megabytes):
+                f.write(block)
+
+
+def ensure_tree(workdir, shape, n):
+    """Шлях до згенерованого дерева (наявне використовується повторно)"""
+    name = f'huge-{HUGE_COUNT}x{HUGE_MB}m' if shape == 'huge' else f'{shape}-{size_label(n)}'
+    root = os.path.join(workdir, 'trees', name)
+    marker = root + '.ready'
+    if os.path.exists(marker):
+        return name, root
+    shutil.rmtree(root, ignore_errors=True)
+    os.makedirs(root)
+    started = time.perf_counter()
+    print(f'Генерація {name}...', file=sys.stderr, flush=True)
+    if shape == 'wide':
+        make_wide(root, n)
+    elif shape == 'deep':
+        make_deep(root, n)
+    else:
+        make_huge(root)
+    open(marker, 'w').close()
+    print(f'  {time.perf_counter() - started:.1f} с', file=sys.stderr, flush=True)
+    return name, root
+
+
+# ---- Заглушки Tk ----
+
+class StubRoot:
+    """Цикл подій з after() без дисплея: pump() виконує прострочені виклики"""
+
+    def __init__(self):
+        self.timers = []
+        self.cancelled = set()
+        self.counter = 0
+
+    def after(self, ms, func, *args):
+        self.counter += 1
+        heapq.heappush(self.timers, (time.perf_counter() + ms / 1000, self.counter, func, args))
+        return self.counter
+
+    def after_cancel(self, timer_id):
+        self.cancelled.add(timer_id)
+
+    def pump(self):
+        now = time.perf_counter()
+        if self.timers and self.timers[0][0] > now:
+            time.sleep(min(0.001, self.timers[0][0] - now))
+        while self.timers and self.timers[0][0] <= time.perf_counter():
+            _, timer_id, func, args = heapq.heappop(self.timers)
+            if timer_id in self.cancelled:
+                self.cancelled.discard(timer_id)
+                continue
+            func(*args)
+
+    def update_idletasks(self):
+        pass
+
+    def destroy(self):
+        self.timers = []
+
+
+class StubTreeview:
+    """Те, що VirtualTreeview викликає в ttk.Treeview; calls — кількість викликів Tk"""
+
+    def __init__(self, selectmode='extended', show='tree headings'):
+        self.options = {'selectmode': selectmode, 'show': show}
+        self.items = {}
+        self.attached = []
+        self.current = ()
+        self.calls = 0
+
+    def cget(self, option):
+        return self.options.get(option, '')
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    def bind(self, sequence, func=None, add=None):
+        pass
+
+    def insert(self, parent, index, iid=None, **options):
+        self.calls += 1
+        self.items[iid] = options
+        self.attached.append(iid)
+        return iid
+
+    def detach(self, *items):
+        self.calls += 1
+        for iid in items:
+            if iid in self.attached:
+                self.attached.remove(iid)
+
+    def move(self, iid, parent, index):
+        self.calls += 1
+        if iid in self.attached:
+            self.attached.remove(iid)
+        self.attached.insert(index, iid)
+
+    def item(self, iid, **options):
+        self.calls += 1
+        self.items[iid].update(options)
+
+    def selection_set(self, items):
+        self.calls += 1
+        self.current = tuple(items)
+
+    def selection(self):
+        return self.current
+
+    def focus(self, iid=None):
+        return ''
+
+    def focus_set(self):
+        pass
+
+    def bbox(self, iid):
+        return ''
+
+    def identify_row(self, y):
+        return ''
+
+    def identify_region(self, x, y):
+        return 'nothing'
+
+
+class Display:
+    """Справжній Tk (прихований) або заглушки; pump() — один крок циклу подій"""
+
+    def __init__(self, force_stub=False):
+        self.root = None
+        if not force_stub:
+            try:
+                import tkinter
+                self.root = tkinter.Tk()
+                self.root.withdraw()
+            except Exception:
+                self.root = None
+        self.stub = self.root is None
+        if self.stub:
+            self.root = StubRoot()
+
+    @property
+    def mode(self):
+        return 'stub' if self.stub else 'tk'
+
+    def make_tree(self, columns):
+        if self.stub:
+            return StubTreeview()
+        from tkinter import ttk
+        return ttk.Treeview(self.root, columns=columns, show='tree headings')
+
+    def pump(self):
+        if self.stub:
+            self.root.pump()
+        else:
+            self.root.update()
+            time.sleep(0.001)
+
+    def idle(self):
+        self.root.update_idletasks()
+
+    def close(self):
+        self.root.destroy()
+
+
+# ---- Провідники без вікна ----
+
+APP_MODULES = {'FileExplorer': 'file_explorer', 'TinyStarExplor': 'TinyStarExplor'}
+
+
+def app_class(name):
+    if name == 'FileExplorer':
+        from file_explorer import FileExplorer
+        return FileExplorer
+    from TinyStarExplor import TinyStarExplor
+    return TinyStarExplor
+
+
+def row_formatter(cls):
+    """format_row провідника без створення вікна: його методи на легкому об'єкті"""
+    methods = {name: getattr(cls, name) for name in ('format_row', 'dir_size_text')}
+    shim = type(f'{cls.__name__}Rows', (), methods)()
+    shim.dir_sizes = None
+    return shim.format_row
+
+
+APP_COLUMNS = {
+    'FileExplorer': ('size', 'modified', 'type'),
+    'TinyStarExplor': ('size', 'modified'),
+}
+
+
+def make_view(display, app, format_row, on_visible=None):
+    from virtual_tree import VirtualTreeview
+    from dir_scanner import entry_sort_key
+    tree = display.make_tree(APP_COLUMNS[app])
+    view = VirtualTreeview(tree, None, format_row, on_visible=on_visible)
+    view.sort_key = entry_sort_key
+    # Вікно не показується, тож <Configure> не надходить — висота задається тут
+    view.visible = VISIBLE_ROWS
+    view._ensure_slots()
+    return tree, view
+
+
+# ---- Заміри ----
+
+def best_of(repeat, func, setup=None):
+    """Найкращий час func() з repeat спроб (setup() — поза заміром)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        state = setup() if setup else None
+        started = time.perf_counter()
+        result = func(state) if setup else func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def raise_error(error):
+    raise error
+
+
+def pump_until(display, done, what):
+    """Крутити цикл подій, поки done() не стане істинним"""
+    deadline = time.perf_counter() + LOAD_TIMEOUT
+    while not done():
+        if time.perf_counter() > deadline:
+            raise RuntimeError(f'{what}: не завершилось за {LOAD_TIMEOUT} с')
+        display.pump()
+
+
+def bench_list(display, app, root, repeat, out):
+    """Етапи load_directory для одного провідника"""
+    from dir_scanner import fill_stat, list_directory
+    from directory_model import DirectoryModel
+    import perf_trace
+    format_row = row_formatter(app_class(app))
+
+    out['scandir'], entries = best_of(repeat, lambda: list_directory(root))
+    out['entries'] = len(entries)
+
+    def stat_all(rows):
+        for row in rows:
+            fill_stat(row)
+    out['stat'], _ = best_of(repeat, stat_all, lambda: list_directory(root))
+
+    def format_all():
+        for row in entries:
+            format_row(row)
+    out['format'], _ = best_of(repeat, format_all)
+    out['format_per_row_us'] = out['format'] / max(1, len(entries)) * 1e6
+
+    def insert(view):
+        calls = getattr(view.tree, 'calls', 0)
+        for i in range(0, len(entries), CHUNK):
+            view.append_rows(entries[i:i + CHUNK])
+        display.idle()
+        return getattr(view.tree, 'calls', 0) - calls
+    out['insert'], calls = best_of(repeat, insert, lambda: make_view(display, app, format_row)[1])
+    if display.stub:
+        out['insert_tk_calls'] = calls
+
+    # Повне завантаження через DirectoryModel провідників: потік сканування,
+    # порційна вставка і StatFiller; час — з дії 'load' у perf_trace
+    best = None
+    for _ in range(repeat):
+        _, view = make_view(display, app, format_row)
+        model = DirectoryModel(display.root, rows=view, path=root, watch=False, on_error=raise_error)
+        # Передвибірка сусідніх папок лише додала б шуму до вимірювання
+        model.prefetcher.max_dirs = 0
+        view.on_visible = model.stat_filler.prioritize
+        actions = []
+
+        def finished(action, actions=actions):
+            # Незакрита дія попереднього заміру закривається як перервана
+            if action.name == 'load' and not action.fields.get('interrupted'):
+                actions.append(action)
+        perf_trace.tracer.listeners.append(finished)
+        try:
+            model.load()
+            pump_until(display, lambda: actions, f'{root}: завантаження')
+        finally:
+            perf_trace.tracer.listeners.remove(finished)
+            model.stat_filler.clear()
+        action = actions[0]
+        if best is None or action.total < best.total:
+            best = action
+    out['load_first_rows'] = best.marks.get('first_rows', best.marks['listed'])
+    out['load_listed'] = best.marks['listed']
+    out['load_stat_done'] = best.total
+    return entries
+
+
+def bench_sort(display, app, entries, repeat, out):
+    """sort_column: перше сортування за кожною колонкою (кеш порядків порожній)"""
+    from dir_scanner import COLUMN_SORT_KEYS, fill_stat
+    format_row = row_formatter(app_class(app))
+    for row in entries:
+        if row.size is None:
+            fill_stat(row)
+    columns = ('name',) + APP_COLUMNS[app]
+    for column in columns:
+        key = COLUMN_SORT_KEYS[column]
+
+        def setup():
+            _, view = make_view(display, app, format_row)
+            view.set_rows(list(entries))
+            return view
+
+        def sort(view, column=column, key=key):
+            view.sort_by(column, key, reverse=True)
+            display.idle()
+        out[f'sort_{column}'], _ = best_of(repeat, sort, setup)
+
+
+def bench_import(app, repeat):
+    """Імпорт модуля провідника в новому процесі — усе, що передує вікну"""
+    code = (f'import time; started = time.perf_counter(); import {APP_MODULES[app]}; '
+            'print(time.perf_counter() - started)')
+    here = os.path.dirname(os.path.abspath(__file__))
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-c', code], cwd=here, check=True,
+                                capture_output=True, text=True)
+        elapsed = float(result.stdout)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_startup(display, app, root, workdir, repeat, out):
+    """Запуск зі знімком сесії: розмір і читання знімка, час до першого рядка"""
+    import session
+    from directory_model import DirectoryModel
+    format_row = row_formatter(app_class(app))
+    path = os.path.join(workdir, 'session.json')
+
+    def new_model():
+        _, view = make_view(display, app, format_row)
+        model = DirectoryModel(display.root, rows=view, path=root, watch=False, on_error=raise_error)
+        model.prefetcher.max_dirs = 0
+        return model
+
+    # Знімок — як при виході: список і метадані дочитано
+    model = new_model()
+    model.load()
+    pump_until(display, lambda: not model.busy and not model.stat_filler.active, f'{root}: завантаження')
+    session.write(model.snapshot(), path)
+    out['startup_snapshot_bytes'] = os.path.getsize(path)
+    out['startup_snapshot_read'], snapshot = best_of(repeat, lambda: session.read(path))
+    out['startup_snapshot_rows'] = len(snapshot['rows'] or ())
+
+    # Без рядків у знімку (завеликий список) перший рядок дає сканування
+    best = None
+    for _ in range(repeat):
+        model = new_model()
+        started = time.perf_counter()
+        model.restore(snapshot)
+        pump_until(display, lambda: len(model.rows), f'{root}: запуск')
+        display.idle()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        # Фонова перевірка знімка вже не потрібна
+        model.loader.cancel()
+        model.stat_filler.clear()
+    out['startup_first_rows'] = best
+
+
+def bench_paste(root, workdir, out):
+    """paste_items: план (обхід, місце, конфлікти) і фонове копіювання"""
+    from transfer_plan import RENAME, build_plan
+    from transfers import TransferJob, TransferManager
+    dest = os.path.join(workdir, 'paste')
+    shutil.rmtree(dest, ignore_errors=True)
+    os.makedirs(dest)
+    started = time.perf_counter()
+    plan = build_plan([root], dest, 'copy')
+    out['paste_plan'] = time.perf_counter() - started
+    manager = TransferManager()
+    started = time.perf_counter()
+    job = manager.submit(TransferJob(plan.resolve(RENAME), 'copy', plan=plan))
+    while not job.is_finished:
+        time.sleep(0.005)
+    out['paste_copy'] = time.perf_counter() - started
+    out['paste_bytes'] = plan.bytes_total
+    out['paste_files'] = plan.files_total
+    out['paste_mb_s'] = plan.bytes_total / max(out['paste_copy'], 1e-9) / 1e6
+    if job.errors:
+        out['paste_errors'] = len(job.errors)
+    return [os.path.join(dest, os.path.basename(root))]
+
+
+def bench_delete(paths, out):
+    """delete_items: миттєве від'єднання і фонове видалення"""
+    from bulk_delete import BulkDeleter
+    deleter = BulkDeleter()
+    started = time.perf_counter()
+    job = deleter.delete(paths)
+    out['delete_detach'] = time.perf_counter() - started
+    while not job.is_finished:
+        time.sleep(0.005)
+    out['delete_total'] = time.perf_counter() - started
+    if job.errors:
+        out['delete_errors'] = len(job.errors)
+
+
+def run(args):
+    os.makedirs(args.workdir, exist_ok=True)
+    for var, sub in (('XDG_DATA_HOME', 'data'), ('XDG_CACHE_HOME', 'cache')):
+        os.environ[var] = os.path.join(args.workdir, sub)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    display = Display(force_stub=args.stub)
+    stages = set(args.stages.split(','))
+    results = {}
+    trees = []
+    for shape in args.shapes.split(','):
+        sizes = [0] if shape == 'huge' else [parse_size(s) for s in args.sizes.split(',')]
+        for n in sizes:
+            trees.append(ensure_tree(args.workdir, shape, n))
+    try:
+        if 'startup' in stages:
+            for app in args.apps.split(','):
+                print(f'{app} / імпорт...', file=sys.stderr, flush=True)
+                results[f'{app}/startup_import'] = bench_import(app, args.repeat)
+        for name, root in trees:
+            for app in args.apps.split(','):
+                out = {}
+                print(f'{app} / {name}...', file=sys.stderr, flush=True)
+                entries = None
+                if 'list' in stages:
+                    entries = bench_list(display, app, root, args.repeat, out)
+                if 'sort' in stages:
+                    from dir_scanner import list_directory
+                    bench_sort(display, app, entries or list_directory(root), args.repeat, out)
+                if 'startup' in stages:
+                    bench_startup(display, app, root, args.workdir, args.repeat, out)
+                for stage, value in out.items():
+                    results[f'{app}/{name}/{stage}'] = value
+            out = {}
+            copied = None
+            if 'paste' in stages:
+                print(f'вставлення / {name}...', file=sys.stderr, flush=True)
+                copied = bench_paste(root, args.workdir, out)
+            if 'delete' in stages and copied:
+                print(f'видалення / {name}...', file=sys.stderr, flush=True)
+                bench_delete(copied, out)
+            for stage, value in out.items():
+                results[f'shared/{name}/{stage}'] = value
+    finally:
+        display.close()
+    return {
+        'meta': {
+            'date': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'display': display.mode,
+            'repeat': args.repeat,
+            'trees': [name for name, _ in trees],
+        },
+        'results': results,
+    }
+
+
+# ---- Звіт і порівняння ----
+
+# Метрики, для яких більше — краще (решта — час або кількість)
+HIGHER_IS_BETTER = ('_mb_s',)
+# Описові величини, які не порівнюються
+INFORMATIONAL = ('entries', 'paste_bytes', 'paste_files', 'startup_snapshot_rows')
+
+
+def compare(current, baseline, tolerance=TOLERANCE, min_delta=MIN_DELTA):
+    """[(ключ, базове, поточне, зміна, регресія)] для спільних ключів"""
+    rows = []
+    for key in sorted(set(current) & set(baseline)):
+        if key.rsplit('/', 1)[-1] in INFORMATIONAL:
+            continue
+        old, new = baseline[key], current[key]
+        change = (new - old) / old if old else 0.0
+        if key.endswith(HIGHER_IS_BETTER):
+            regressed = change < -tolerance
+        elif isinstance(new, int) or key.endswith('_tk_calls'):
+            regressed = new > old * (1 + tolerance)
+        else:
+            regressed = change > tolerance and new - old > min_delta
+        rows.append((key, old, new, change, regressed))
+    return rows
+
+
+def format_value(key, value):
+    if key.endswith(('_us', '_mb_s')) or isinstance(value, int):
+        return f'{value:.1f}' if isinstance(value, float) else str(value)
+    return f'{value * 1000:.1f} мс'
+
+
+def report(data, baseline=None, tolerance=TOLERANCE, min_delta=MIN_DELTA):
+    """Текстовий звіт; повертає кількість регресій"""
+    results = data['results']
+    meta = data['meta']
+    print(f"# {meta['date']}  Python {meta['python']}  Treeview: {meta['display']}  повторів: {meta['repeat']}")
+    if baseline is None:
+        for key in sorted(results):
+            print(f'{key:60} {format_value(key, results[key]):>14}')
+        return 0
+    rows = compare(results, baseline['results'], tolerance, min_delta)
+    regressions = 0
+    for key, old, new, change, regressed in rows:
+        flag = '  РЕГРЕСІЯ' if regressed else ''
+        regressions += regressed
+        print(f'{key:60} {format_value(key, old):>14} {format_value(key, new):>14} {change:+8.1%}{flag}')
+    missing = sorted(set(baseline['results']) - set(results))
+    if missing:
+        print(f'Немає в поточному прогоні: {len(missing)} (напр., {missing[0]})')
+    print(f'Регресій: {regressions} з {len(rows)} (поріг {tolerance:.0%})')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк провідників без вікна")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="кількості записів: 10k,100k,1m")
+    parser.add_argument('--shapes', default=DEFAULT_SHAPES, help="wide,deep,huge")
+    parser.add_argument('--apps', default=','.join(APPS))
+    parser.add_argument('--stages', default=','.join(STAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workdir', default=WORKDIR, help="де зберігаються згенеровані дерева")
+    parser.add_argument('--stub', action='store_true', help="заглушка Treeview навіть з дисплеєм")
+    parser.add_argument('--json', help="записати результати в JSON-файл")
+    parser.add_argument('--baseline', help="порівняти з результатами з цього файлу")
+    parser.add_argument('--save-baseline', help="зберегти результати як базові")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--min-delta', type=float, default=MIN_DELTA, help="ігнорувати різницю менше (с)")
+    args = parser.parse_args(argv)
+
+    # Прогони не пишуть свої дії в журнал трасування провідників
+    import perf_trace
+    perf_trace.tracer.enabled = False
+    data = run(args)
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    regressions = report(data, baseline, args.tolerance, args.min_delta)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,415 @@
+"""Фонове масове видалення з миттєвим «від'єднанням».
+
+Спершу ціль атомарно перейменовується у приховану директорію-відстійник
+на тій самій файловій системі, тож зі списку вона зникає одразу. Далі
+вміст видаляється у фоні пулом потоків через os.unlink/os.rmdir відносно
+dir_fd (без повторного розбору повних шляхів). Відстійники записані в
+реєстр, тож незавершене видалення продовжується при наступному запуску.
+
+Процес, що користується відстійником, тримає на ньому flock (файл у
+delete-locks), тож інший запущений провідник не дочищає його при старті.
+"""
+import contextlib
+import hashlib
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import app_dirs
+import perf_trace
+from transfers import CANCELLED, DONE, FAILED, RUNNING, TransferCancelled, TransferJob
+
+WORKERS = 4
+STAGING_NAME = '.starexplor-deleting'
+REGISTRY_NAME = 'delete-staging.txt'
+LOCK_DIR = 'delete-locks'
+
+DIR_FLAGS = os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0) | getattr(os, 'O_NOFOLLOW', 0)
+
+
+class DeleteJob(TransferJob):
+    """Завдання видалення; pairs — (початковий шлях, шлях у відстійнику)
+
+    files_done рахує видалені елементи (файли і директорії), removed —
+    початкові шляхи, що вже зникли зі своїх директорій.
+    """
+
+    def __init__(self, pairs, resumed=False):
+        super().__init__(pairs, 'delete')
+        self.resumed = resumed
+
+    def item_rate(self):
+        """Середня швидкість видалення (елементів/с)"""
+        if self.started is None:
+            return 0.0
+        elapsed = (self.finished or time.monotonic()) - self.started
+        return self.files_done / elapsed if elapsed > 0 else 0.0
+
+
+def _find_mount_root(path):
+    """Найвища директорія на тому ж пристрої, що й path"""
+    path = os.path.abspath(path)
+    dev = os.lstat(path).st_dev
+    while True:
+        parent = os.path.dirname(path)
+        if parent == path:
+            return path
+        try:
+            if os.lstat(parent).st_dev != dev:
+                return path
+        except OSError:
+            return path
+        path = parent
+
+
+class BulkDeleter:
+    """Від'єднання цілей у відстійники і черга фонового видалення"""
+
+    def __init__(self, workers=WORKERS):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='delete')
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.registry_lock = threading.Lock()
+        self.registry_path = os.path.join(app_dirs.data_dir(), REGISTRY_NAME)
+        # Відстійник -> дескриптор файлу блокування (тримається до виходу)
+        self.held = {}
+        self.thread = threading.Thread(target=self._dispatch, daemon=True)
+        self.thread.start()
+
+    # ---- Відстійники ----
+
+    def _candidates(self, path):
+        """Можливі відстійники на тому ж пристрої, від найзручнішого
+
+        Нічого не створює: detach робить директорію лише перед самим
+        перейменуванням.
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        dev = os.lstat(path).st_dev
+        candidates = []
+        data = app_dirs.data_dir()
+        own = os.path.join(data, 'deleting')
+        try:
+            if os.stat(own if os.path.isdir(own) else data).st_dev == dev:
+                candidates.append(own)
+        except OSError:
+            pass
+        try:
+            same_fs = os.lstat(parent).st_dev == dev
+        except OSError:
+            same_fs = False
+        if not same_fs:
+            # Ціль — сама точка монтування: чужа ФС відстійником не підходить
+            return candidates
+        try:
+            candidates.append(os.path.join(_find_mount_root(parent), f"{STAGING_NAME}-{os.getuid()}"))
+        except (OSError, AttributeError):
+            pass
+        candidates.append(os.path.join(parent, STAGING_NAME))
+        return candidates
+
+    @contextlib.contextmanager
+    def _registry_locked(self):
+        """Реєстр дописують і переписують й інші запущені провідники"""
+        with self.registry_lock:
+            fd = None
+            if fcntl is not None:
+                try:
+                    fd = os.open(self.registry_path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                except OSError:
+                    # Без файлу блокування — лише захист між потоками
+                    if fd is not None:
+                        os.close(fd)
+                        fd = None
+            try:
+                yield
+            finally:
+                if fd is not None:
+                    os.close(fd)
+
+    def _register(self, staging):
+        with self._registry_locked():
+            known = set(self._registered())
+            if staging in known:
+                return
+            with open(self.registry_path, 'a', encoding='utf-8') as f:
+                f.write(staging + '\n')
+
+    def _hold(self, staging, exclusive=False):
+        """Позначити відстійник як зайнятий цим процесом
+
+        Від'єднання бере спільне блокування; exclusive (дочищення минулих
+        запусків) — лише якщо відстійником не користується ніхто, потім
+        теж лишається спільним. False — відстійник зайнятий.
+        """
+        if fcntl is None:
+            return True
+        with self.lock:
+            if staging in self.held:
+                # Свої незавершені завдання дочищати не треба
+                return not exclusive
+            digest = hashlib.md5(staging.encode('utf-8', 'surrogateescape')).hexdigest()
+            try:
+                folder = os.path.join(app_dirs.data_dir(), LOCK_DIR)
+                os.makedirs(folder, exist_ok=True)
+                fd = os.open(os.path.join(folder, digest + '.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+            except OSError:
+                # Без файлу блокування — як раніше, без захисту
+                return True
+            try:
+                if exclusive:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.flock(fd, fcntl.LOCK_SH)
+            except OSError:
+                os.close(fd)
+                return False
+            self.held[staging] = fd
+            return True
+
+    def _registered(self):
+        try:
+            with open(self.registry_path, encoding='utf-8') as f:
+                return [line.rstrip('\n') for line in f if line.strip()]
+        except OSError:
+            return []
+
+    def detach(self, path):
+        """Перейменувати ціль у відстійник; повертає новий шлях або None"""
+        name = os.path.basename(path.rstrip(os.sep))
+        for staging in self._candidates(path):
+            created = not os.path.isdir(staging)
+            try:
+                os.makedirs(staging, mode=0o700, exist_ok=True)
+                target = os.path.join(staging, f"{uuid.uuid4().hex}-{name}")
+                self._register(staging)
+                self._hold(staging)
+                os.rename(path, target)
+                return target
+            except OSError:
+                if created:
+                    # Не лишати порожній відстійник там, де він не знадобився
+                    try:
+                        os.rmdir(staging)
+                    except OSError:
+                        pass
+                continue
+        return None
+
+    # ---- Черга ----
+
+    def delete(self, paths):
+        """Миттєво від'єднати шляхи і поставити видалення в чергу
+
+        Те, що не вдалося від'єднати (наприклад, точку монтування),
+        видаляється на місці тим самим фоновим завданням.
+        """
+        pairs = []
+        with perf_trace.span('detach', detach=len(paths)):
+            for path in paths:
+                staged = self.detach(path)
+                pairs.append((path, staged or path))
+        job = DeleteJob(pairs)
+        job.removed.extend(path for path, staged in pairs if staged != path)
+        self.queue.put(job)
+        return job
+
+    def resume_pending(self):
+        """Завдання для залишків у відстійниках з минулих запусків (або None)"""
+        pairs = []
+        kept = []
+        # Читання й перезапис реєстру — під одним блокуванням, щоб не
+        # загубити відстійник, який інший провідник дописує саме зараз
+        with self._registry_locked():
+            for staging in self._registered():
+                try:
+                    names = os.listdir(staging)
+                except OSError:
+                    continue
+                kept.append(staging)
+                if not self._hold(staging, exclusive=True):
+                    # Відстійником зараз користується інший запущений провідник
+                    continue
+                pairs.extend((os.path.join(staging, n), os.path.join(staging, n)) for n in names)
+            try:
+                with open(self.registry_path, 'w', encoding='utf-8') as f:
+                    f.writelines(s + '\n' for s in kept)
+            except OSError:
+                pass
+        if not pairs:
+            return None
+        job = DeleteJob(pairs, resumed=True)
+        self.queue.put(job)
+        return job
+
+    def _dispatch(self):
+        while True:
+            job = self.queue.get()
+            if job.cancelled.is_set():
+                job.state = CANCELLED
+                continue
+            self._run(job)
+
+    # ---- Видалення ----
+
+    def _run(self, job):
+        job.state = RUNNING
+        job.started = time.monotonic()
+        try:
+            futures = []
+            for original, target in job.pairs:
+                job.checkpoint()
+                futures.extend(self._start_target(job, original, target))
+            wait(futures)
+            job.checkpoint()
+            for original, target in job.pairs:
+                if os.path.isdir(target) and not os.path.islink(target):
+                    self._rmdir_path(job, original, target)
+            job.state = FAILED if job.errors else DONE
+        except TransferCancelled:
+            job.state = CANCELLED
+        except Exception as e:
+            job.add_error('', e)
+            job.state = FAILED
+        finally:
+            job.finished = time.monotonic()
+            self._cleanup_staging(job)
+
+    def _cleanup_staging(self, job):
+        """Прибрати порожні відстійники (решта лишається до наступного запуску)"""
+        for staging in {os.path.dirname(t) for o, t in job.pairs if t != o or job.resumed}:
+            try:
+                os.rmdir(staging)
+            except OSError:
+                pass
+
+    def _start_target(self, job, original, target):
+        """Видалити файли верхнього рівня, піддерева — паралельно в пулі"""
+        parent, name = os.path.split(target)
+        try:
+            parent_fd = os.open(parent, DIR_FLAGS)
+        except OSError as e:
+            job.add_error(original, e)
+            return []
+        try:
+            try:
+                fd = os.open(name, DIR_FLAGS, dir_fd=parent_fd)
+            except NotADirectoryError:
+                fd = None
+            except OSError as e:
+                if not os.path.islink(target):
+                    job.add_error(original, e)
+                    return []
+                fd = None
+            if fd is None:
+                # Файл або посилання
+                self._unlink(job, parent_fd, name, original)
+                if target == original:
+                    job.removed.append(original)
+                return []
+            futures = []
+            try:
+                with os.scandir(fd) as entries:
+                    for entry in entries:
+                        job.checkpoint()
+                        if entry.is_dir(follow_symlinks=False):
+                            futures.append(self.pool.submit(
+                                self._subtree, job, target, entry.name, original))
+                        else:
+                            self._unlink(job, fd, entry.name, original)
+            finally:
+                os.close(fd)
+            return futures
+        finally:
+            os.close(parent_fd)
+
+    def _subtree(self, job, parent_path, name, original):
+        """Видалити піддерево name у parent_path (виконується в пулі)"""
+        try:
+            parent_fd = os.open(parent_path, DIR_FLAGS)
+        except OSError as e:
+            job.add_error(original, e)
+            return
+        try:
+            self._remove_tree(job, parent_fd, name, original)
+        except TransferCancelled:
+            pass
+        finally:
+            os.close(parent_fd)
+
+    def _remove_tree(self, job, parent_fd, name, original):
+        """Ітеративно видалити директорію name відносно parent_fd"""
+        try:
+            fd = os.open(name, DIR_FLAGS, dir_fd=parent_fd)
+        except OSError as e:
+            job.add_error(original, e)
+            return
+        # Кадр стеку: (fd батька, назва, fd директорії, піддиректорії або None)
+        stack = [(parent_fd, name, fd, None)]
+        try:
+            while stack:
+                job.checkpoint()
+                p_fd, d_name, d_fd, subdirs = stack[-1]
+                if subdirs is None:
+                    subdirs = []
+                    try:
+                        with os.scandir(d_fd) as entries:
+                            for entry in entries:
+                                if entry.is_dir(follow_symlinks=False):
+                                    subdirs.append(entry.name)
+                                else:
+                                    self._unlink(job, d_fd, entry.name, original)
+                    except OSError as e:
+                        job.add_error(original, e)
+                    stack[-1] = (p_fd, d_name, d_fd, subdirs)
+                if subdirs:
+                    sub = subdirs.pop()
+                    try:
+                        stack.append((d_fd, sub, os.open(sub, DIR_FLAGS, dir_fd=d_fd), None))
+                    except OSError as e:
+                        job.add_error(original, e)
+                    continue
+                stack.pop()
+                os.close(d_fd)
+                try:
+                    os.rmdir(d_name, dir_fd=p_fd)
+                    job.add_progress(0, 1)
+                except OSError as e:
+                    job.add_error(original, e)
+        finally:
+            for _, _, d_fd, _ in stack:
+                os.close(d_fd)
+
+    def _unlink(self, job, dir_fd, name, original):
+        try:
+            os.unlink(name, dir_fd=dir_fd)
+            job.add_progress(0, 1)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            job.add_error(original, e)
+
+    def _rmdir_path(self, job, original, target):
+        parent, name = os.path.split(target)
+        try:
+            parent_fd = os.open(parent, DIR_FLAGS)
+        except OSError as e:
+            job.add_error(original, e)
+            return
+        try:
+            os.rmdir(name, dir_fd=parent_fd)
+            job.add_progress(0, 1)
+            if target == original:
+                job.removed.append(original)
+        except OSError as e:
+            job.add_error(original, e)
+        finally:
+            os.close(parent_fd)
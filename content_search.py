@@ -0,0 +1,219 @@
+"""Пошук тексту у вмісті файлів (grep) пулом процесів.
+
+Файли під директорією перелічує той самий потоковий scandir, що й
+список директорії (dir_scanner.walk_files), і пакетами передає в пул
+процесів — так пошук не впирається в GIL. Кожен файл відображається
+через mmap, тож великі файли не читаються в рядки Python; двійкові файли
+відкидаються за першим блоком (нульовий байт). Знайдене — шлях, номер
+рядка, зсув і текст рядка — забирається інтерфейсом через take().
+"""
+import mmap
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+
+from dir_scanner import walk_files
+
+# Перший блок, за яким визначається двійковий файл
+SNIFF_SIZE = 8192
+# Розмір пакета для одного завдання пулу
+BATCH_FILES = 64
+BATCH_BYTES = 32 * 1024 * 1024
+MAX_HITS_PER_FILE = 100
+LINE_PREVIEW = 200
+SKIP_DIRS = frozenset({'.git', '.hg', '.svn'})
+WORKERS = os.cpu_count() or 2
+
+_pool = None
+_pool_lock = threading.Lock()
+_compiled = {}
+
+
+def get_pool():
+    """Спільний пул процесів (spawn — безпечно для процесу з потоками і Tk)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _compile(pattern, regex, ignore_case):
+    """Скомпілювати шаблон у байтовий regex (кеш у межах процесу)"""
+    key = (pattern, regex, ignore_case)
+    compiled = _compiled.get(key)
+    if compiled is None:
+        source = pattern.encode('utf-8')
+        if not regex:
+            source = re.escape(source)
+        # Для байтів IGNORECASE діє лише на ASCII
+        compiled = re.compile(source, re.IGNORECASE if ignore_case else 0)
+        _compiled[key] = compiled
+    return compiled
+
+
+def _find(buf, compiled, path, max_hits):
+    hits = []
+    line = 1
+    last = 0
+    for match in compiled.finditer(buf):
+        offset = match.start()
+        line += buf[last:offset].count(b'\n')
+        last = offset
+        start = buf.rfind(b'\n', 0, offset) + 1
+        end = buf.find(b'\n', offset)
+        if end < 0:
+            end = len(buf)
+        text = buf[start:min(end, start + LINE_PREVIEW * 4)]
+        hits.append((path, line, offset, text.decode('utf-8', 'replace')[:LINE_PREVIEW].strip()))
+        if len(hits) >= max_hits:
+            break
+    return hits
+
+
+def grep_file(path, compiled, max_hits=MAX_HITS_PER_FILE):
+    """Знайти збіги в одному файлі; повертає (збіги, чи двійковий)"""
+    with open(path, 'rb') as f:
+        head = f.read(SNIFF_SIZE)
+        if b'\0' in head:
+            return [], True
+        if len(head) < SNIFF_SIZE:
+            # Файл уже прочитано повністю
+            return _find(head, compiled, path, max_hits), False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _find(mm, compiled, path, max_hits), False
+
+
+def grep_batch(paths, pattern, regex, ignore_case):
+    """Завдання пулу: пакет файлів; повертає (збіги, двійкових, помилок)"""
+    compiled = _compile(pattern, regex, ignore_case)
+    hits = []
+    binary = 0
+    errors = 0
+    for path in paths:
+        try:
+            found, is_binary = grep_file(path, compiled)
+        except (OSError, ValueError):
+            errors += 1
+            continue
+        binary += is_binary
+        hits.extend(found)
+    return hits, binary, errors
+
+
+class ContentSearch:
+    """Пошук у вмісті файлів під root з потоковою видачею
+
+    Потік-постачальник обходить дерево і відправляє пакети в пул; не
+    більше ніж 2×(кількість процесів) пакетів чекають одночасно, тож
+    обхід не випереджає пошук на весь диск.
+    """
+
+    def __init__(self, root, pattern, regex=False, ignore_case=True):
+        _compile(pattern, regex, ignore_case)  # помилка шаблону — одразу тут
+        self.root = root
+        self.spec = (pattern, regex, ignore_case)
+        self.lock = threading.Lock()
+        self.results = []
+        self.found = 0
+        self.files = 0
+        self.bytes = 0
+        self.binary = 0
+        self.errors = 0
+        self.pending = 0
+        self.futures = set()
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+        self.started = None
+        self.elapsed = None
+        self.pool = None
+        self.slots = None
+
+    def start(self):
+        self.started = time.monotonic()
+        self.pool = get_pool()
+        self.slots = threading.BoundedSemaphore(2 * WORKERS)
+        self.pending = 1
+        threading.Thread(target=self._feed, daemon=True).start()
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+        with self.lock:
+            futures = list(self.futures)
+        for future in futures:
+            future.cancel()
+
+    @property
+    def done(self):
+        return self.finished.is_set()
+
+    def take(self):
+        """Забрати збіги (шлях, рядок, зсув, текст), знайдені з минулого виклику"""
+        with self.lock:
+            results, self.results = self.results, []
+        return results
+
+    def throughput(self):
+        """Переглянуто байт за секунду"""
+        elapsed = self.elapsed if self.elapsed is not None else time.monotonic() - self.started
+        return self.bytes / elapsed if elapsed > 0 else 0.0
+
+    def _feed(self):
+        batch = []
+        batch_bytes = 0
+        try:
+            for path, size in walk_files(self.root, SKIP_DIRS, self.cancelled):
+                batch.append(path)
+                batch_bytes += size
+                if len(batch) >= BATCH_FILES or batch_bytes >= BATCH_BYTES:
+                    self._submit(batch, batch_bytes)
+                    batch = []
+                    batch_bytes = 0
+            if batch and not self.cancelled.is_set():
+                self._submit(batch, batch_bytes)
+        finally:
+            self._task_done()
+
+    def _submit(self, batch, batch_bytes):
+        # Чекати вільного місця, але реагувати на скасування
+        while not self.slots.acquire(timeout=0.1):
+            if self.cancelled.is_set():
+                return
+        with self.lock:
+            self.pending += 1
+        future = self.pool.submit(grep_batch, batch, *self.spec)
+        with self.lock:
+            self.futures.add(future)
+        future.add_done_callback(lambda f: self._collect(f, len(batch), batch_bytes))
+
+    def _collect(self, future, count, batch_bytes):
+        try:
+            hits, binary, errors = future.result()
+        except CancelledError:
+            hits, binary, errors = [], 0, 0
+        except Exception:
+            hits, binary, errors = [], 0, count
+        with self.lock:
+            self.futures.discard(future)
+            if not self.cancelled.is_set():
+                self.results.extend(hits)
+                self.found += len(hits)
+            self.files += count
+            self.bytes += batch_bytes
+            self.binary += binary
+            self.errors += errors
+        self.slots.release()
+        self._task_done()
+
+    def _task_done(self):
+        with self.lock:
+            self.pending -= 1
+            last = self.pending == 0
+        if last:
+            self.elapsed = time.monotonic() - self.started
+            self.finished.set()
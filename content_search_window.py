@@ -0,0 +1,117 @@
+"""Вікно «Шукати у файлах»: параметри, потокові результати, зупинка"""
+import re
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+from content_search import ContentSearch
+
+POLL_INTERVAL_MS = 100
+# Скільки рядків результатів показувати (решта лише рахується)
+SHOW_LIMIT = 20000
+
+
+class ContentSearchWindow(tk.Toplevel):
+    """Пошук тексту під root_path; open_path(path) відкриває вибраний файл"""
+
+    def __init__(self, master, root_path, open_path, format_size,
+                 bg='#F0F0F0', fg='black', button_bg='#E1E1E1', font=('Arial', 9)):
+        super().__init__(master, bg=bg)
+        self.root_path = root_path
+        self.open_path = open_path
+        self.format_size = format_size
+        self.search = None
+        self.shown = 0
+
+        self.title(f"Шукати у файлах — {root_path}")
+        self.geometry("800x450")
+
+        top = tk.Frame(self, bg=bg, padx=10, pady=8)
+        top.pack(fill="x")
+        self.pattern = tk.StringVar(self)
+        self.regex = tk.BooleanVar(self, value=False)
+        self.ignore_case = tk.BooleanVar(self, value=True)
+        entry = tk.Entry(top, textvariable=self.pattern, bg=button_bg, fg=fg,
+                         insertbackground=fg, relief="flat", font=font)
+        entry.pack(side="left", fill="x", expand=True)
+        entry.bind("<Return>", lambda e: self.start())
+        entry.focus_set()
+        check_opts = {"bg": bg, "fg": fg, "selectcolor": button_bg, "activebackground": bg, "font": font}
+        tk.Checkbutton(top, text="Regex", variable=self.regex, **check_opts).pack(side="left", padx=5)
+        tk.Checkbutton(top, text="Без регістру", variable=self.ignore_case, **check_opts).pack(side="left")
+        btn_opts = {"bg": button_bg, "fg": fg, "relief": "flat", "font": font, "padx": 10}
+        tk.Button(top, text="Шукати", command=self.start, **btn_opts).pack(side="left", padx=5)
+        self.stop_btn = tk.Button(top, text="Зупинити", command=self.stop, state="disabled", **btn_opts)
+        self.stop_btn.pack(side="left")
+
+        frame = tk.Frame(self, bg=bg)
+        frame.pack(fill="both", expand=True, padx=10)
+        self.tree = ttk.Treeview(frame, columns=('line', 'offset', 'text'), show='tree headings')
+        self.tree.heading('#0', text='Файл')
+        self.tree.heading('line', text='Рядок')
+        self.tree.heading('offset', text='Зсув')
+        self.tree.heading('text', text='Текст')
+        self.tree.column('#0', width=260)
+        self.tree.column('line', width=60, anchor="e")
+        self.tree.column('offset', width=80, anchor="e")
+        self.tree.column('text', width=380)
+        scrollbar = ttk.Scrollbar(frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.pack(fill="both", expand=True)
+        self.tree.bind('<Double-Button-1>', self.on_double_click)
+
+        self.status = tk.Label(self, text="", anchor="w", bg=bg, fg=fg, font=font)
+        self.status.pack(fill="x", padx=10, pady=5)
+        self.bind("<Escape>", lambda e: self.stop())
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+    def start(self):
+        pattern = self.pattern.get()
+        if not pattern:
+            return
+        self.stop()
+        try:
+            search = ContentSearch(self.root_path, pattern, self.regex.get(), self.ignore_case.get())
+        except re.error as e:
+            messagebox.showerror("Помилка", f"Невірний регулярний вираз:\n{e}", parent=self)
+            return
+        self.tree.delete(*self.tree.get_children())
+        self.shown = 0
+        self.search = search.start()
+        self.stop_btn.configure(state="normal")
+        self.poll(self.search)
+
+    def stop(self):
+        if self.search is not None:
+            self.search.cancel()
+
+    def close(self):
+        self.stop()
+        self.destroy()
+
+    def poll(self, search):
+        """Перенести нові збіги у список і оновити лічильники"""
+        if search is not self.search or not self.winfo_exists():
+            return
+        for path, line, offset, text in search.take():
+            if self.shown >= SHOW_LIMIT:
+                break
+            self.tree.insert('', 'end', text=path, values=(line, offset, text))
+            self.shown += 1
+        text = (f"Збігів: {search.found}, файлів: {search.files} "
+                f"({self.format_size(search.bytes)}, {self.format_size(search.throughput())}/с), "
+                f"двійкових пропущено: {search.binary}")
+        if search.found > self.shown:
+            text += f", показано {self.shown}"
+        if search.done:
+            self.stop_btn.configure(state="disabled")
+            state = "зупинено" if search.cancelled.is_set() else f"за {search.elapsed:.2f} с"
+            self.status.configure(text=f"{text} — {state}")
+        else:
+            self.status.configure(text=f"{text}...")
+            self.after(POLL_INTERVAL_MS, self.poll, search)
+
+    def on_double_click(self, event):
+        item = self.tree.identify_row(event.y)
+        if item:
+            self.open_path(self.tree.item(item, 'text'))
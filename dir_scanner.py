@@ -0,0 +1,559 @@
+"""Фонове сканування директорій для провідників.
+
+Сканування виконується у робочому потоці, а рядки повертаються
+в інтерфейс порціями через after() з обмеженням часу на один тік,
+щоб головний потік Tk не блокувався на великих директоріях.
+
+Для рядків достатньо даних самого scandir (назва і d_type), тож stat
+при скануванні не робиться: розмір і час зміни дочитує StatFiller
+порціями у фоні, починаючи з рядків, які видно на екрані.
+"""
+import collections
+import os
+import queue
+import re
+import stat
+import threading
+import time
+
+import archives
+import perf_trace
+from listing_cache import FRESH, STALE, dir_stamp
+
+# Розмір першої порції — щоб перший екран з'явився якомога швидше
+FIRST_BATCH_SIZE = 64
+BATCH_SIZE = 512
+# Максимальна затримка між відправками порцій з робочого потоку (с)
+BATCH_INTERVAL = 0.05
+# Скільки записів StatFiller обробляє між оновленнями списку
+STAT_BATCH = 256
+
+
+class ScanEntry:
+    """Запис директорії
+
+    size і mtime — None, поки stat ще не зроблено (див. StatFiller);
+    name_key — кешований природний ключ назви (див. natural_key).
+    """
+    __slots__ = ('name', 'path', 'is_dir', 'size', 'mtime', 'name_key')
+
+    def __init__(self, name, path, is_dir, size, mtime, name_key=None):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+        self.name_key = name_key
+
+
+_DIGITS = re.compile(r'\d+')
+
+
+def _pad_digits(match):
+    digits = match.group()
+    return '%02d%s' % (len(digits), digits)
+
+
+def natural_key(name):
+    """Природний порядок назв (file2 < file10) у вигляді рядка
+
+    Кожне число замінюється на «довжина + цифри», тож порівнюються прості
+    рядки — це в рази швидше за порівняння списків з чисел і рядків.
+    """
+    return _DIGITS.sub(_pad_digits, name.lower())
+
+
+def name_key(entry):
+    """Природний ключ назви ScanEntry (обчислюється один раз)"""
+    key = entry.name_key
+    if key is None:
+        key = entry.name_key = natural_key(entry.name)
+    return key
+
+
+def sort_key(name, is_dir):
+    """Ключ сортування: спочатку папки, потім файли, за назвою"""
+    return (not is_dir, natural_key(name), name)
+
+
+def entry_sort_key(entry):
+    """Ключ сортування для ScanEntry"""
+    return (not entry.is_dir, name_key(entry), entry.name)
+
+
+def size_sort_key(entry):
+    """Папки окремо, далі за розміром у байтах (ще невідомий — першим)"""
+    size = entry.size
+    return (not entry.is_dir, -1 if size is None else size, name_key(entry))
+
+
+def mtime_sort_key(entry):
+    """Папки окремо, далі за часом зміни (ще невідомий — першим)"""
+    mtime = entry.mtime
+    return (not entry.is_dir, -1.0 if mtime is None else mtime, name_key(entry))
+
+
+def type_sort_key(entry):
+    """Папки окремо, далі за розширенням"""
+    return (not entry.is_dir, os.path.splitext(entry.name)[1].lower(), name_key(entry))
+
+
+# Ключі сортування колонок списку
+COLUMN_SORT_KEYS = {
+    'name': entry_sort_key,
+    'size': size_sort_key,
+    'modified': mtime_sort_key,
+    'type': type_sort_key,
+}
+
+
+def fill_stat(entry):
+    """Дочитати розмір і час зміни ScanEntry (биті посилання — через lstat)"""
+    try:
+        st = os.stat(entry.path)
+    except OSError:
+        try:
+            st = os.lstat(entry.path)
+        except OSError:
+            entry.mtime = 0.0
+            entry.size = 0
+            return
+    entry.mtime = st.st_mtime
+    entry.size = st.st_size
+
+
+def entry_for_path(path):
+    """ScanEntry для одного шляху або None, якщо його вже немає"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return None
+    return ScanEntry(os.path.basename(path), path, stat.S_ISDIR(st.st_mode),
+                     st.st_size, st.st_mtime)
+
+
+def walk_files(root, skip_dirs=(), cancelled=None):
+    """Обійти піддерево scandir без рекурсії; видає (шлях, розмір) звичайних файлів
+
+    Посилання не розкриваються, директорії з назвами зі skip_dirs
+    пропускаються. Недоступні директорії мовчки оминаються.
+    """
+    for path, st in walk_file_stats(root, skip_dirs, cancelled):
+        yield path, st.st_size
+
+
+def walk_file_stats(root, skip_dirs=(), cancelled=None):
+    """Те саме, що walk_files, але видає (шлях, stat) — з st_dev/st_ino"""
+    stack = [root]
+    while stack:
+        if cancelled is not None and cancelled.is_set():
+            return
+        path = stack.pop()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in skip_dirs:
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry.path, entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+def list_directory(path, cancelled=None, limit=None):
+    """Вміст директорії за назвою, лише з даних scandir (без stat)
+
+    Повертає None, якщо читання скасовано або записів більше за limit.
+    """
+    started = time.perf_counter()
+    try:
+        scanner = os.scandir(path)
+    except NotADirectoryError:
+        # Архів або папка в ньому: вміст з індексу членів, уже з метаданими
+        return list_archive(path, limit)
+    raw = []
+    with scanner as entries:
+        for entry in entries:
+            if cancelled is not None and cancelled.is_set():
+                return None
+            if limit is not None and len(raw) >= limit:
+                return None
+            raw.append(keyed_entry(entry))
+    raw.sort(key=lambda x: x[0])
+    perf_trace.add('scandir', time.perf_counter() - started, scandir=len(raw))
+    return [item for _, item in raw]
+
+
+def keyed_entry(entry):
+    """(ключ сортування, ScanEntry) для запису os.scandir"""
+    try:
+        is_dir = entry.is_dir()
+    except OSError:
+        is_dir = False
+    key = sort_key(entry.name, is_dir)
+    return key, ScanEntry(entry.name, entry.path, is_dir, None, None, key[1])
+
+
+def list_archive(path, limit=None):
+    """Вміст папки архіву за назвою (як list_directory)"""
+    items = archives.list_dir(path)
+    if limit is not None and len(items) > limit:
+        return None
+    raw = []
+    for name, item_path, is_dir, size, mtime in items:
+        key = sort_key(name, is_dir)
+        raw.append((key, ScanEntry(name, item_path, is_dir, size, mtime, key[1])))
+    raw.sort(key=lambda x: x[0])
+    return [item for _, item in raw]
+
+
+class StatFiller:
+    """Дочитує розмір і час зміни ScanEntry у фоновому потоці
+
+    add(entries) ставить записи в загальну чергу, prioritize(entries) —
+    поперед неї (видимі рядки). Після кожної порції on_filled()
+    викликається в головному потоці через after(), а коли черга
+    вичерпана — on_complete(). clear() відкидає все незроблене.
+    """
+
+    def __init__(self, widget, on_filled, on_complete=None,
+                 batch=STAT_BATCH, interval_ms=50):
+        self.widget = widget
+        self.on_filled = on_filled
+        self.on_complete = on_complete
+        self.batch = batch
+        self.interval_ms = interval_ms
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.urgent = collections.deque()
+        self.backlog = collections.deque()
+        self.filled = 0
+        self.active = False
+        self.after_id = None
+        self.thread = None
+
+    def add(self, entries):
+        with self.lock:
+            self.backlog.extend(e for e in entries if e.size is None)
+            self._wake()
+
+    def prioritize(self, entries):
+        missing = [e for e in entries if e.size is None]
+        if missing:
+            with self.lock:
+                self.urgent.extend(missing)
+                self._wake()
+
+    def clear(self):
+        with self.lock:
+            self.urgent.clear()
+            self.backlog.clear()
+            self.filled = 0
+            self.active = False
+
+    def _wake(self):
+        # Викликається під lock
+        if not self.urgent and not self.backlog:
+            return
+        self.active = True
+        self.wakeup.set()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        if self.after_id is None:
+            self.after_id = self.widget.after(self.interval_ms, self._poll)
+
+    def _take(self):
+        taken = []
+        with self.lock:
+            while len(taken) < self.batch and (self.urgent or self.backlog):
+                entry = (self.urgent or self.backlog).popleft()
+                if entry.size is None:
+                    taken.append(entry)
+            if not taken:
+                self.wakeup.clear()
+        return taken
+
+    def _run(self):
+        while True:
+            self.wakeup.wait()
+            entries = self._take()
+            started = time.perf_counter()
+            for entry in entries:
+                fill_stat(entry)
+            if entries:
+                perf_trace.add('stat', time.perf_counter() - started, stat=len(entries))
+                with self.lock:
+                    self.filled += len(entries)
+
+    def _poll(self):
+        self.after_id = None
+        with self.lock:
+            filled, self.filled = self.filled, 0
+            finished = self.active and not self.urgent and not self.backlog and not self.wakeup.is_set()
+            if finished:
+                self.active = False
+            elif self.active:
+                self.after_id = self.widget.after(self.interval_ms, self._poll)
+        if filled:
+            self.on_filled()
+        if finished and self.on_complete is not None:
+            self.on_complete()
+
+
+class DirectoryScan(threading.Thread):
+    """Робочий потік: scandir і сортування з видачею порцій у чергу
+
+    Якщо stream і читання триває довше за BATCH_INTERVAL (велика чи
+    мережева директорія), прочитане йде порціями одразу, у порядку
+    scandir, а наприкінці — ('sorted', повний список за назвою).
+    """
+
+    def __init__(self, path, out_queue, generation, stream=False):
+        super().__init__(daemon=True)
+        self.path = path
+        self.queue = out_queue
+        self.generation = generation
+        self.stream = stream
+        # Порції вже йдуть у порядку читання (виставляє робочий потік)
+        self.streamed = False
+        self.cancelled = threading.Event()
+        # Повний список і відбиток директорії — для кешу
+        self.entries = []
+        self.stamp = None
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        gen = self.generation
+        # Відбиток береться до сканування, щоб зміни під час нього не загубились
+        self.stamp = dir_stamp(self.path)
+        try:
+            # d_type з scandir достатньо для сортування і показу, stat — пізніше
+            items, streamed = self._read(gen)
+        except OSError as e:
+            self.queue.put(('error', gen, e))
+            return
+        if items is None:
+            return
+        if streamed:
+            self.entries = items
+            self.queue.put(('sorted', gen, items))
+            self.queue.put(('done', gen, len(items)))
+            return
+        self.queue.put(('total', gen, len(items)))
+
+        batch = []
+        limit = FIRST_BATCH_SIZE
+        last_flush = time.monotonic()
+        for item in items:
+            if self.cancelled.is_set():
+                return
+            batch.append(item)
+            self.entries.append(item)
+            now = time.monotonic()
+            if len(batch) >= limit or now - last_flush >= BATCH_INTERVAL:
+                self.queue.put(('batch', gen, batch))
+                batch = []
+                limit = BATCH_SIZE
+                last_flush = now
+        if batch:
+            self.queue.put(('batch', gen, batch))
+        self.queue.put(('done', gen, len(items)))
+
+    def _read(self, gen):
+        """(список за назвою або None, чи вже віддано порції в порядку читання)"""
+        if not self.stream:
+            return list_directory(self.path, self.cancelled), False
+        started = time.perf_counter()
+        try:
+            scanner = os.scandir(self.path)
+        except NotADirectoryError:
+            return list_archive(self.path), False
+        raw = []
+        sent = 0
+        flush_at = started + BATCH_INTERVAL
+        with scanner as entries:
+            for entry in entries:
+                if self.cancelled.is_set():
+                    return None, False
+                raw.append(keyed_entry(entry))
+                now = time.perf_counter()
+                if now >= flush_at:
+                    self.streamed = True
+                    self.queue.put(('batch', gen, [item for _, item in raw[sent:]]))
+                    sent = len(raw)
+                    flush_at = now + BATCH_INTERVAL
+        # Решта не надсилається: її покаже відсортований список
+        raw.sort(key=lambda x: x[0])
+        perf_trace.add('scandir', time.perf_counter() - started, scandir=len(raw))
+        return [item for _, item in raw], self.streamed
+
+
+class DirectoryLoader:
+    """Керує фоновим скануванням і порційною вставкою рядків через after()
+
+    on_rows(entries) викликається з головного потоку невеликими шматками,
+    поки не вичерпано бюджет часу тіку; on_done(count) і on_error(exc)
+    викликаються один раз наприкінці сканування.
+
+    Якщо задано cache, результати сканувань зберігаються в ньому, а при
+    load(use_cache=True) актуальний запис показується одразу. Застарілий
+    запис теж показується одразу, після чого директорія перевіряється у
+    фоні і новий список передається в on_replace(entries). Так само
+    показується і перевіряється готовий список load(path, entries=...)
+    (знімок минулої сесії).
+
+    Якщо задано on_reorder, довге сканування показує рядки ще під час
+    читання, у порядку scandir; перед on_done вони замінюються повним
+    списком за назвою через on_reorder(entries).
+    """
+
+    def __init__(self, widget, on_rows, on_done, on_error, on_replace=None,
+                 cache=None, budget_ms=30, interval_ms=10, chunk=200, on_reorder=None):
+        self.widget = widget
+        self.on_rows = on_rows
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_replace = on_replace
+        self.on_reorder = on_reorder
+        self.cache = cache
+        self.budget = budget_ms / 1000
+        self.interval_ms = interval_ms
+        self.chunk = chunk
+        self.queue = queue.Queue()
+        self.generation = 0
+        self.scan = None
+        self.pending = []
+        self.pending_pos = 0
+        self.finished = None
+        self.after_id = None
+        # Тихе сканування: перевірка кешованого списку без потокового показу
+        self.quiet = False
+        # Повний список за назвою після потокового показу (для on_reorder)
+        self.ordered = None
+
+    @property
+    def busy(self):
+        return self.scan is not None
+
+    @property
+    def streaming(self):
+        """Рядки поточного сканування приходять ще під час читання"""
+        return self.scan is not None and self.scan.streamed
+
+    def load(self, path, use_cache=False, entries=None):
+        """Почати сканування, скасувавши попереднє"""
+        self.cancel()
+        self.generation += 1
+        state = None
+        if entries is not None:
+            # Відбиток знімка не перевіряється: stat директорії теж може бути повільним
+            state, entries = STALE, list(entries)
+        elif use_cache and self.cache is not None:
+            state, entries = self.cache.lookup(path)
+        if state is not None:
+            self.on_rows(entries)
+            self.on_done(len(entries))
+            if state == FRESH:
+                return
+            self._start(path, quiet=self.on_replace is not None)
+            return
+        self._start(path, quiet=False)
+
+    def _start(self, path, quiet):
+        self.quiet = quiet
+        stream = not quiet and self.on_reorder is not None
+        self.scan = DirectoryScan(path, self.queue, self.generation, stream)
+        self.scan.start()
+        self._schedule()
+
+    def cancel(self):
+        """Скасувати поточне сканування і відкинути невставлені рядки"""
+        if self.scan is not None:
+            self.scan.cancel()
+            self.scan = None
+        self.pending = []
+        self.pending_pos = 0
+        self.finished = None
+        self.ordered = None
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self.after_id = None
+
+    def _schedule(self):
+        if self.after_id is None:
+            self.after_id = self.widget.after(self.interval_ms, self._tick)
+
+    def _tick(self):
+        self.after_id = None
+        deadline = time.perf_counter() + self.budget
+
+        # Забрати повідомлення поточного покоління, старі відкинути
+        while True:
+            try:
+                kind, gen, payload = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if gen != self.generation or self.scan is None:
+                continue
+            if kind == 'batch':
+                if self.quiet:
+                    continue
+                if self.pending_pos:
+                    self.pending = self.pending[self.pending_pos:]
+                    self.pending_pos = 0
+                self.pending.extend(payload)
+            elif kind == 'sorted':
+                if self.quiet:
+                    continue
+                # Невставлені рядки покаже повний список
+                self.pending = []
+                self.pending_pos = 0
+                self.ordered = payload
+            elif kind == 'done':
+                self.finished = ('done', payload)
+            elif kind == 'error':
+                self.finished = ('error', payload)
+
+        # Вставляти шматками, поки не вичерпано бюджет тіку
+        while self.pending_pos < len(self.pending):
+            end = self.pending_pos + self.chunk
+            self.on_rows(self.pending[self.pending_pos:end])
+            self.pending_pos = min(end, len(self.pending))
+            if time.perf_counter() >= deadline:
+                break
+
+        if self.pending_pos >= len(self.pending):
+            self.pending = []
+            self.pending_pos = 0
+            if self.finished is not None:
+                kind, payload = self.finished
+                scan = self.scan
+                self.finished = None
+                self.scan = None
+                if kind == 'done':
+                    if self.cache is not None:
+                        self.cache.put(scan.path, scan.stamp, scan.entries)
+                    if self.quiet:
+                        self.on_replace(scan.entries)
+                    elif self.ordered is not None:
+                        ordered, self.ordered = self.ordered, None
+                        self.on_reorder(ordered)
+                    self.on_done(payload)
+                else:
+                    if self.cache is not None:
+                        self.cache.discard(scan.path)
+                    self.on_error(payload)
+                return
+
+        if self.scan is not None:
+            self._schedule()
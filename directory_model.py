@@ -0,0 +1,731 @@
+"""Провідник без вікна: список директорії, навігація і файлові операції.
+
+FileExplorer і TinyStarExplor — лише подання над DirectoryModel: вони
+малюють рядки і показують повідомлення, а завантаження (сканування,
+порційна вставка, stat у фоні, кеш і передвибірка), історія,
+сортування, фільтр, живе оновлення через inotify і файлові операції
+живуть тут, в одному місці для обох.
+
+Модель не імпортує Tk: усе, що має відбуватися в головному потоці,
+планується через scheduler.after()/after_cancel() — це може бути вікно
+Tk або простий цикл подій (див. benchmark.py). Рядки зберігаються в
+RowList; VirtualTreeview — це RowList, що ще й показує їх у Treeview.
+
+snapshot()/restore() переносять сесію між запусками (див. session.py):
+список останньої директорії показується одразу і перевіряється у фоні.
+"""
+import os
+from pathlib import Path
+
+import archives
+import inotify_watch
+import perf_trace
+from bulk_delete import BulkDeleter
+from dir_scanner import (COLUMN_SORT_KEYS, DirectoryLoader, ScanEntry, StatFiller, entry_for_path,
+                         entry_sort_key)
+from listing_cache import ListingCache, dir_stamp
+from prefetch import Prefetcher
+from transfer_plan import plan_async
+from transfers import TransferJob, TransferManager
+from tree_search import name_filter, narrows
+
+# Період застосування зведених подій inotify (мс)
+WATCH_INTERVAL_MS = 200
+# Період опитування завдань у track() (мс)
+TRACK_INTERVAL_MS = 250
+# Знімок сесії: формат, найбільший список із рядками і глибина історії
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MAX_ROWS = 200000
+SNAPSHOT_HISTORY = 100
+# Колонки, ключі яких з'являються лише після stat (див. StatFiller)
+STAT_SORT_COLUMNS = ('size', 'modified')
+
+
+def format_size(size):
+    """Розмір у байтах для показу: «1.5 МБ»"""
+    for unit in ['Б', 'КБ', 'МБ', 'ГБ']:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ТБ"
+
+
+def _nothing(*args):
+    pass
+
+
+class RowList:
+    """Рядки списку без подання: індекс за ключем, сортування з кешем і фільтр
+
+    Фільтр (set_filter) лишає у rows лише підхожі рядки, а повний список
+    тримає в all_rows; точкові оновлення і сортування підтримують обидва.
+    Методи змінюють лише дані: подання (VirtualTreeview) перевизначає їх,
+    щоб ще й стежити за прокруткою і виділенням, і refresh().
+    """
+
+    def __init__(self, key=None):
+        self.key = key or (lambda row: row.path)
+        self.rows = []
+        # Індекс ключ -> рядок і порядок рядків для точкових оновлень
+        self.index = {}
+        self.sort_key = None
+        self.sort_reverse = False
+        # Кеш відсортованих порядків: назва колонки -> (версія моделі, рядки за зростанням)
+        self.version = 0
+        self.sort_cache = {}
+        # Фільтр: row_filter(row) -> bool; all_rows — повний список, поки фільтр діє
+        self.row_filter = None
+        self.all_rows = None
+
+    def refresh(self):
+        """Перемалювати подання (без подання — нічого)"""
+
+    def set_rows(self, rows, keep_view=False):
+        """Замінити всі рядки
+
+        keep_view=True — новий список тієї ж директорії: подання зберігає
+        прокрутку і виділення наявних рядків.
+        """
+        self.version += 1
+        self.index = {self.key(row): row for row in rows}
+        self.rows = self._apply_filter(rows)
+
+    def clear(self):
+        self.set_rows([])
+
+    def rows_changed(self):
+        """Рядки змінились на місці: скинути кеш сортувань і перемалювати"""
+        self.version += 1
+        self.refresh()
+
+    def forget_sorts(self, names):
+        """Скинути кешовані порядки колонок, чиї ключі змінились на місці"""
+        for name in names:
+            self.sort_cache.pop(name, None)
+
+    def append_rows(self, rows):
+        """Додати рядки в кінець"""
+        self.version += 1
+        for row in rows:
+            self.index[self.key(row)] = row
+        if self.row_filter is not None:
+            self.all_rows.extend(rows)
+            rows = [row for row in rows if self.row_filter(row)]
+        self.rows.extend(rows)
+
+    def apply_changes(self, upserts=(), removals=()):
+        """Точково додати/замінити рядки і прибрати ключі
+
+        Позиція нового рядка шукається двійковим пошуком за sort_key.
+        """
+        self.version += 1
+        for key in removals:
+            row = self.index.pop(key, None)
+            if row is not None:
+                self._drop(row)
+        for row in upserts:
+            key = self.key(row)
+            old = self.index.get(key)
+            if old is not None:
+                self._drop(old)
+            self.index[key] = row
+            if self.row_filter is not None:
+                self.all_rows.insert(self.insert_position(row, self.all_rows), row)
+                if not self.row_filter(row):
+                    continue
+            self._insert_at(self.insert_position(row), row)
+
+    @property
+    def full_rows(self):
+        """Усі рядки, без урахування фільтра"""
+        return self.rows if self.all_rows is None else self.all_rows
+
+    def _drop(self, row):
+        """Прибрати рядок (і з повного списку, якщо діє фільтр)"""
+        if self.row_filter is not None:
+            del self.all_rows[self.find_index(row, self.all_rows)]
+            if not self.row_filter(row):
+                return
+        self._remove_at(self.find_index(row))
+
+    def _apply_filter(self, rows):
+        """Запам'ятати повний список і повернути видиму частину"""
+        if self.row_filter is None:
+            return rows
+        self.all_rows = rows
+        return [row for row in rows if self.row_filter(row)]
+
+    def set_filter(self, match, narrow=False):
+        """Лишити лише рядки, для яких match(row) істинне (None — усі)
+
+        narrow=True означає, що новий фільтр лише звужує попередній
+        (запит доповнено): перевіряються вже відібрані рядки, а не весь
+        список.
+        """
+        if match is None:
+            if self.row_filter is None:
+                return
+            self.rows = self.all_rows
+            self.all_rows = None
+        else:
+            if self.row_filter is None:
+                self.all_rows = self.rows
+                narrow = False
+            base = self.rows if narrow else self.all_rows
+            self.rows = [row for row in base if match(row)]
+        self.row_filter = match
+
+    def sort_by(self, name, key, reverse=False):
+        """Відсортувати за ключем колонки
+
+        Порядок за зростанням кешується для кожної колонки, доки рядки не
+        змінились: повторний клік чи зміна напрямку лише розвертає список.
+        """
+        cached = self.sort_cache.get(name)
+        if cached is not None and cached[0] == self.version:
+            ordered = cached[1]
+        else:
+            with perf_trace.span('sort'):
+                ordered = sorted(self.rows if self.row_filter is None else self.all_rows, key=key)
+            self.sort_cache = {k: v for k, v in self.sort_cache.items() if v[0] == self.version}
+            self.sort_cache[name] = (self.version, ordered)
+        rows = ordered[::-1] if reverse else list(ordered)
+        self.rows = self._apply_filter(rows)
+        self.sort_key = key
+        self.sort_reverse = reverse
+
+    def insert_position(self, row, rows=None):
+        """Позиція для рядка у відсортованому списку (двійковий пошук)"""
+        rows = self.rows if rows is None else rows
+        if self.sort_key is None:
+            return len(rows)
+        key = self.sort_key(row)
+        lo, hi = 0, len(rows)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            other = self.sort_key(rows[mid])
+            if (other > key) if self.sort_reverse else (other < key):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find_index(self, row, rows=None):
+        """Індекс рядка (двійковий пошук, далі — серед рівних ключів)"""
+        rows = self.rows if rows is None else rows
+        if self.sort_key is not None:
+            key = self.sort_key(row)
+            idx = self.insert_position(row, rows)
+            while idx < len(rows) and self.sort_key(rows[idx]) == key:
+                if rows[idx] is row:
+                    return idx
+                idx += 1
+        return rows.index(row)
+
+    def _insert_at(self, idx, row):
+        self.rows.insert(idx, row)
+
+    def _remove_at(self, idx):
+        del self.rows[idx]
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class DirectoryModel:
+    """Поточна директорія, її рядки та операції над ними
+
+    scheduler — об'єкт з after()/after_cancel() (вікно Tk), rows — RowList
+    або VirtualTreeview. Колбеки подання (усі необов'язкові, у головному
+    потоці):
+      on_load(path)      — почалося завантаження директорії (рядки очищено);
+      on_rows(entries)   — додано порцію рядків;
+      on_done(count)     — список прочитано повністю;
+      on_error(error)    — директорію не вдалося прочитати;
+      on_changed()       — рядки оновлено точково (події inotify, операції);
+      on_sorted(column, reverse) — застосовано сортування;
+      on_gone()          — показану директорію видалено або переміщено.
+    """
+
+    def __init__(self, scheduler, rows=None, path=None, watch=True,
+                 on_load=None, on_rows=None, on_done=None, on_error=None,
+                 on_changed=None, on_sorted=None, on_gone=None):
+        self.scheduler = scheduler
+        self.rows = rows if rows is not None else RowList()
+        self.on_load = on_load or _nothing
+        self.on_rows = on_rows or _nothing
+        self.on_done = on_done or _nothing
+        self.on_error = on_error or _nothing
+        self.on_changed = on_changed or _nothing
+        self.on_sorted = on_sorted or _nothing
+        self.on_gone = on_gone or _nothing
+
+        # Поточний шлях та історія переходів
+        self.current_path = path or str(Path.home())
+        self.history = [self.current_path]
+        self.history_index = 0
+
+        self.selected_items = []
+        self.clipboard_items = []
+        self.clipboard_operation = None
+        self.folder_count = 0
+        self.file_count = 0
+        # Показано результати пошуку, а не вміст директорії
+        self.search_mode = False
+        self.filter_query = ''
+        # Сортування за колонкою: (колонка, за спаданням), діє і після переходів
+        self.sort_state = ('#0', False)
+
+        # Фонове завантаження з кешем списків і передвибіркою ймовірних наступних
+        self.listing_cache = ListingCache()
+        self.loader = DirectoryLoader(
+            scheduler, self._add_rows, self._scan_done, self._scan_error,
+            on_replace=self._replace_rows, cache=self.listing_cache, on_reorder=self._reorder_rows
+        )
+        self.prefetcher = Prefetcher(scheduler, self.listing_cache)
+        # Розмір і час зміни дочитуються у фоні, видимі рядки — першими
+        self.stat_filler = StatFiller(scheduler, self._stats_filled, self._stats_done)
+
+        # Живе оновлення поточної директорії через inotify
+        self.watcher = None
+        self.listing_dirty = False
+        if watch and inotify_watch.available():
+            try:
+                self.watcher = inotify_watch.DirectoryWatcher()
+            except OSError:
+                self.watcher = None
+        if self.watcher is not None:
+            scheduler.after(WATCH_INTERVAL_MS, self._poll_fs_changes)
+
+        # Фонові копіювання/переміщення і видалення з від'єднанням у відстійник
+        self.transfers = TransferManager()
+        self.deleter = BulkDeleter()
+
+    # ---- Завантаження ----
+
+    def load(self, use_cache=False, entries=None):
+        """Завантажити поточну директорію (сканування у фоновому потоці)
+
+        entries — готові рядки (зі знімка): показуються одразу, а
+        директорія перевіряється у фоні.
+        """
+        # Навігація: передвибірка більше не потрібна, а перехід — це влучання чи промах
+        self.prefetcher.cancel()
+        self.prefetcher.visited(self.current_path)
+        # Переключити inotify, поки список попередньої директорії ще в моделі
+        self._watch_directory()
+        self.clear_filter()
+        self.stat_filler.clear()
+        self.rows.clear()
+        self.rows.sort_key, self.rows.sort_reverse = entry_sort_key, False
+        self.selected_items = []
+        self.search_mode = False
+        self.folder_count = 0
+        self.file_count = 0
+        self.on_load(self.current_path)
+        # Попереднє сканування скасовується всередині load()
+        perf_trace.start('load', path=self.current_path, cached=use_cache)
+        self.loader.load(self.current_path, use_cache=use_cache, entries=entries)
+
+    def _add_rows(self, entries):
+        perf_trace.mark('load', 'first_rows')
+        for entry in entries:
+            if entry.is_dir:
+                self.folder_count += 1
+            else:
+                self.file_count += 1
+        self.rows.append_rows(entries)
+        # Під час читання stat роблять лише видимі рядки (prioritize),
+        # щоб не змагатися зі scandir; решту додасть _reorder_rows
+        if not self.loader.streaming:
+            self.stat_filler.add(entries)
+        self.on_rows(entries)
+        # Перші рядки після запуску закривають дію 'startup', якщо її відкрито
+        perf_trace.finish('startup', rows=len(self.rows))
+
+    def _replace_rows(self, entries):
+        """Показаний з кешу список замінюється результатом фонової перевірки"""
+        self.folder_count = sum(1 for entry in entries if entry.is_dir)
+        self.file_count = len(entries) - self.folder_count
+        self.rows.set_rows(list(entries), keep_view=True)
+        self.stat_filler.add(entries)
+        if self.sort_state != ('#0', False):
+            self.apply_sort()
+        self.on_changed()
+
+    def _reorder_rows(self, entries):
+        """Рядки, показані в порядку читання, замінюються повним списком за назвою"""
+        self.folder_count = sum(1 for entry in entries if entry.is_dir)
+        self.file_count = len(entries) - self.folder_count
+        self.rows.set_rows(list(entries), keep_view=True)
+        self.stat_filler.add(entries)
+
+    def _scan_done(self, count):
+        # Сканер віддає рядки за назвою; інший вибраний порядок
+        # застосовується одним сортуванням наприкінці
+        if self.sort_state != ('#0', False):
+            self.apply_sort()
+        self.on_done(count)
+        perf_trace.finish('startup', rows=count)
+        self.prefetcher.schedule(self.prefetch_candidates)
+        # Дія завантаження закінчується, коли дочитано й метадані
+        perf_trace.mark('load', 'listed')
+        if not self.stat_filler.active:
+            perf_trace.finish('load', entries=count)
+
+    def _scan_error(self, error):
+        perf_trace.finish('load', error=str(error))
+        perf_trace.finish('startup', error=str(error))
+        self.on_error(error)
+
+    def _stats_filled(self):
+        # Порядки за розміром і датою, відсортовані до цієї порції, застаріли;
+        # rows можна замінити поданням уже після створення моделі
+        self.rows.forget_sorts(STAT_SORT_COLUMNS)
+        self.rows.refresh()
+
+    def _stats_done(self):
+        """Метадані всіх рядків дочитано: порядок за розміром чи датою тепер точний"""
+        if self.sort_state[0] in STAT_SORT_COLUMNS:
+            self.rows.rows_changed()
+            self.apply_sort()
+        if perf_trace.marked('load', 'listed'):
+            perf_trace.finish('load')
+
+    @property
+    def busy(self):
+        return self.loader.busy
+
+    # ---- Знімок сесії ----
+
+    def snapshot(self, max_rows=SNAPSHOT_MAX_ROWS):
+        """Стан для наступного запуску: шлях, історія, сортування і рядки
+
+        Рядки (назва, папка, розмір, mtime) зберігаються, лише якщо список
+        прочитано повністю, це не результати пошуку і їх не більше max_rows.
+        """
+        rows = None
+        full = self.rows.full_rows
+        if not self.search_mode and not self.busy and len(full) <= max_rows:
+            rows = [[row.name, int(row.is_dir), row.size, row.mtime] for row in full]
+        start = max(0, len(self.history) - SNAPSHOT_HISTORY)
+        return {
+            'version': SNAPSHOT_VERSION,
+            'path': self.current_path,
+            'history': self.history[start:],
+            'history_index': max(0, self.history_index - start),
+            'sort': list(self.sort_state),
+            'rows': rows,
+        }
+
+    def restore(self, snapshot):
+        """Почати зі знімка минулої сесії (або з поточної директорії без нього)
+
+        Рядки знімка показуються одразу, а директорія сканується у фоні і
+        список замінюється актуальним (on_done — двічі, як і для кешу).
+        True, якщо рядки знімка показано.
+        """
+        state = None
+        if snapshot is not None:
+            try:
+                state = self._parse_snapshot(snapshot)
+            except (KeyError, TypeError, ValueError):
+                state = None
+        # Директорії з минулого разу вже могло не стати
+        if state is None or not archives.is_dir(state[0]):
+            self.load()
+            return False
+        self.current_path, self.history, self.history_index, self.sort_state, entries = state
+        if entries is not None:
+            perf_trace.mark('startup', 'snapshot')
+        self.load(entries=entries)
+        return entries is not None
+
+    @staticmethod
+    def _parse_snapshot(snapshot):
+        if snapshot['version'] != SNAPSHOT_VERSION:
+            return None
+        path = snapshot['path']
+        history = list(snapshot['history'])
+        index = snapshot['history_index']
+        column, reverse = snapshot['sort']
+        if not (0 <= index < len(history) and history[index] == path):
+            raise ValueError("історія не збігається зі шляхом")
+        if column != '#0' and column not in COLUMN_SORT_KEYS:
+            raise ValueError(column)
+        entries = None
+        if snapshot['rows'] is not None:
+            entries = [ScanEntry(name, os.path.join(path, name), bool(is_dir), size, mtime)
+                       for name, is_dir, size, mtime in snapshot['rows']]
+        return path, history, index, (column, bool(reverse)), entries
+
+    def prefetch_candidates(self):
+        """Директорії, які найімовірніше відкриють наступними (від найімовірнішої)
+
+        Вибрані папки, батьківська, сусідні кроки історії, сусіди вибраної
+        папки в поточному списку і, нарешті, решта історії.
+        """
+        index = self.rows.index
+        selected = [path for path in self.selected_items if path in index and index[path].is_dir]
+        paths = list(selected)
+        parent = os.path.dirname(self.current_path)
+        if parent != self.current_path:
+            paths.append(parent)
+        i = self.history_index
+        paths.extend(self.history[j] for j in (i - 1, i + 1) if 0 <= j < len(self.history))
+        if not self.search_mode:
+            dirs = [row.path for row in self.rows.rows if row.is_dir]
+            pos = dirs.index(selected[0]) if selected and selected[0] in dirs else 0
+            for step in range(len(dirs)):
+                if pos - step < 0 and pos + step >= len(dirs):
+                    break
+                paths.extend(dirs[j] for j in (pos + step, pos - step) if 0 <= j < len(dirs))
+                if len(paths) >= self.prefetcher.max_dirs:
+                    break
+        paths.extend(reversed(self.history[:max(0, i - 1)]))
+        paths.extend(self.history[i + 2:])
+        return paths
+
+    def select(self, paths, prefetch=True):
+        """Запам'ятати виділення подання (і підлаштувати передвибірку)"""
+        self.selected_items = list(paths)
+        if prefetch:
+            self.prefetcher.schedule(self.prefetch_candidates)
+
+    # ---- Навігація ----
+
+    def navigate_to(self, path):
+        """Перейти до директорії (чи папки архіву); False, якщо це не директорія"""
+        if not archives.is_dir(path):
+            return False
+        self.current_path = path
+        self.history = self.history[:self.history_index + 1]
+        self.history.append(path)
+        self.history_index = len(self.history) - 1
+        self.load(use_cache=True)
+        return True
+
+    def go_back(self):
+        if self.history_index > 0:
+            self.history_index -= 1
+            self.current_path = self.history[self.history_index]
+            self.load(use_cache=True)
+
+    def go_forward(self):
+        if self.history_index < len(self.history) - 1:
+            self.history_index += 1
+            self.current_path = self.history[self.history_index]
+            self.load(use_cache=True)
+
+    def go_up(self):
+        parent = str(Path(self.current_path).parent)
+        if parent != self.current_path:
+            self.navigate_to(parent)
+
+    # ---- Сортування і фільтр ----
+
+    def sort_column(self, col):
+        """Сортувати за колонкою, повторно за тією ж — змінити напрямок"""
+        current, reverse = self.sort_state
+        self.sort_state = (col, not reverse if col == current else False)
+        perf_trace.start('sort', column=col, rows=len(self.rows))
+        self.apply_sort()
+        perf_trace.finish('sort')
+
+    def apply_sort(self):
+        """Відсортувати рядки за сирими ключами вибраної колонки
+
+        Розмір — у байтах, дата — mtime, назва — у природному порядку
+        (file2 < file10).
+        """
+        col, reverse = self.sort_state
+        self.rows.sort_by(col, COLUMN_SORT_KEYS['name' if col == '#0' else col], reverse)
+        self.on_sorted(col, reverse)
+
+    def set_filter(self, query):
+        """Лишити рядки, назва яких містить query; False, якщо запит не змінився
+
+        Доповнений запит перевіряє лише вже відібрані рядки.
+        """
+        query = query.strip()
+        if query == self.filter_query:
+            return False
+        previous, self.filter_query = self.filter_query, query
+        self.rows.set_filter(name_filter(query) if query else None, narrows(previous, query))
+        return True
+
+    def clear_filter(self):
+        self.filter_query = ''
+        self.rows.set_filter(None)
+
+    def enter_search(self, sort_key=entry_sort_key):
+        """Перейти до показу результатів пошуку замість вмісту директорії
+
+        sort_key=None — порядок знаходження (рядки лише дописуються).
+        """
+        self.loader.cancel()
+        self.clear_filter()
+        self.search_mode = True
+        # Рядки далі — результати пошуку, а не список директорії для кешу
+        self.listing_dirty = False
+        self.selected_items = []
+        self.rows.sort_key, self.rows.sort_reverse = sort_key, False
+
+    # ---- Живе оновлення ----
+
+    def _watch_directory(self):
+        """Перемкнути inotify на поточну директорію"""
+        if self.watcher is None:
+            return
+        old_path = self.watcher.path
+        if old_path and self.listing_dirty and not self.search_mode:
+            # Зберегти оновлений подіями список, якщо нових подій не надійшло
+            stamp = dir_stamp(old_path)
+            if not self.watcher.drain()[0]:
+                self.listing_cache.put(old_path, stamp, self.rows.full_rows)
+            else:
+                self.listing_cache.discard(old_path)
+        self.listing_dirty = False
+        try:
+            self.watcher.watch(self.current_path)
+        except OSError:
+            self.watcher.unwatch()
+
+    def _poll_fs_changes(self):
+        """Застосувати зведені події inotify до показаного списку"""
+        self.scheduler.after(WATCH_INTERVAL_MS, self._poll_fs_changes)
+        if self.watcher.path is None or self.loader.busy or self.search_mode:
+            # Під час пошуку події накопичуються до повернення до списку
+            return
+        changes, overflow, gone = self.watcher.drain()
+        if gone:
+            self.watcher.unwatch()
+            self.on_gone()
+        elif overflow:
+            self.load()
+        elif changes:
+            paths, removed = [], []
+            for name, kind in changes.items():
+                path = os.path.join(self.current_path, name)
+                (paths if kind == inotify_watch.CHANGED else removed).append(path)
+            self.update_rows(paths, removed)
+
+    def update_rows(self, paths, removed=()):
+        """Додати, оновити або прибрати лише рядки вказаних шляхів
+
+        Рядки шукаються в індексі шлях -> рядок, нові вставляються у
+        відсортовану позицію двійковим пошуком. Шляхи поза поточною
+        директорією пропускаються.
+        """
+        upserts = []
+        removals = []
+        removed = set(removed)
+        current = os.path.normpath(self.current_path)
+        # Шлях і в paths, і в removed — зник: обробляється один раз
+        for path in [p for p in paths if p not in removed] + list(removed):
+            if os.path.dirname(os.path.normpath(path)) != current:
+                continue
+            entry = entry_for_path(path) if path not in removed else None
+            old = self.rows.index.get(path)
+            if old is not None:
+                if old.is_dir:
+                    self.folder_count -= 1
+                else:
+                    self.file_count -= 1
+            if entry is None:
+                if old is not None:
+                    removals.append(path)
+                continue
+            if entry.is_dir:
+                self.folder_count += 1
+            else:
+                self.file_count += 1
+            upserts.append(entry)
+        self.rows.apply_changes(upserts, removals)
+        self.listing_dirty = True
+        self.on_changed()
+
+    # ---- Файлові операції ----
+
+    def create_folder(self, name):
+        """Створити папку в поточній директорії (OSError — як є)"""
+        path = os.path.join(self.current_path, name)
+        os.makedirs(path, exist_ok=True)
+        self.update_rows([path])
+        return path
+
+    def create_file(self, name):
+        path = os.path.join(self.current_path, name)
+        Path(path).touch()
+        self.update_rows([path])
+        return path
+
+    def rename(self, old_path, new_name):
+        new_path = os.path.join(os.path.dirname(old_path), new_name)
+        os.rename(old_path, new_path)
+        self.update_rows([new_path], [old_path] if new_path != old_path else [])
+        return new_path
+
+    def copy(self, paths):
+        self.clipboard_items = list(paths)
+        self.clipboard_operation = 'copy'
+
+    def cut(self, paths):
+        self.clipboard_items = list(paths)
+        self.clipboard_operation = 'cut'
+
+    def plan_paste(self, on_ready):
+        """Скласти план вставлення буфера в поточну директорію у фоні
+
+        on_ready(plan) отримує TransferPlan (обсяг, місце, конфлікти);
+        після підтвердження — start_transfer(plan, plan.resolve(policy)).
+        False, якщо буфер порожній.
+        """
+        if not self.clipboard_items:
+            return False
+        perf_trace.start('paste', items=len(self.clipboard_items))
+
+        def ready(plan):
+            perf_trace.finish('paste', files=plan.files_total, bytes=plan.bytes_total)
+            on_ready(plan)
+        plan_async(self.scheduler, list(self.clipboard_items), self.current_path,
+                   self.clipboard_operation or 'copy', ready)
+        return True
+
+    def start_transfer(self, plan, pairs):
+        """Поставити підтверджений план у чергу перенесення"""
+        job = self.transfers.submit(TransferJob(pairs, plan.operation, plan=plan))
+        if plan.operation == 'cut':
+            self.clipboard_items = []
+        return job
+
+    def delete(self, paths):
+        """Миттєво від'єднати шляхи у відстійник; вміст видаляється у фоні"""
+        perf_trace.start('delete', items=len(paths))
+        job = self.deleter.delete(list(paths))
+        self.update_rows([], job.removed)
+        perf_trace.finish('delete')
+        return job
+
+    def job_finished(self, job):
+        """Показати результат завершеного завдання в рядках"""
+        if job.operation == 'delete':
+            self.update_rows([], job.removed)
+        else:
+            self.update_rows(job.completed, [path for path in job.removed if path not in job.completed])
+
+    def track(self, job, on_progress=None, on_finished=None, interval_ms=TRACK_INTERVAL_MS):
+        """Опитувати завдання: on_progress(job) періодично, on_finished(job) наприкінці
+
+        Для подань без TransferPanel (і безголових прогонів).
+        """
+        def poll():
+            if job.is_finished:
+                self.job_finished(job)
+                if on_finished is not None:
+                    on_finished(job)
+                return
+            if on_progress is not None:
+                on_progress(job)
+            self.scheduler.after(interval_ms, poll)
+        poll()
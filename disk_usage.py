@@ -0,0 +1,221 @@
+"""Паралельний підрахунок зайнятого місця (як du) з кешем директорій.
+
+Піддерево обходиться пулом потоків: кожна директорія — окреме завдання
+os.scandir. Жорсткі посилання рахуються один раз за (st_dev, st_ino),
+рахується і видимий розмір, і реально зайняті блоки (st_blocks).
+Проміжні підсумки доступні під час обходу — інтерфейс просто читає їх.
+
+Кеш зберігає зведення по кожній директорії окремо (власні файли і список
+піддиректорій) і перевіряє його за mtime/ctime директорії: незмінена
+директорія коштує один lstat замість scandir і stat усіх файлів. Зміна
+розміру файлу без зміни вмісту директорії mtime не змінює — для цього
+є явний перерахунок (discard_tree).
+"""
+import collections
+import os
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+WORKERS = 8
+
+
+class UsageTotals:
+    """Підсумки піддерева: видимий розмір, місце на диску, кількості"""
+
+    __slots__ = ('apparent', 'disk', 'files', 'dirs', 'errors')
+
+    def __init__(self):
+        self.apparent = 0
+        self.disk = 0
+        self.files = 0
+        self.dirs = 0
+        self.errors = 0
+
+
+class DirRecord:
+    """Зведення однієї директорії без піддиректорій
+
+    linked — (dev, ino, розмір, байти на диску) файлів з кількома
+    жорсткими посиланнями; їх дедуплікує вже сам обхід.
+    """
+
+    __slots__ = ('stamp', 'apparent', 'disk', 'files', 'errors', 'linked', 'subdirs')
+
+    def __init__(self, stamp):
+        self.stamp = stamp
+        self.apparent = 0
+        self.disk = 0
+        self.files = 0
+        self.errors = 0
+        self.linked = []
+        self.subdirs = []
+
+
+class UsageCache:
+    """LRU-кеш DirRecord за шляхом, дійсний, поки не змінились mtime/ctime"""
+
+    def __init__(self, max_dirs=200_000):
+        self.max_dirs = max_dirs
+        self.records = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, path, stamp):
+        with self.lock:
+            record = self.records.get(path)
+            if record is None or record.stamp != stamp:
+                self.misses += 1
+                return None
+            self.records.move_to_end(path)
+            self.hits += 1
+            return record
+
+    def put(self, path, record):
+        with self.lock:
+            self.records[path] = record
+            self.records.move_to_end(path)
+            while len(self.records) > self.max_dirs:
+                self.records.popitem(last=False)
+
+    def discard_tree(self, path):
+        """Забути path і все під ним (для примусового перерахунку)"""
+        prefix = path.rstrip(os.sep) + os.sep
+        with self.lock:
+            for key in [k for k in self.records if k == path or k.startswith(prefix)]:
+                del self.records[key]
+
+
+def read_dir(path, stamp):
+    """Прочитати одну директорію у DirRecord (без заходу в піддиректорії)"""
+    record = DirRecord(stamp)
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                record.errors += 1
+                continue
+            if stat.S_ISDIR(st.st_mode):
+                record.subdirs.append(entry.name)
+            elif st.st_nlink > 1:
+                record.linked.append((st.st_dev, st.st_ino, st.st_size, st.st_blocks * 512))
+            else:
+                record.apparent += st.st_size
+                record.disk += st.st_blocks * 512
+                record.files += 1
+    return record
+
+
+class DiskUsageScan:
+    """Обхід кількох коренів пулом потоків з потоковими підсумками
+
+    totals[корінь] — UsageTotals, що ростуть під час обходу; finished
+    встановлюється, коли всі завдання завершились (або скасовані).
+    one_filesystem — не переходити на інші точки монтування (як du -x).
+    """
+
+    def __init__(self, roots, cache=None, workers=WORKERS, one_filesystem=True):
+        self.roots = list(roots)
+        self.cache = cache
+        self.one_filesystem = one_filesystem
+        self.totals = {root: UsageTotals() for root in self.roots}
+        self.seen_inodes = set()
+        self.seen_dirs = set()
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+        self.started = None
+        self.elapsed = None
+        self.workers = workers
+        self.pool = None
+
+    def start(self):
+        self.started = time.monotonic()
+        if not self.roots:
+            self._finish()
+            return self
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='du')
+        self.pending = len(self.roots)
+        for root in self.roots:
+            self.pool.submit(self._visit, root, root, None)
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+
+    @property
+    def done(self):
+        return self.finished.is_set()
+
+    def _finish(self):
+        self.elapsed = time.monotonic() - self.started
+        self.finished.set()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+
+    def _visit(self, path, root, dev):
+        """Завдання пулу: одна директорія (або корінь-файл)"""
+        try:
+            if not self.cancelled.is_set():
+                self._scan(path, root, dev)
+        except OSError:
+            with self.lock:
+                self.totals[root].errors += 1
+        finally:
+            with self.lock:
+                self.pending -= 1
+                last = self.pending == 0
+            if last:
+                self._finish()
+
+    def _scan(self, path, root, dev):
+        st = os.lstat(path)
+        totals = self.totals[root]
+        if not stat.S_ISDIR(st.st_mode):
+            self._add_file(totals, st.st_dev, st.st_ino, st.st_nlink, st.st_size, st.st_blocks * 512)
+            return
+        if dev is not None and self.one_filesystem and st.st_dev != dev:
+            return
+        key = (st.st_dev, st.st_ino)
+        stamp = (st.st_mtime_ns, st.st_ctime_ns)
+        with self.lock:
+            if key in self.seen_dirs:
+                return
+            self.seen_dirs.add(key)
+
+        record = self.cache.lookup(path, stamp) if self.cache is not None else None
+        if record is None:
+            record = read_dir(path, stamp)
+            if self.cache is not None:
+                self.cache.put(path, record)
+
+        with self.lock:
+            totals.apparent += record.apparent + st.st_size
+            totals.disk += record.disk + st.st_blocks * 512
+            totals.files += record.files
+            totals.dirs += 1
+            totals.errors += record.errors
+            for ino_dev, ino, size, disk in record.linked:
+                if (ino_dev, ino) in self.seen_inodes:
+                    continue
+                self.seen_inodes.add((ino_dev, ino))
+                totals.apparent += size
+                totals.disk += disk
+                totals.files += 1
+            self.pending += len(record.subdirs)
+        for name in record.subdirs:
+            self.pool.submit(self._visit, os.path.join(path, name), root, st.st_dev)
+
+    def _add_file(self, totals, dev, ino, nlink, size, disk):
+        with self.lock:
+            if nlink > 1:
+                if (dev, ino) in self.seen_inodes:
+                    return
+                self.seen_inodes.add((dev, ino))
+            totals.apparent += size
+            totals.disk += disk
+            totals.files += 1
@@ -0,0 +1,284 @@
+"""Пошук дублікатів файлів: розмір → частковий хеш → повний хеш.
+
+Спершу піддерево обходиться без читання вмісту і файли групуються за
+розміром; унікальний розмір означає, що копій немає. Для збігів
+хешуються перші й останні 64 КіБ, і лише файли, що збіглись і тут,
+хешуються повністю — великими послідовними читаннями. Жорсткі
+посилання (той самий st_dev/st_ino) — це один файл, а не копії: вони
+хешуються один раз і показуються при групі окремо.
+
+Хешування виконує окремий пул процесів; кожен процес отримує подію
+скасування, тож навіть хеш багатогігабайтного файлу переривається
+одразу. Готові групи забираються інтерфейсом через take().
+"""
+import hashlib
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dir_scanner import walk_file_stats
+
+# Скільки читається з початку і з кінця файлу для часткового хешу
+PARTIAL_SIZE = 64 * 1024
+# Буфер послідовного читання для повного хешу
+READ_SIZE = 1024 * 1024
+# Пакет дрібних завдань (часткові хеші) для одного виклику пулу
+BATCH_FILES = 64
+WORKERS = min(4, os.cpu_count() or 2)
+SKIP_DIRS = frozenset({'.git', '.hg', '.svn'})
+
+_cancelled = None
+
+
+def _init_worker(cancelled):
+    global _cancelled
+    _cancelled = cancelled
+
+
+def _new_hash():
+    return hashlib.blake2b(digest_size=20)
+
+
+def _advise(fd, advice):
+    try:
+        os.posix_fadvise(fd, 0, 0, advice)
+    except (AttributeError, OSError):
+        pass
+
+
+def partial_hash(path, size):
+    """Хеш перших і останніх PARTIAL_SIZE байтів (для малих — усього файлу)"""
+    digest = _new_hash()
+    with open(path, 'rb') as f:
+        digest.update(f.read(PARTIAL_SIZE))
+        if size > PARTIAL_SIZE:
+            f.seek(max(PARTIAL_SIZE, size - PARTIAL_SIZE))
+            digest.update(f.read(PARTIAL_SIZE))
+    return digest.hexdigest()
+
+
+def full_hash(path):
+    """Хеш усього файлу великими послідовними читаннями (None — скасовано)"""
+    digest = _new_hash()
+    buf = bytearray(READ_SIZE)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as f:
+        fd = f.fileno()
+        _advise(fd, getattr(os, 'POSIX_FADV_SEQUENTIAL', 0))
+        while True:
+            if _cancelled is not None and _cancelled.is_set():
+                return None
+            n = f.readinto(buf)
+            if not n:
+                break
+            digest.update(view[:n])
+        # Прочитане вдруге не знадобиться — не витісняти ним кеш сторінок
+        _advise(fd, getattr(os, 'POSIX_FADV_DONTNEED', 4))
+    return digest.hexdigest()
+
+
+def partial_batch(items):
+    """Завдання пулу: [(path, size)] -> [(path, хеш або None)]"""
+    results = []
+    for path, size in items:
+        if _cancelled is not None and _cancelled.is_set():
+            break
+        try:
+            results.append((path, partial_hash(path, size)))
+        except OSError:
+            results.append((path, None))
+    return results
+
+
+def full_task(path):
+    """Завдання пулу: повний хеш одного файлу"""
+    try:
+        return path, full_hash(path)
+    except OSError:
+        return path, None
+
+
+class DuplicateGroup:
+    """Однакові файли: paths — по одному шляху на inode, links — решта імен"""
+    __slots__ = ('size', 'digest', 'paths', 'links')
+
+    def __init__(self, size, digest, paths, links):
+        self.size = size
+        self.digest = digest
+        self.paths = paths
+        self.links = links
+
+    @property
+    def reclaimable(self):
+        return self.size * (len(self.paths) - 1)
+
+
+class DuplicateSearch:
+    """Дублікати в піддереві root; групи забираються через take()
+
+    phase — 'scan', 'partial', 'full' або 'done'. Лічильники: files
+    (переглянуто), candidates (файлів зі спільним розміром), hashed
+    (прочитано байт), reclaimable (можна звільнити).
+    """
+
+    def __init__(self, root, min_size=1, workers=WORKERS):
+        self.root = root
+        self.min_size = min_size
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.cancelled = None
+        self.finished = threading.Event()
+        self.groups = []
+        self.found = 0
+        self.phase = 'scan'
+        self.files = 0
+        self.candidates = 0
+        self.hashed = 0
+        self.reclaimable = 0
+        self.errors = 0
+        self.started = None
+        self.elapsed = None
+        # Інші імена тих самих inode: шлях першого імені -> [решта]
+        self.links = {}
+
+    def start(self):
+        self.started = time.monotonic()
+        self.cancelled = multiprocessing.get_context('spawn').Event()
+        threading.Thread(target=self._run, daemon=True).start()
+        return self
+
+    def cancel(self):
+        if self.cancelled is not None:
+            self.cancelled.set()
+
+    @property
+    def done(self):
+        return self.finished.is_set()
+
+    def take(self):
+        """Забрати групи, знайдені з минулого виклику"""
+        with self.lock:
+            groups, self.groups = self.groups, []
+        return groups
+
+    def throughput(self):
+        """Прохешовано байт за секунду"""
+        elapsed = self.elapsed if self.elapsed is not None else time.monotonic() - self.started
+        return self.hashed / elapsed if elapsed > 0 else 0.0
+
+    def _run(self):
+        pool = None
+        try:
+            by_size = self._scan()
+            if by_size and not self.cancelled.is_set():
+                pool = ProcessPoolExecutor(max_workers=self.workers,
+                                           mp_context=multiprocessing.get_context('spawn'),
+                                           initializer=_init_worker, initargs=(self.cancelled,))
+                self._hash(pool, by_size)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False)
+            self.phase = 'done'
+            self.elapsed = time.monotonic() - self.started
+            self.finished.set()
+
+    def _scan(self):
+        """Розмір -> шляхи (по одному на inode) для розмірів з кількома файлами"""
+        by_size = {}
+        seen = {}
+        for path, st in walk_file_stats(self.root, SKIP_DIRS, self.cancelled):
+            self.files += 1
+            if st.st_size < self.min_size:
+                continue
+            key = (st.st_dev, st.st_ino)
+            first = seen.get(key)
+            if first is not None:
+                self.links.setdefault(first, []).append(path)
+                continue
+            seen[key] = path
+            by_size.setdefault(st.st_size, []).append(path)
+        by_size = {size: paths for size, paths in by_size.items() if len(paths) > 1}
+        self.candidates = sum(len(paths) for paths in by_size.values())
+        return by_size
+
+    def _map(self, pool, fn, tasks):
+        """Виконати завдання в пулі (у роботі не більше 2×workers), видаючи результати"""
+        done = queue.Queue()
+        pending = 0
+        tasks = iter(tasks)
+        while True:
+            while pending < 2 * self.workers and not self.cancelled.is_set():
+                task = next(tasks, None)
+                if task is None:
+                    break
+                pool.submit(fn, task).add_done_callback(done.put)
+                pending += 1
+            if not pending:
+                return
+            future = done.get()
+            pending -= 1
+            try:
+                yield future.result()
+            except Exception:
+                self.errors += 1
+
+    def _hash(self, pool, by_size):
+        sizes = {path: size for size, paths in by_size.items() for path in paths}
+
+        # Частковий хеш: пакети дрібних завдань, найбільші файли — першими
+        self.phase = 'partial'
+        ordered = sorted(sizes.items(), key=lambda item: -item[1])
+        batches = [ordered[i:i + BATCH_FILES] for i in range(0, len(ordered), BATCH_FILES)]
+        by_partial = {}
+        for results in self._map(pool, partial_batch, batches):
+            for path, digest in results:
+                if digest is None:
+                    self.errors += 1
+                    continue
+                self.hashed += min(sizes[path], 2 * PARTIAL_SIZE)
+                by_partial.setdefault((sizes[path], digest), []).append(path)
+        if self.cancelled.is_set():
+            return
+
+        # Файли, що вміщаються у частковий хеш, уже перевірені повністю
+        need_full = {}
+        for (size, digest), paths in by_partial.items():
+            if len(paths) < 2:
+                continue
+            if size <= 2 * PARTIAL_SIZE:
+                self._emit(size, digest, paths)
+            else:
+                for path in paths:
+                    need_full[path] = (size, digest)
+
+        # Повний хеш; група видається, щойно прохешовано всіх її кандидатів
+        self.phase = 'full'
+        remaining = {}
+        for key in need_full.values():
+            remaining[key] = remaining.get(key, 0) + 1
+        by_full = {}
+        order = sorted(need_full, key=lambda path: -sizes[path])
+        for path, digest in self._map(pool, full_task, order):
+            key = need_full[path]
+            if digest is None:
+                self.errors += not self.cancelled.is_set()
+            else:
+                self.hashed += key[0]
+                by_full.setdefault(key, {}).setdefault(digest, []).append(path)
+            remaining[key] -= 1
+            if remaining[key] == 0:
+                for full, paths in by_full.pop(key, {}).items():
+                    if len(paths) > 1:
+                        self._emit(key[0], full, paths)
+
+    def _emit(self, size, digest, paths):
+        paths = sorted(paths)
+        group = DuplicateGroup(size, digest, paths,
+                               [link for path in paths for link in self.links.get(path, ())])
+        with self.lock:
+            self.groups.append(group)
+            self.found += 1
+            self.reclaimable += group.reclaimable
@@ -0,0 +1,118 @@
+"""Вікно «Дублікати»: групи однакових файлів, що з'являються під час пошуку"""
+import os
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+from duplicates import DuplicateSearch
+
+POLL_INTERVAL_MS = 100
+# Скільки груп показувати (решта лише рахується)
+SHOW_LIMIT = 5000
+PHASES = {'scan': "перегляд", 'partial': "частковий хеш", 'full': "повний хеш", 'done': "готово"}
+
+
+class DuplicatesWindow(tk.Toplevel):
+    """Дублікати під root_path; open_path(path) відкриває вибраний файл"""
+
+    def __init__(self, master, root_path, open_path, format_size,
+                 bg='#F0F0F0', fg='black', button_bg='#E1E1E1', font=('Arial', 9)):
+        super().__init__(master, bg=bg)
+        self.root_path = root_path
+        self.open_path = open_path
+        self.format_size = format_size
+        self.search = None
+        self.shown = 0
+
+        self.title(f"Дублікати — {root_path}")
+        self.geometry("800x450")
+
+        top = tk.Frame(self, bg=bg, padx=10, pady=8)
+        top.pack(fill="x")
+        tk.Label(top, text="Не менше (КБ):", bg=bg, fg=fg, font=font).pack(side="left")
+        self.min_kb = tk.StringVar(self, value="0")
+        entry = tk.Entry(top, textvariable=self.min_kb, width=8, bg=button_bg, fg=fg,
+                         insertbackground=fg, relief="flat", font=font)
+        entry.pack(side="left", padx=5)
+        entry.bind("<Return>", lambda e: self.start())
+        btn_opts = {"bg": button_bg, "fg": fg, "relief": "flat", "font": font, "padx": 10}
+        tk.Button(top, text="Шукати", command=self.start, **btn_opts).pack(side="left", padx=5)
+        self.stop_btn = tk.Button(top, text="Зупинити", command=self.stop, state="disabled", **btn_opts)
+        self.stop_btn.pack(side="left")
+
+        frame = tk.Frame(self, bg=bg)
+        frame.pack(fill="both", expand=True, padx=10)
+        self.tree = ttk.Treeview(frame, columns=('size', 'note'), show='tree headings')
+        self.tree.heading('#0', text='Файл')
+        self.tree.heading('size', text='Розмір')
+        self.tree.heading('note', text='')
+        self.tree.column('#0', width=520)
+        self.tree.column('size', width=100, anchor="e")
+        self.tree.column('note', width=140)
+        scrollbar = ttk.Scrollbar(frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.pack(fill="both", expand=True)
+        self.tree.bind('<Double-Button-1>', self.on_double_click)
+
+        self.status = tk.Label(self, text="", anchor="w", bg=bg, fg=fg, font=font)
+        self.status.pack(fill="x", padx=10, pady=5)
+        self.bind("<Escape>", lambda e: self.stop())
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.start()
+
+    def start(self):
+        try:
+            min_size = max(1, int(float(self.min_kb.get() or 0) * 1024))
+        except ValueError:
+            messagebox.showerror("Помилка", "Мінімальний розмір має бути числом", parent=self)
+            return
+        self.stop()
+        self.tree.delete(*self.tree.get_children())
+        self.shown = 0
+        self.search = DuplicateSearch(self.root_path, min_size).start()
+        self.stop_btn.configure(state="normal")
+        self.poll(self.search)
+
+    def stop(self):
+        if self.search is not None:
+            self.search.cancel()
+
+    def close(self):
+        self.stop()
+        self.destroy()
+
+    def poll(self, search):
+        """Перенести нові групи у список і оновити лічильники"""
+        if search is not self.search or not self.winfo_exists():
+            return
+        for group in search.take():
+            if self.shown >= SHOW_LIMIT:
+                break
+            size = self.format_size(group.size)
+            parent = self.tree.insert('', 'end', open=True,
+                                      text=f"{len(group.paths)} копії · {os.path.basename(group.paths[0])}",
+                                      values=(size, f"звільнить {self.format_size(group.reclaimable)}"))
+            for path in group.paths:
+                self.tree.insert(parent, 'end', text=path, values=(size, ""))
+            for path in group.links:
+                self.tree.insert(parent, 'end', text=path, values=("", "жорстке посилання"))
+            self.shown += 1
+        text = (f"Груп: {search.found}, можна звільнити {self.format_size(search.reclaimable)}; "
+                f"файлів: {search.files}, кандидатів: {search.candidates}, "
+                f"прочитано {self.format_size(search.hashed)} ({self.format_size(search.throughput())}/с)")
+        if search.found > self.shown:
+            text += f", показано {self.shown}"
+        if search.errors:
+            text += f", помилок: {search.errors}"
+        if search.done:
+            self.stop_btn.configure(state="disabled")
+            state = "зупинено" if search.cancelled.is_set() else f"за {search.elapsed:.2f} с"
+            self.status.configure(text=f"{text} — {state}")
+        else:
+            self.status.configure(text=f"{text} — {PHASES[search.phase]}...")
+            self.after(POLL_INTERVAL_MS, self.poll, search)
+
+    def on_double_click(self, event):
+        item = self.tree.identify_row(event.y)
+        if item and self.tree.parent(item):
+            self.open_path(self.tree.item(item, 'text'))
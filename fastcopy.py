@@ -0,0 +1,204 @@
+"""Найдешевші примітиви ядра для копіювання і переміщення файлів.
+
+Для кожного файлу по черзі пробуються: reflink (FICLONE, btrfs/xfs),
+os.copy_file_range, os.sendfile і, наостанок, копіювання великим буфером.
+Невдачу «не підтримується» для пари пристроїв запам'ятовуємо, щоб не
+повторювати заздалегідь приречені системні виклики на кожному файлі.
+Переміщення в межах одного st_dev — атомарне перейменування.
+"""
+import errno
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# _IOW(0x94, 9, int) з linux/fs.h
+FICLONE = 0x40049409
+
+RENAME = 'rename'
+REFLINK = 'reflink'
+COPY_FILE_RANGE = 'copy_file_range'
+SENDFILE = 'sendfile'
+BUFFER = 'buffer'
+SYMLINK = 'symlink'
+
+# Скільки байтів передавати за один виклик ядра (між перевірками паузи)
+KERNEL_CHUNK = 8 * 1024 * 1024
+BUFFER_SIZE = 4 * 1024 * 1024
+
+# Помилки, що означають «метод не підтримується для цих файлів»
+UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP,
+    errno.ENOTTY, errno.EBADF, errno.EPERM, errno.ETXTBSY,
+}
+if hasattr(errno, 'ENOTSUP'):
+    UNSUPPORTED_ERRNOS.add(errno.ENOTSUP)
+
+_unsupported = {}
+_unsupported_lock = threading.Lock()
+
+
+class _Unsupported(Exception):
+    """Метод не спрацював; copied — скільки байтів уже передано
+
+    permanent=False — збій стосується лише цього файлу (наприклад, файл
+    змінився під час копіювання), і метод не слід вимикати для пристроїв.
+    """
+
+    def __init__(self, copied, permanent=True):
+        super().__init__(copied)
+        self.copied = copied
+        self.permanent = permanent
+
+
+def _is_unsupported(devices, method):
+    with _unsupported_lock:
+        return method in _unsupported.get(devices, ())
+
+
+def _mark_unsupported(devices, method):
+    with _unsupported_lock:
+        _unsupported.setdefault(devices, set()).add(method)
+
+
+def same_device(src, dest_dir):
+    """Чи лежать джерело і директорія призначення на одному пристрої"""
+    try:
+        return os.lstat(src).st_dev == os.stat(dest_dir).st_dev
+    except OSError:
+        return False
+
+
+def move_if_same_device(src, dest):
+    """Перемістити перейменуванням, якщо st_dev збігається; інакше False"""
+    if not same_device(src, os.path.dirname(dest) or '.'):
+        return False
+    try:
+        os.rename(src, dest)
+    except OSError:
+        return False
+    return True
+
+
+def _reflink(sfd, dfd, start, size, progress, checkpoint):
+    if fcntl is None:
+        raise _Unsupported(start)
+    try:
+        fcntl.ioctl(dfd, FICLONE, sfd)
+    except OSError as e:
+        if e.errno in UNSUPPORTED_ERRNOS:
+            raise _Unsupported(start)
+        raise
+    if progress and size > start:
+        progress(size - start)
+    return size
+
+
+def _copy_file_range(sfd, dfd, start, size, progress, checkpoint):
+    if not hasattr(os, 'copy_file_range'):
+        raise _Unsupported(start)
+    copied = start
+    while True:
+        if checkpoint:
+            checkpoint()
+        try:
+            n = os.copy_file_range(sfd, dfd, KERNEL_CHUNK)
+        except OSError as e:
+            if e.errno in UNSUPPORTED_ERRNOS:
+                raise _Unsupported(copied)
+            raise
+        if n == 0:
+            break
+        copied += n
+        if progress:
+            progress(n)
+    # Деякі ФС повертають 0 замість помилки — тоді метод не спрацював
+    if copied < size:
+        raise _Unsupported(copied, permanent=copied == start)
+    return copied
+
+
+def _sendfile(sfd, dfd, start, size, progress, checkpoint):
+    if not hasattr(os, 'sendfile'):
+        raise _Unsupported(start)
+    copied = start
+    while True:
+        if checkpoint:
+            checkpoint()
+        try:
+            n = os.sendfile(dfd, sfd, copied, KERNEL_CHUNK)
+        except OSError as e:
+            if e.errno in UNSUPPORTED_ERRNOS:
+                raise _Unsupported(copied)
+            raise
+        if n == 0:
+            break
+        copied += n
+        if progress:
+            progress(n)
+    if copied < size:
+        raise _Unsupported(copied, permanent=False)
+    return copied
+
+
+def _buffered(sfd, dfd, start, size, progress, checkpoint):
+    buf = bytearray(BUFFER_SIZE)
+    view = memoryview(buf)
+    copied = start
+    with open(sfd, 'rb', buffering=0, closefd=False) as fsrc:
+        while True:
+            if checkpoint:
+                checkpoint()
+            n = fsrc.readinto(buf)
+            if not n:
+                break
+            pos = 0
+            while pos < n:
+                pos += os.write(dfd, view[pos:n])
+            copied += n
+            if progress:
+                progress(n)
+    return copied
+
+
+METHODS = (
+    (REFLINK, _reflink),
+    (COPY_FILE_RANGE, _copy_file_range),
+    (SENDFILE, _sendfile),
+    (BUFFER, _buffered),
+)
+
+
+def copy_file(src, dest, progress=None, checkpoint=None):
+    """Скопіювати вміст файлу найдешевшим доступним способом
+
+    progress(nbytes) викликається по мірі копіювання, checkpoint() — між
+    блоками (може кинути виняток для паузи/скасування). Повертає назву
+    використаного методу. Атрибути файлу не копіюються.
+    """
+    with open(src, 'rb') as fsrc, open(dest, 'wb') as fdst:
+        sfd, dfd = fsrc.fileno(), fdst.fileno()
+        st = os.fstat(sfd)
+        size = st.st_size
+        devices = (st.st_dev, os.fstat(dfd).st_dev)
+        copied = 0
+        for name, method in METHODS:
+            if name != BUFFER and _is_unsupported(devices, name):
+                continue
+            if name == REFLINK and devices[0] != devices[1]:
+                continue
+            try:
+                method(sfd, dfd, copied, size, progress, checkpoint)
+                return name
+            except _Unsupported as e:
+                if e.permanent:
+                    _mark_unsupported(devices, name)
+                # Продовжити з того місця, де зупинився попередній метод
+                copied = e.copied
+                os.lseek(sfd, copied, os.SEEK_SET)
+                os.lseek(dfd, copied, os.SEEK_SET)
+                os.ftruncate(dfd, copied)
+    return BUFFER
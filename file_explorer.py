@@ -1,39 +1,108 @@
+import time
+# Відлік запуску (дія 'startup' у perf_trace) — ще до імпорту решти модулів
+STARTED = time.perf_counter()
+
 import os
-import shutil
 import datetime
-import subprocess
-from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog, font
-import os
-import sys
+
+import archives
+import perf_trace
+import session
+from dir_scanner import entry_sort_key
+from directory_model import DirectoryModel, format_size
+from virtual_tree import VirtualTreeview
+from preview_pane import PreviewPane
+from transfers import CANCELLED
+from perf_overlay import PerfOverlay
+# Індекс пошуку, дерево, розміри папок, рекурсивний пошук і панель
+# прогресу імпортуються там, де вперше потрібні, а не при запуску
+
+# Пауза у введенні, після якої застосовується фільтр списку
+FILTER_DELAY_MS = 150
 
 class FileExplorer(tk.Tk):
     def __init__(self):
         super().__init__()
+        # Час до першого рядка: від імпорту до рядків у списку
+        perf_trace.start('startup', started=STARTED, app='FileExplorer')
         
         # Налаштування вікна
         self.title("Провідник")
         self.geometry("1000x600")
         self.configure(bg='#F0F0F0')
         
-        # Поточний шлях
-        self.current_path = str(Path.home())
-        self.history = [self.current_path]
-        self.history_index = 0
+        # Стан і операції провідника без Tk: шлях та історія, завантаження
+        # (кеш списків, передвибірка, stat у фоні), сортування, фільтр,
+        # живе оновлення через inotify, буфер обміну і фонові операції
+        self.model = DirectoryModel(
+            self, on_load=self.on_load, on_rows=self.on_rows,
+            on_done=self.on_scan_done, on_error=self.on_scan_error,
+            on_changed=self.on_rows_changed, on_sorted=self.on_sorted,
+            on_gone=self.on_directory_gone
+        )
+        
+        # Підрахунок розміру папок (кеш зведень директорій за mtime,
+        # створюється з першим підрахунком)
+        self.usage_cache = None
+        self.dir_sizes = None
+        
+        # Рекурсивний пошук у поточній директорії
+        self.tree_search = None
+        
+        # Швидкий фільтр списку: застосовується після паузи у введенні
+        self.filter_job = None
         
-        # Буфер обміну
-        self.clipboard_items = []
-        self.clipboard_operation = None
+        # Режим дерева: вкладені папки розгортаються на місці
+        self.tree_mode = False
         
-        # Вибрані елементи
-        self.selected_items = []
+        # Індекс імен файлів для пошуку (відкривається в start_session)
+        self.file_index = None
+        self.index_updater = None
         
         # Налаштування стилів
         self.setup_styles()
         self.create_widgets()
-        self.load_directory()
         
+        # Список заповнюється вже з циклу подій: вікно з'являється одразу,
+        # а не після читання директорії (на мережевих дисках — секунди)
+        self.after_idle(self.start_session)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+    def start_session(self):
+        """Вікно показано: відновити минулу сесію, далі — фонові служби"""
+        perf_trace.mark('startup', 'mainloop')
+        # Знімок минулої сесії показується одразу і перевіряється у фоні
+        try:
+            self.model.restore(session.read())
+        except Exception as e:
+            messagebox.showerror("Помилка", f"Не вдалося завантажити директорію:\n{e}")
+        
+        # Індекс імен файлів для пошуку (оновлюється у фоні)
+        import sqlite3
+        from file_index import FileIndex, IndexUpdater
+        try:
+            self.file_index = FileIndex()
+            self.index_updater = IndexUpdater(self.file_index)
+        except (sqlite3.Error, OSError):
+            self.file_index = None
+            self.index_updater = None
+        
+        # Індексатор стартує після першого показу списку
+        if self.index_updater is not None:
+            self.after(2000, self.index_updater.start)
+        
+        # Дочистити видалення, перервані минулого разу
+        pending = self.model.deleter.resume_pending()
+        if pending is not None:
+            self.show_transfer(pending)
+    
+    def on_close(self):
+        """Зберегти знімок сесії для наступного запуску і закрити вікно"""
+        session.write(self.model.snapshot())
+        self.destroy()
+    
     def setup_styles(self):
         """Налаштувати стилі ttk"""
         style = ttk.Style()
@@ -60,21 +129,21 @@ class FileExplorer(tk.Tk):
         
         self.btn_back = tk.Button(
             self.nav_frame, text="←", width=3,
-            command=self.go_back, font=btn_font,
+            command=self.model.go_back, font=btn_font,
             bg='#E1E1E1', relief='flat', cursor='hand2'
         )
         self.btn_back.pack(side="left", padx=5, pady=10)
         
         self.btn_forward = tk.Button(
             self.nav_frame, text="→", width=3,
-            command=self.go_forward, font=btn_font,
+            command=self.model.go_forward, font=btn_font,
             bg='#E1E1E1', relief='flat', cursor='hand2'
         )
         self.btn_forward.pack(side="left", padx=2, pady=10)
         
         self.btn_up = tk.Button(
             self.nav_frame, text="↑", width=3,
-            command=self.go_up, font=btn_font,
+            command=self.model.go_up, font=btn_font,
             bg='#E1E1E1', relief='flat', cursor='hand2'
         )
         self.btn_up.pack(side="left", padx=2, pady=10)
@@ -95,6 +164,17 @@ class FileExplorer(tk.Tk):
         )
         self.btn_refresh.pack(side="left", padx=5, pady=10)
         
+        # Введення фільтрує поточний список; Enter — пошук за індексом імен
+        # (підрядок або glob: *.py, report?.txt)
+        self.search_entry = tk.Entry(
+            self.nav_frame, font=('Arial', 10),
+            relief='solid', bd=1, width=25
+        )
+        self.search_entry.pack(side="left", padx=(5, 10), pady=10)
+        self.search_entry.bind("<Return>", lambda e: self.search_index())
+        self.search_entry.bind("<Escape>", lambda e: self.load_directory(use_cache=True))
+        self.search_entry.bind("<KeyRelease>", self.schedule_filter)
+        
         # Панель інструментів
         self.toolbar_frame = tk.Frame(self, height=45, bg='#F5F5F5')
         self.toolbar_frame.pack(fill="x", padx=0, pady=0)
@@ -108,6 +188,12 @@ class FileExplorer(tk.Tk):
             ("Вставити", self.paste_items),
             ("Видалити", self.delete_items),
             ("Перейменувати", self.rename_item),
+            ("Розмір папок", self.compute_dir_sizes),
+            ("Шукати тут", self.search_here),
+            ("Шукати у файлах", self.search_in_files),
+            ("Дублікати", self.find_duplicates),
+            ("Дерево", self.toggle_tree_mode),
+            ("Перегляд", self.toggle_preview),
         ]
         
         btn_font_small = font.Font(size=9)
@@ -124,20 +210,33 @@ class FileExplorer(tk.Tk):
         self.main_frame = tk.Frame(self, bg='white')
         self.main_frame.pack(fill="both", expand=True, padx=10, pady=10)
         
+        # Панель перегляду праворуч від списку
+        self.preview = PreviewPane(self.main_frame, format_size, bg='#F5F5F5')
+        self.preview.pack(side="right", fill="y", padx=(10, 0))
+        self.preview_visible = True
+        
+        # Плаский список і дерево займають одне місце, видно один з них
+        self.list_frame = tk.Frame(self.main_frame, bg='white')
+        self.list_frame.pack(fill="both", expand=True)
+        
         # Створити Treeview
         columns = ('size', 'modified', 'type')
         self.tree = ttk.Treeview(
-            self.main_frame,
+            self.list_frame,
             columns=columns,
             show='tree headings',
             selectmode='extended'
         )
         
-        # Налаштувати колонки
-        self.tree.heading('#0', text='Назва')
-        self.tree.heading('size', text='Розмір')
-        self.tree.heading('modified', text='Дата змінення')
-        self.tree.heading('type', text='Тип')
+        # Налаштувати колонки (клік по заголовку сортує)
+        self.column_titles = {
+            '#0': 'Назва',
+            'size': 'Розмір',
+            'modified': 'Дата змінення',
+            'type': 'Тип',
+        }
+        for col, title in self.column_titles.items():
+            self.tree.heading(col, text=title, command=lambda c=col: self.sort_column(c))
         
         self.tree.column('#0', width=400)
         self.tree.column('size', width=100)
@@ -145,18 +244,46 @@ class FileExplorer(tk.Tk):
         self.tree.column('type', width=100)
         
         # Прокрутка
-        scrollbar_y = ttk.Scrollbar(self.main_frame, orient='vertical', command=self.tree.yview)
-        scrollbar_x = ttk.Scrollbar(self.main_frame, orient='horizontal', command=self.tree.xview)
-        self.tree.configure(yscrollcommand=scrollbar_y.set, xscrollcommand=scrollbar_x.set)
+        scrollbar_y = ttk.Scrollbar(self.list_frame, orient='vertical')
+        scrollbar_x = ttk.Scrollbar(self.list_frame, orient='horizontal', command=self.tree.xview)
+        self.tree.configure(xscrollcommand=scrollbar_x.set)
         
         scrollbar_y.pack(side='right', fill='y')
         scrollbar_x.pack(side='bottom', fill='x')
         self.tree.pack(fill="both", expand=True)
         
+        # Віртуальний список: у Treeview існують лише видимі рядки
+        self.view = VirtualTreeview(
+            self.tree, scrollbar_y, self.format_row,
+            on_select=self.on_select, on_visible=self.on_rows_visible
+        )
+        self.model.rows = self.view
+        
         # Прив'язки подій
         self.tree.bind('<Double-Button-1>', self.on_double_click)
         self.tree.bind('<Button-3>', self.on_right_click)
-        self.tree.bind('<<TreeviewSelect>>', self.on_select)
+        
+        # Дерево папок: вміст читається у фоні при розгортанні
+        self.tree_frame = tk.Frame(self.main_frame, bg='white')
+        self.hier_tree = ttk.Treeview(
+            self.tree_frame,
+            columns=columns,
+            show='tree headings',
+            selectmode='extended'
+        )
+        for col, title in self.column_titles.items():
+            self.hier_tree.heading(col, text=title)
+        self.hier_tree.column('#0', width=400)
+        self.hier_tree.column('size', width=100)
+        self.hier_tree.column('modified', width=150)
+        self.hier_tree.column('type', width=100)
+        hier_scrollbar = ttk.Scrollbar(self.tree_frame, orient='vertical', command=self.hier_tree.yview)
+        self.hier_tree.configure(yscrollcommand=hier_scrollbar.set)
+        hier_scrollbar.pack(side='right', fill='y')
+        self.hier_tree.pack(fill="both", expand=True)
+        
+        # LazyTree створюється з першим перемиканням у режим дерева
+        self.lazy_tree = None
         
         # Статус бар
         self.status_bar = tk.Label(
@@ -165,166 +292,399 @@ class FileExplorer(tk.Tk):
             relief='flat', font=('Arial', 9)
         )
         self.status_bar.pack(fill="x", padx=10, pady=5)
+        
+        # Підсумок останньої дії з perf_trace (F12), профіль наступної (Shift+F12)
+        self.perf_overlay = PerfOverlay(
+            self, self.status_bar, bg='#F0F0F0', fg='#555555', font=('Arial', 8)
+        )
+        
+        # Кнопка зупинки рекурсивного пошуку (видно лише під час пошуку)
+        self.btn_stop_search = tk.Button(
+            self, text="Зупинити пошук",
+            command=self.stop_tree_search, font=('Arial', 9),
+            bg='#E1E1E1', relief='flat', cursor='hand2', padx=10
+        )
+        
+        # Панель прогресу фонових операцій створюється з першим завданням
+        self.transfer_panel = None
     
-    def load_directory(self):
-        """Завантажити вміст директорії"""
-        try:
-            # Очистити дерево
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            # Оновити адресну строку
-            self.path_entry.delete(0, "end")
-            self.path_entry.insert(0, self.current_path)
-            
-            # Отримати список файлів
-            items = []
-            try:
-                with os.scandir(self.current_path) as entries:
-                    for entry in entries:
-                        try:
-                            items.append(entry)
-                        except PermissionError:
-                            continue
-            except PermissionError:
-                messagebox.showerror("Помилка", "Немає доступу до цієї директорії")
-                return
-            
-            # Сортувати: спочатку папки, потім файли
-            items.sort(key=lambda x: (not x.is_dir(), x.name.lower()))
-            
-            # Відобразити елементи
-            folder_count = 0
-            file_count = 0
-            
-            for entry in items:
-                try:
-                    stat = entry.stat()
-                    
-                    if entry.is_dir():
-                        icon = "📁"
-                        size = ""
-                        file_type = "Папка"
-                        folder_count += 1
-                    else:
-                        icon = "📄"
-                        size = self.format_size(stat.st_size)
-                        file_type = "Файл"
-                        file_count += 1
-                    
-                    modified = datetime.datetime.fromtimestamp(stat.st_mtime).strftime("%d.%m.%Y %H:%M")
-                    
-                    # Додати в дерево
-                    self.tree.insert(
-                        '', 'end',
-                        text=f" {icon} {entry.name}",
-                        values=(size, modified, file_type),
-                        tags=(entry.path,)
-                    )
-                except Exception as e:
-                    print(f"Помилка при додаванні {entry.name}: {e}")
-                    continue
-            
-            # Оновити статус
-            self.status_bar.configure(
-                text=f"{file_count} файл(ів), {folder_count} папок"
+    def show_transfer(self, job):
+        """Показати завдання в панелі прогресу фонових операцій"""
+        if self.transfer_panel is None:
+            from transfer_panel import TransferPanel
+            self.transfer_panel = TransferPanel(
+                self, self.model.transfers, format_size,
+                self.on_transfer_finished, before=self.status_bar
             )
-            
+        self.transfer_panel.add_job(job)
+    
+    def load_directory(self, use_cache=False):
+        """Завантажити вміст директорії (сканування у фоновому потоці)"""
+        try:
+            self.model.load(use_cache=use_cache)
         except Exception as e:
             messagebox.showerror("Помилка", f"Не вдалося завантажити директорію:\n{e}")
     
-    def format_size(self, size):
-        """Форматувати розмір файлу"""
-        for unit in ['Б', 'КБ', 'МБ', 'ГБ']:
-            if size < 1024:
-                return f"{size:.1f} {unit}"
-            size /= 1024
-        return f"{size:.1f} ТБ"
+    def on_load(self, path):
+        """Почалось завантаження: скинути те, що стосувалось попереднього списку"""
+        if self.filter_job is not None:
+            self.after_cancel(self.filter_job)
+            self.filter_job = None
+        self.search_entry.delete(0, "end")
+        self.stop_tree_search()
+        self.tree_search = None
+        
+        # Підрахунок розмірів стосувався попередньої директорії
+        if self.dir_sizes is not None:
+            self.dir_sizes.cancel()
+            self.dir_sizes = None
+        
+        # Оновити адресну строку
+        self.path_entry.delete(0, "end")
+        self.path_entry.insert(0, path)
+        
+        self.status_bar.configure(text="Завантаження...")
+        if self.tree_mode:
+            self.lazy_tree.set_root(path)
+    
+    def on_rows(self, entries):
+        """Додано порцію рядків від фонового сканування"""
+        self.status_bar.configure(
+            text=f"Завантаження... {self.model.file_count} файл(ів), {self.model.folder_count} папок"
+        )
+    
+    def on_rows_changed(self):
+        """Рядки оновлено точково (події inotify, операції з файлами)"""
+        if not self.model.search_mode:
+            self.status_bar.configure(
+                text=f"{self.model.file_count} файл(ів), {self.model.folder_count} папок"
+            )
+        self.on_select(None)
+    
+    def on_directory_gone(self):
+        self.status_bar.configure(text="Директорію видалено або переміщено")
+    
+    def format_row(self, entry):
+        """Текст і значення колонок для рядка (лише для видимих рядків)"""
+        if entry.is_dir:
+            icon = "📁"
+            size = self.dir_size_text(entry.path)
+            file_type = "Папка"
+        else:
+            icon = "📄"
+            size = "…" if entry.size is None else format_size(entry.size)
+            file_type = "Файл"
+        
+        # Поки stat не зроблено (StatFiller), замість значень — «…»
+        if entry.mtime is None:
+            modified = "…"
+        else:
+            modified = datetime.datetime.fromtimestamp(entry.mtime).strftime("%d.%m.%Y %H:%M")
+        return f" {icon} {entry.name}", (size, modified, file_type)
+    
+    def dir_size_text(self, path):
+        """Розмір папки з підрахунку (з «…», поки він триває)"""
+        if self.dir_sizes is None:
+            return ""
+        totals = self.dir_sizes.totals.get(path)
+        if totals is None:
+            return ""
+        suffix = "" if self.dir_sizes.done else "…"
+        return format_size(totals.apparent) + suffix
+    
+    def compute_dir_sizes(self):
+        """Порахувати розміри всіх папок поточного списку паралельно
+        
+        Колонка «Розмір» оновлюється проміжними підсумками під час обходу;
+        незмінені піддиректорії беруться з кешу без повторного scandir.
+        """
+        if self.dir_sizes is not None:
+            self.dir_sizes.cancel()
+        from disk_usage import DiskUsageScan, UsageCache
+        if self.usage_cache is None:
+            self.usage_cache = UsageCache()
+        roots = [row.path for row in self.view.rows if row.is_dir]
+        self.dir_sizes = DiskUsageScan(roots, self.usage_cache).start()
+        self.status_bar.configure(text=f"Підрахунок розміру {len(roots)} папок...")
+        self.poll_dir_sizes(self.dir_sizes)
+    
+    def poll_dir_sizes(self, scan):
+        """Перемалювати видимі рядки з новими підсумками"""
+        if scan is not self.dir_sizes:
+            return
+        self.view.refresh()
+        if self.tree_mode:
+            self.lazy_tree.refresh_rows()
+        if not scan.done:
+            self.after(200, self.poll_dir_sizes, scan)
+            return
+        apparent = sum(t.apparent for t in scan.totals.values())
+        disk = sum(t.disk for t in scan.totals.values())
+        self.status_bar.configure(
+            text=(f"Папки: {format_size(apparent)} (на диску {format_size(disk)}), "
+                  f"{scan.elapsed:.2f} с")
+        )
+    
+    def on_scan_done(self, count):
+        """Сканування завершено"""
+        model = self.model
+        self.status_bar.configure(
+            text=f"{model.file_count} файл(ів), {model.folder_count} папок"
+                 f"  |  {model.listing_cache.stats_text()}  |  {model.prefetcher.stats_text()}"
+        )
+    
+    def sort_column(self, col):
+        """Клік по заголовку: сортувати за колонкою, повторний — змінити напрямок"""
+        self.model.sort_column(col)
+    
+    def on_sorted(self, col, reverse):
+        """Показати стрілку напрямку на заголовку відсортованої колонки"""
+        for c, title in self.column_titles.items():
+            arrow = (" ▼" if reverse else " ▲") if c == col else ""
+            self.tree.heading(c, text=title + arrow)
+    
+    def on_scan_error(self, error):
+        """Помилка сканування директорії"""
+        self.status_bar.configure(text="Готово")
+        if isinstance(error, PermissionError):
+            messagebox.showerror("Помилка", "Немає доступу до цієї директорії")
+        else:
+            messagebox.showerror("Помилка", f"Не вдалося завантажити директорію:\n{error}")
     
     def on_double_click(self, event):
         """Обробник подвійного кліку"""
-        selection = self.tree.selection()
+        selection = self.view.selected_rows()
         if selection:
-            item = selection[0]
-            tags = self.tree.item(item, 'tags')
-            if tags:
-                path = tags[0]
-                self.open_item(path)
+            self.open_item(selection[0].path)
+    
+    def schedule_filter(self, event=None):
+        """Відкласти фільтрацію до паузи у введенні"""
+        if self.filter_job is not None:
+            self.after_cancel(self.filter_job)
+        self.filter_job = self.after(FILTER_DELAY_MS, self.apply_filter)
+    
+    def apply_filter(self):
+        """Звузити поточний список до рядків, назва яких містить введене
+        
+        Доповнений запит перевіряє лише вже відібрані рядки, а не весь
+        список; у дереві перемальовуються лише змінені рядки.
+        """
+        self.filter_job = None
+        query = self.search_entry.get().strip()
+        if not self.model.set_filter(query):
+            return
+        if query:
+            self.status_bar.configure(
+                text=f"Фільтр «{query}»: {len(self.view)} з {len(self.view.index)}"
+            )
+        else:
+            self.status_bar.configure(text=f"Елементів: {len(self.view)}")
+        self.on_select(None)
+    
+    def clear_filter(self):
+        """Зняти фільтр перед заміною списку"""
+        if self.filter_job is not None:
+            self.after_cancel(self.filter_job)
+            self.filter_job = None
+        self.model.clear_filter()
+    
+    def search_index(self):
+        """Шукати введений текст в індексі імен файлів"""
+        query = self.search_entry.get().strip()
+        if not query:
+            self.load_directory(use_cache=True)
+            return
+        if self.file_index is None:
+            messagebox.showerror("Помилка", "Індекс пошуку недоступний")
+            return
+        self.model.loader.cancel()
+        self.stop_tree_search()
+        self.tree_search = None
+        self.clear_filter()
+        self.set_tree_mode(False)
+        self.model.filter_query = query
+        self.status_bar.configure(text=f"Пошук «{query}»...")
+        from file_index import search_async
+        search_async(self, self.file_index, query,
+                     lambda entries, error: self.show_search_results(query, entries, error))
+    
+    def show_search_results(self, query, entries, error):
+        """Показати результати пошуку замість вмісту директорії"""
+        if error is not None:
+            messagebox.showerror("Помилка", f"Пошук не вдався:\n{error}")
+            return
+        self.model.enter_search()
+        # Набраний запит не має ще й фільтрувати результати
+        self.model.filter_query = query
+        entries.sort(key=entry_sort_key)
+        self.view.set_rows(entries)
+        self.status_bar.configure(
+            text=f"Знайдено «{query}»: {len(entries)}  |  {self.file_index.stats_text()}"
+        )
+    
+    def search_here(self):
+        """Відкрити параметри рекурсивного пошуку в поточній директорії"""
+        from search_dialog import SearchHereDialog
+        SearchHereDialog(self, self.model.current_path, self.start_tree_search,
+                         pattern=self.search_entry.get().strip())
+    
+    def start_tree_search(self, criteria):
+        """Почати пошук; результати додаються в список по мірі знаходження"""
+        self.stop_tree_search()
+        self.clear_filter()
+        self.set_tree_mode(False)
+        # Порядок знаходження: рядки лише дописуються в кінець
+        self.model.enter_search(sort_key=None)
+        self.view.set_rows([])
+        from tree_search import RecursiveSearch
+        self.tree_search = RecursiveSearch(self.model.current_path, criteria).start()
+        self.btn_stop_search.pack(anchor="e", padx=10, before=self.status_bar)
+        self.poll_tree_search(self.tree_search)
+    
+    def poll_tree_search(self, search):
+        """Перенести нові результати в список і оновити лічильники"""
+        if search is not self.tree_search:
+            return
+        rows = search.take()
+        if rows:
+            self.view.append_rows(rows)
+        text = (f"знайдено {search.found}, {search.rate():.0f} рез./с, "
+                f"переглянуто папок: {search.dirs_scanned}")
+        if not search.done:
+            self.status_bar.configure(text=f"Пошук... {text}")
+            self.after(100, self.poll_tree_search, search)
+            return
+        self.btn_stop_search.pack_forget()
+        state = "зупинено" if search.cancelled.is_set() else f"завершено за {search.elapsed:.2f} с"
+        self.status_bar.configure(text=f"Пошук {state}: {text}")
+    
+    def stop_tree_search(self):
+        """Скасувати рекурсивний пошук (знайдене лишається у списку)"""
+        if self.tree_search is not None:
+            self.tree_search.cancel()
+        self.btn_stop_search.pack_forget()
+    
+    def search_in_files(self):
+        """Відкрити пошук тексту у вмісті файлів поточної директорії"""
+        # Вікна пошуку у файлах і дублікатів (з пулами процесів) імпортуються лише при відкритті
+        from content_search_window import ContentSearchWindow
+        ContentSearchWindow(self, self.model.current_path, self.open_item, format_size)
+    
+    def find_duplicates(self):
+        """Відкрити пошук однакових файлів у поточній директорії"""
+        from duplicates_window import DuplicatesWindow
+        DuplicatesWindow(self, self.model.current_path, self.open_item, format_size)
     
     def on_right_click(self, event):
         """Обробник правого кліку"""
-        selection = self.tree.selection()
+        selection = self.view.selected_rows()
         if selection:
-            item = selection[0]
-            tags = self.tree.item(item, 'tags')
-            if tags:
-                path = tags[0]
-                messagebox.showinfo("Інфо", f"Файл:\n{os.path.basename(path)}")
+            path = selection[0].path
+            messagebox.showinfo("Інфо", f"Файл:\n{os.path.basename(path)}")
     
     def on_select(self, event):
-        """Обробник вибору елементів"""
-        self.selected_items = []
-        for item in self.tree.selection():
-            tags = self.tree.item(item, 'tags')
-            if tags:
-                self.selected_items.append(tags[0])
+        """Обробник вибору елементів (у списку чи в дереві)"""
+        if self.tree_mode:
+            paths = self.lazy_tree.selected_paths()
+            entry = self.lazy_tree.entries.get(paths[0]) if paths else None
+        else:
+            rows = self.view.selected_rows()
+            paths = [row.path for row in rows]
+            entry = rows[0] if rows else None
+        self.model.select(paths, prefetch=not self.tree_mode)
+        if self.preview_visible and entry is not self.preview.current:
+            self.preview.show(entry)
+    
+    def on_rows_visible(self, rows):
+        """Рядки на екрані: їхні метадані і мініатюри готуються першими"""
+        self.model.stat_filler.prioritize(rows)
+        if self.preview_visible:
+            self.preview.prioritize(rows)
+    
+    def toggle_preview(self):
+        """Показати або сховати панель перегляду"""
+        self.preview_visible = not self.preview_visible
+        if self.preview_visible:
+            shown = self.tree_frame if self.tree_mode else self.list_frame
+            self.preview.pack(side="right", fill="y", padx=(10, 0), before=shown)
+            self.on_select(None)
+        else:
+            self.preview.pack_forget()
+            self.preview.show(None)
+    
+    def toggle_tree_mode(self):
+        """Перемкнути плаский список і дерево папок"""
+        self.set_tree_mode(not self.tree_mode)
+    
+    def set_tree_mode(self, enabled):
+        """Показати дерево (вміст читається при розгортанні) або плаский список"""
+        if enabled == self.tree_mode:
+            return
+        self.tree_mode = enabled
+        if enabled:
+            self.list_frame.pack_forget()
+            self.tree_frame.pack(fill="both", expand=True)
+            if self.lazy_tree is None:
+                from lazy_tree import LazyTree
+                self.lazy_tree = LazyTree(
+                    self.hier_tree, self.format_row,
+                    cache=self.model.listing_cache, on_error=self.on_tree_error
+                )
+                self.hier_tree.bind('<<TreeviewSelect>>', self.on_select, add='+')
+                self.hier_tree.bind('<Double-Button-1>', self.on_tree_double_click, add='+')
+            self.lazy_tree.set_root(self.model.current_path)
+        else:
+            self.lazy_tree.stop()
+            self.tree_frame.pack_forget()
+            self.list_frame.pack(fill="both", expand=True)
+        self.on_select(None)
+    
+    def on_tree_double_click(self, event):
+        """Файл у дереві відкривається, папка — розгортається"""
+        entry = self.lazy_tree.entries.get(self.hier_tree.identify_row(event.y))
+        if entry is not None and not entry.is_dir:
+            self.open_item(entry.path)
+    
+    def on_tree_error(self, path, error):
+        """Папку в дереві не вдалося прочитати"""
+        self.status_bar.configure(text=f"Не вдалося прочитати {path}: {error.strerror or error}")
     
     def open_item(self, path):
-        """Відкрити файл або папку"""
-        if os.path.isdir(path):
-            self.navigate_to(path)
+        """Відкрити файл або папку (архів відкривається як папка)"""
+        if archives.is_dir(path):
+            self.model.navigate_to(path)
+        elif archives.is_member(path):
+            # Файл з архіву спершу розпаковується в кеш — лише він один
+            self.status_bar.configure(text=f"Розпакування {os.path.basename(path)}...")
+            archives.extract_async(self, path, self.on_member_extracted)
         else:
+            # subprocess потрібен лише тут, тож не імпортується при запуску
+            import subprocess
             try:
                 subprocess.Popen(['xdg-open', path])
             except:
                 messagebox.showinfo("Інфо", f"Файл: {os.path.basename(path)}")
     
-    def navigate_to(self, path):
-        """Перейти до директорії"""
-        if os.path.isdir(path):
-            self.current_path = path
-            # Додати до історії
-            self.history = self.history[:self.history_index + 1]
-            self.history.append(path)
-            self.history_index = len(self.history) - 1
-            self.load_directory()
+    
+    def on_member_extracted(self, path, error):
+        """Файл з архіву розпаковано — відкрити копію"""
+        if error is not None:
+            messagebox.showerror("Помилка", f"Не вдалося розпакувати:\n{error}")
+            return
+        self.status_bar.configure(text="Готово")
+        self.open_item(path)
     
     def navigate_to_path(self):
         """Перейти до шляху з адресної строки"""
-        path = self.path_entry.get()
-        if os.path.isdir(path):
-            self.navigate_to(path)
-        else:
+        if not self.model.navigate_to(self.path_entry.get()):
             messagebox.showerror("Помилка", "Невірний шлях")
     
-    def go_back(self):
-        """Назад в історії"""
-        if self.history_index > 0:
-            self.history_index -= 1
-            self.current_path = self.history[self.history_index]
-            self.load_directory()
-    
-    def go_forward(self):
-        """Вперед в історії"""
-        if self.history_index < len(self.history) - 1:
-            self.history_index += 1
-            self.current_path = self.history[self.history_index]
-            self.load_directory()
-    
-    def go_up(self):
-        """Вгору на один рівень"""
-        parent = str(Path(self.current_path).parent)
-        if parent != self.current_path:
-            self.navigate_to(parent)
-    
     def create_folder(self):
         """Створити нову папку"""
         name = simpledialog.askstring("Нова папка", "Введіть назву папки:")
         if name:
             try:
-                new_path = os.path.join(self.current_path, name)
-                os.makedirs(new_path, exist_ok=True)
-                self.load_directory()
+                self.model.create_folder(name)
                 self.status_bar.configure(text=f"Створено папку: {name}")
             except Exception as e:
                 messagebox.showerror("Помилка", f"Не вдалося створити папку:\n{e}")
@@ -334,92 +694,106 @@ class FileExplorer(tk.Tk):
         name = simpledialog.askstring("Новий файл", "Введіть назву файлу:")
         if name:
             try:
-                new_path = os.path.join(self.current_path, name)
-                Path(new_path).touch()
-                self.load_directory()
+                self.model.create_file(name)
                 self.status_bar.configure(text=f"Створено файл: {name}")
             except Exception as e:
                 messagebox.showerror("Помилка", f"Не вдалося створити файл:\n{e}")
     
     def copy_items(self):
         """Копіювати вибрані елементи"""
-        if not self.selected_items:
+        if not self.model.selected_items:
             messagebox.showinfo("Інфо", "Нічого не вибрано")
             return
-        
-        self.clipboard_items = self.selected_items.copy()
-        self.clipboard_operation = 'copy'
-        self.status_bar.configure(text=f"Скопійовано {len(self.clipboard_items)} елементів")
+        self.model.copy(self.model.selected_items)
+        self.status_bar.configure(text=f"Скопійовано {len(self.model.clipboard_items)} елементів")
     
     def cut_items(self):
         """Вирізати вибрані елементи"""
-        if not self.selected_items:
+        if not self.model.selected_items:
             messagebox.showinfo("Інфо", "Нічого не вибрано")
             return
-        
-        self.clipboard_items = self.selected_items.copy()
-        self.clipboard_operation = 'cut'
-        self.status_bar.configure(text=f"Вирізано {len(self.clipboard_items)} елементів")
+        self.model.cut(self.model.selected_items)
+        self.status_bar.configure(text=f"Вирізано {len(self.model.clipboard_items)} елементів")
     
     def paste_items(self):
-        """Вставити елементи"""
-        if not self.clipboard_items:
+        """Вставити елементи: спершу план і підтвердження, потім фонове копіювання"""
+        if not self.model.clipboard_items:
             messagebox.showinfo("Інфо", "Буфер обміну порожній")
             return
         
-        try:
-            for item_path in self.clipboard_items:
-                if not os.path.exists(item_path):
-                    continue
-                    
-                name = os.path.basename(item_path)
-                dest_path = os.path.join(self.current_path, name)
-                
-                # Перевірити чи існує
-                if os.path.exists(dest_path):
-                    dest_path = self.get_unique_name(dest_path)
-                
-                if self.clipboard_operation == 'copy':
-                    if os.path.isdir(item_path):
-                        shutil.copytree(item_path, dest_path)
-                    else:
-                        shutil.copy2(item_path, dest_path)
-                elif self.clipboard_operation == 'cut':
-                    shutil.move(item_path, dest_path)
-            
-            if self.clipboard_operation == 'cut':
-                self.clipboard_items = []
-            
-            self.load_directory()
-            self.status_bar.configure(text="Вставлено успішно")
-        except Exception as e:
-            messagebox.showerror("Помилка", f"Не вдалося вставити:\n{e}")
+        self.status_bar.configure(text="Підготовка вставлення...")
+        self.model.plan_paste(self.confirm_paste)
+    
+    def confirm_paste(self, plan):
+        """Показати план вставлення (обсяг, місце, конфлікти) для підтвердження"""
+        self.status_bar.configure(text="Готово")
+        if not plan.walks and not plan.renames:
+            if plan.errors:
+                details = "\n".join(f"{path}: {error}" for path, error in plan.errors[:10])
+                messagebox.showerror("Помилка", f"Не вдалося вставити:\n{details}")
+            return
+        from plan_dialog import PlanDialog
+        PlanDialog(self, plan, format_size, self.start_transfer)
+    
+    
+    def start_transfer(self, plan, pairs):
+        """Поставити підтверджений план у чергу перенесення"""
+        job = self.model.start_transfer(plan, pairs)
+        self.show_transfer(job)
+        self.status_bar.configure(text=f"Вставлення {len(pairs)} елементів...")
+    
+    def on_transfer_finished(self, job):
+        """Завдання вставлення завершилось (викликається з головного потоку)"""
+        if job.operation == 'delete':
+            self.on_delete_finished(job)
+            return
+        self.model.job_finished(job)
+        if job.state == CANCELLED:
+            self.status_bar.configure(text="Вставлення скасовано")
+        elif job.errors:
+            details = "\n".join(f"{path}: {error}" for path, error in job.errors[:10])
+            if len(job.errors) > 10:
+                details += f"\n... ще {len(job.errors) - 10}"
+            messagebox.showerror("Помилка", f"Не вдалося вставити:\n{details}")
+        else:
+            # Які примітиви ядра спрацювали (rename, reflink, copy_file_range...)
+            self.status_bar.configure(text=f"Вставлено успішно ({job.method_summary()})")
+    
     
     def delete_items(self):
         """Видалити вибрані елементи"""
-        if not self.selected_items:
+        if not self.model.selected_items:
             messagebox.showinfo("Інфо", "Нічого не вибрано")
             return
         
-        if messagebox.askyesno("Видалення", f"Видалити {len(self.selected_items)} елементів?"):
-            try:
-                for item_path in self.selected_items:
-                    if os.path.isdir(item_path):
-                        shutil.rmtree(item_path)
-                    else:
-                        os.remove(item_path)
-                self.load_directory()
-                self.status_bar.configure(text="Видалено успішно")
-            except Exception as e:
-                messagebox.showerror("Помилка", f"Не вдалося видалити:\n{e}")
+        if messagebox.askyesno("Видалення", f"Видалити {len(self.model.selected_items)} елементів?"):
+            # Елементи одразу перейменовуються у відстійник і зникають зі
+            # списку, а сам вміст видаляється у фоні
+            job = self.model.delete(self.model.selected_items)
+            self.show_transfer(job)
+            self.status_bar.configure(text=f"Видалення {len(job.pairs)} елементів...")
+    
+    def on_delete_finished(self, job):
+        """Фонове видалення завершилось (викликається з головного потоку)"""
+        self.model.job_finished(job)
+        if job.state == CANCELLED:
+            self.status_bar.configure(text="Видалення призупинено — буде продовжено при наступному запуску")
+        elif job.errors:
+            details = "\n".join(f"{path}: {error}" for path, error in job.errors[:10])
+            if len(job.errors) > 10:
+                details += f"\n... ще {len(job.errors) - 10}"
+            messagebox.showerror("Помилка", f"Не вдалося видалити:\n{details}")
+        else:
+            self.status_bar.configure(text=f"Видалено успішно ({job.files_done} елементів)")
+    
     
     def rename_item(self):
         """Перейменувати елемент"""
-        if not self.selected_items:
+        if not self.model.selected_items:
             messagebox.showinfo("Інфо", "Нічого не вибрано")
             return
         
-        old_path = self.selected_items[0]
+        old_path = self.model.selected_items[0]
         old_name = os.path.basename(old_path)
         new_name = simpledialog.askstring("Перейменувати", 
                                          f"Нова назва для '{old_name}':",
@@ -427,25 +801,16 @@ class FileExplorer(tk.Tk):
         
         if new_name and new_name != old_name:
             try:
-                new_path = os.path.join(os.path.dirname(old_path), new_name)
-                os.rename(old_path, new_path)
-                self.load_directory()
+                self.model.rename(old_path, new_name)
                 self.status_bar.configure(text=f"Перейменовано на: {new_name}")
             except Exception as e:
                 messagebox.showerror("Помилка", f"Не вдалося перейменувати:\n{e}")
     
-    def get_unique_name(self, path):
-        """Отримати унікальне ім'я для файлу/папки"""
-        base, ext = os.path.splitext(path)
-        counter = 1
-        new_path = f"{base} ({counter}){ext}"
-        while os.path.exists(new_path):
-            counter += 1
-            new_path = f"{base} ({counter}){ext}"
-        return new_path
-
 
 if __name__ == "__main__":
+    import multiprocessing
+    # Пул процесів пошуку у файлах запускає цей файл заново (spawn)
+    multiprocessing.freeze_support()
     app = FileExplorer()
     app.mainloop()
 
@@ -0,0 +1,367 @@
+"""Постійний індекс імен файлів у SQLite для миттєвого пошуку.
+
+Фоновий індексатор обходить задані корені і зберігає (шлях, назва,
+розмір, mtime, inode) у базі в каталозі даних програми. Назви
+індексуються FTS5 з токенізатором trigram, тож підрядок і glob шукаються
+за індексом, а не перебором мільйонів рядків (якщо SQLite зібрано без
+trigram — перебором через LIKE). FTS оновлюється пакетно на директорію,
+а не тригерами на кожен рядок — так побудова в рази швидша. Назва для
+шляху не змінюється, тож оновлення розміру чи mtime FTS не чіпають.
+
+Повторні обходи інкрементальні: директорія, чий mtime не змінився, не
+читається заново — її піддиректорії беруться з бази. Зміна розміру файлу
+без зміни вмісту директорії її mtime не змінює і буде помічена лише після
+зміни директорії.
+"""
+import os
+import queue
+import sqlite3
+import stat
+import threading
+import time
+
+import app_dirs
+from dir_scanner import ScanEntry
+
+DB_NAME = 'index.sqlite3'
+# Як часто повторювати інкрементальний обхід (с)
+REFRESH_INTERVAL = 600
+# Скільки директорій записувати однією транзакцією
+COMMIT_EVERY = 200
+SEARCH_LIMIT = 2000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    inode INTEGER NOT NULL,
+    is_dir INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files(dir);
+CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+"""
+
+# Тригери синхронізують FTS у тій самій інструкції, що змінює files:
+# окремий крок «дописати нові id» міг розійтися з паралельним записом
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(
+    name, content='files', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS files_names_insert AFTER INSERT ON files BEGIN
+    INSERT INTO names(rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS files_names_delete AFTER DELETE ON files BEGIN
+    INSERT INTO names(names, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+CREATE TRIGGER IF NOT EXISTS files_names_update AFTER UPDATE OF name ON files BEGIN
+    INSERT INTO names(names, rowid, name) VALUES ('delete', old.id, old.name);
+    INSERT INTO names(rowid, name) VALUES (new.id, new.name);
+END;
+"""
+
+GLOB_CHARS = set('*?[')
+
+
+def _subtree_bounds(path):
+    """Межі шляхів під path для запиту діапазоном за індексом path"""
+    prefix = path.rstrip(os.sep) + os.sep
+    # Символ після '/' у порядку сортування — '0'
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+class UpdateStats:
+    """Підсумки одного обходу"""
+
+    def __init__(self):
+        self.dirs_scanned = 0
+        self.dirs_skipped = 0
+        self.changed = 0
+        self.removed = 0
+        self.seconds = 0.0
+
+
+class FileIndex:
+    """Індекс імен у SQLite: інкрементальне оновлення і пошук
+
+    Кожен потік відкриває власне з'єднання; база в режимі WAL, тож пошук
+    не чекає на запис індексатора.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(app_dirs.data_dir(), DB_NAME)
+        self.updating = threading.Event()
+        self.last_update = None
+        self.last_query_ms = None
+        self.queries = 0
+        self.query_ms_total = 0.0
+        conn = self.connect()
+        try:
+            conn.executescript(SCHEMA)
+            try:
+                conn.executescript(FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                # SQLite без FTS5 або без токенізатора trigram
+                self.fts = False
+            if not self.roots(conn):
+                conn.execute("INSERT INTO roots(path) VALUES (?)", (os.path.expanduser('~'),))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def roots(self, conn=None):
+        own = conn is None
+        conn = conn or self.connect()
+        try:
+            return [row[0] for row in conn.execute("SELECT path FROM roots ORDER BY path")]
+        finally:
+            if own:
+                conn.close()
+
+    def add_root(self, path):
+        conn = self.connect()
+        try:
+            conn.execute("INSERT OR IGNORE INTO roots(path) VALUES (?)", (os.path.abspath(path),))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def meta(self, conn, key, default=None):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    # ---- Оновлення ----
+
+    def update(self, cancelled=None):
+        """Інкрементально обійти всі корені; повертає UpdateStats"""
+        stats = UpdateStats()
+        started = time.monotonic()
+        conn = self.connect()
+        try:
+            for root in self.roots(conn):
+                self._update_root(conn, root, stats, cancelled)
+            stats.seconds = time.monotonic() - started
+            count = conn.execute("SELECT count(*) FROM files").fetchone()[0]
+            conn.executemany("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", [
+                ('build_seconds', stats.seconds),
+                ('built_at', time.time()),
+                ('files', count),
+                ('dirs_scanned', stats.dirs_scanned),
+                ('dirs_skipped', stats.dirs_skipped),
+            ])
+            conn.commit()
+        finally:
+            conn.close()
+        self.last_update = stats
+        return stats
+
+    def _update_root(self, conn, root, stats, cancelled):
+        try:
+            root_dev = os.stat(root).st_dev
+        except OSError:
+            return
+        stack = [root]
+        pending = 0
+        while stack:
+            if cancelled is not None and cancelled.is_set():
+                break
+            path = stack.pop()
+            try:
+                st = os.lstat(path)
+            except OSError:
+                continue
+            if not stat.S_ISDIR(st.st_mode) or st.st_dev != root_dev:
+                continue
+            for name in self._update_dir(conn, path, st.st_mtime_ns, stats):
+                stack.append(os.path.join(path, name))
+            pending += 1
+            if pending >= COMMIT_EVERY:
+                conn.commit()
+                pending = 0
+        conn.commit()
+
+    def _update_dir(self, conn, path, mtime_ns, stats):
+        """Оновити рядки однієї директорії; повертає назви піддиректорій"""
+        if not conn.in_transaction:
+            # Читання «що вже є» і запис — під одним блокуванням на запис,
+            # інакше паралельний оновлювач вставить ті самі шляхи між ними
+            conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT mtime_ns FROM dirs WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[0] == mtime_ns:
+            stats.dirs_skipped += 1
+            return [r[0] for r in conn.execute(
+                "SELECT name FROM files WHERE dir = ? AND is_dir = 1", (path,))]
+
+        stats.dirs_scanned += 1
+        existing = {r[0]: r[1:] for r in conn.execute(
+            "SELECT name, size, mtime, inode, is_dir FROM files WHERE dir = ?", (path,))}
+        subdirs = []
+        added = []
+        updated = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    is_dir = int(stat.S_ISDIR(st.st_mode))
+                    if is_dir:
+                        subdirs.append(entry.name)
+                    values = (st.st_size, st.st_mtime, st.st_ino, is_dir)
+                    old = existing.pop(entry.name, None)
+                    if old is None:
+                        added.append((entry.path, path, entry.name) + values)
+                    elif old != values:
+                        updated.append(values + (entry.path,))
+        except OSError:
+            return []
+
+        for name, values in existing.items():
+            gone = os.path.join(path, name)
+            self._delete_rows(conn, "path = ?", (gone,))
+            stats.removed += 1
+            if values[3]:
+                low, high = _subtree_bounds(gone)
+                stats.removed += self._delete_rows(conn, "path >= ? AND path < ?", (low, high))
+                conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)",
+                             (gone, low, high))
+        if updated:
+            conn.executemany(
+                "UPDATE files SET size = ?, mtime = ?, inode = ?, is_dir = ? WHERE path = ?",
+                updated
+            )
+        if added:
+            conn.executemany(
+                "INSERT INTO files(path, dir, name, size, mtime, inode, is_dir) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                added
+            )
+        stats.changed += len(added) + len(updated)
+        conn.execute("INSERT OR REPLACE INTO dirs(path, mtime_ns) VALUES (?, ?)", (path, mtime_ns))
+        return subdirs
+
+    def _delete_rows(self, conn, where, params):
+        """Видалити рядки files (записи FTS — тригером); повертає кількість"""
+        return conn.execute(f"DELETE FROM files WHERE {where}", params).rowcount
+
+    # ---- Пошук ----
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        """Знайти назви за підрядком (без урахування регістру) або glob
+
+        Повертає список ScanEntry; name — повний шлях, щоб у результатах
+        було видно, де лежить файл.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        started = time.perf_counter()
+        conn = self.connect()
+        try:
+            columns = "f.path, f.is_dir, f.size, f.mtime"
+            if GLOB_CHARS & set(query):
+                if self.fts:
+                    sql = (f"SELECT {columns} FROM names JOIN files f ON f.id = names.rowid "
+                           "WHERE names.name GLOB ?")
+                else:
+                    sql = f"SELECT {columns} FROM files f WHERE f.name GLOB ?"
+                params = (query,)
+            elif self.fts and len(query) >= 3:
+                sql = (f"SELECT {columns} FROM names JOIN files f ON f.id = names.rowid "
+                       "WHERE names MATCH ?")
+                params = ('"' + query.replace('"', '""') + '"',)
+            else:
+                escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                sql = f"SELECT {columns} FROM files f WHERE f.name LIKE ? ESCAPE '\\'"
+                params = (f"%{escaped}%",)
+            rows = conn.execute(sql + " LIMIT ?", params + (limit,)).fetchall()
+        finally:
+            conn.close()
+        elapsed = (time.perf_counter() - started) * 1000
+        self.last_query_ms = elapsed
+        self.queries += 1
+        self.query_ms_total += elapsed
+        return [ScanEntry(path, path, bool(is_dir), size, mtime)
+                for path, is_dir, size, mtime in rows]
+
+    def stats_text(self):
+        """Рядок для статус-бару: розмір індексу, час побудови і запиту"""
+        conn = self.connect()
+        try:
+            files = self.meta(conn, 'files')
+            seconds = self.meta(conn, 'build_seconds')
+        finally:
+            conn.close()
+        parts = []
+        if files is None:
+            parts.append("індекс ще будується" if self.updating.is_set() else "індекс порожній")
+        else:
+            parts.append(f"індекс: {files} записів, обхід {seconds:.1f} с")
+        if self.last_query_ms is not None:
+            average = self.query_ms_total / self.queries
+            parts.append(f"запит {self.last_query_ms:.1f} мс (сер. {average:.1f} мс)")
+        return ", ".join(parts)
+
+
+class IndexUpdater(threading.Thread):
+    """Фоновий потік: оновлює індекс одразу і далі кожні interval секунд"""
+
+    def __init__(self, index, interval=REFRESH_INTERVAL):
+        super().__init__(daemon=True)
+        self.index = index
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            # Нижчий пріоритет лише для цього потоку (Linux)
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass
+        while not self.stopped.is_set():
+            self.index.updating.set()
+            try:
+                self.index.update(self.stopped)
+            except sqlite3.Error:
+                pass
+            finally:
+                self.index.updating.clear()
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def search_async(widget, index, query, on_results, interval_ms=20):
+    """Виконати пошук у фоновому потоці і передати результат в on_results через after()"""
+    result = queue.Queue()
+
+    def worker():
+        try:
+            result.put((index.search(query), None))
+        except sqlite3.Error as e:
+            result.put(([], e))
+
+    def poll():
+        try:
+            entries, error = result.get_nowait()
+        except queue.Empty:
+            widget.after(interval_ms, poll)
+            return
+        on_results(entries, error)
+
+    threading.Thread(target=worker, daemon=True).start()
+    widget.after(interval_ms, poll)
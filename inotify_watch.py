@@ -0,0 +1,176 @@
+"""Стеження за поточною директорією через Linux inotify (ctypes, без залежностей).
+
+Події читаються у фоновому потоці й зводяться до словника
+«назва -> остання зміна», який інтерфейс періодично забирає через drain()
+і застосовує як точкові оновлення рядків, без повторного сканування.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0o2000000)
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+EVENT_HEADER = struct.Struct('iIII')
+
+# Результат зведення подій для одного імені
+CHANGED = 'changed'
+REMOVED = 'removed'
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        _libc.inotify_init1.argtypes = [ctypes.c_int]
+        _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        _libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    return _libc
+
+
+def available():
+    """Чи підтримує система inotify"""
+    try:
+        return hasattr(_load_libc(), 'inotify_init1')
+    except OSError:
+        return False
+
+
+class DirectoryWatcher:
+    """Стежить за однією директорією і зводить події до пакетів змін"""
+
+    def __init__(self):
+        libc = _load_libc()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.libc = libc
+        self.fd = fd
+        self.wd = None
+        self.path = None
+        self.lock = threading.Lock()
+        self.changes = {}
+        self.overflow = False
+        self.gone = False
+        self.wake_r, self.wake_w = os.pipe()
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def watch(self, path):
+        """Перемкнути стеження на іншу директорію"""
+        with self.lock:
+            if self.wd is not None:
+                self.libc.inotify_rm_watch(self.fd, self.wd)
+                self.wd = None
+            self.path = path
+            self.changes = {}
+            self.overflow = False
+            self.gone = False
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, os.strerror(err), path)
+            self.wd = wd
+
+    def unwatch(self):
+        """Припинити стеження"""
+        with self.lock:
+            if self.wd is not None:
+                self.libc.inotify_rm_watch(self.fd, self.wd)
+            self.wd = None
+            self.path = None
+            self.changes = {}
+
+    @property
+    def pending(self):
+        return bool(self.changes) or self.overflow or self.gone
+
+    def drain(self):
+        """Забрати зведені зміни: (словник назва -> CHANGED/REMOVED, overflow, gone)"""
+        self._read()
+        with self.lock:
+            changes, self.changes = self.changes, {}
+            overflow, self.overflow = self.overflow, False
+            gone, self.gone = self.gone, False
+        return changes, overflow, gone
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        os.write(self.wake_w, b'x')
+        self.thread.join(timeout=1)
+        for fd in (self.fd, self.wake_r, self.wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _run(self):
+        while not self.closed:
+            try:
+                ready, _, _ = select.select([self.fd, self.wake_r], [], [])
+            except (OSError, ValueError):
+                return
+            if self.closed:
+                return
+            if self.fd in ready:
+                self._read()
+
+    def _read(self):
+        """Прочитати всі доступні події (неблокуюче) і звести їх"""
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            except OSError:
+                return
+            if not data:
+                return
+            self._parse(data)
+
+    def _parse(self, data):
+        with self.lock:
+            pos = 0
+            while pos + EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, pos)
+                pos += EVENT_HEADER.size
+                name = os.fsdecode(data[pos:pos + length].rstrip(b'\0'))
+                pos += length
+                if mask & IN_Q_OVERFLOW:
+                    self.overflow = True
+                    continue
+                if wd != self.wd:
+                    continue
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    self.gone = True
+                elif name:
+                    # Остання подія для імені визначає підсумок пакета
+                    if mask & (IN_DELETE | IN_MOVED_FROM):
+                        self.changes[name] = REMOVED
+                    else:
+                        self.changes[name] = CHANGED
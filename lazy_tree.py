@@ -0,0 +1,259 @@
+"""Деревоподібний режим списку з лінивим завантаженням вкладених папок.
+
+Кожна ще не прочитана папка отримує фіктивний дочірній елемент — тоді
+Treeview малює стрілку розгортання, а справжній вміст читається лише
+при відкритті. Читання йде у фонових потоках; наведення курсора на
+папку чи її вибір запускає попереднє читання, тож розгортання зазвичай
+бере вже готовий список з кешу. Розгорнуті папки періодично звіряються
+за відбитком (dir_stamp) і оновлюються точково: додаються, видаляються
+чи переписуються лише змінені елементи.
+"""
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from dir_scanner import fill_stat, list_directory
+from listing_cache import FRESH, dir_stamp
+
+WORKERS = 4
+POLL_INTERVAL_MS = 50
+# Як часто звіряти розгорнуті папки з диском
+CHECK_INTERVAL_MS = 1000
+# Суфікс ідентифікатора фіктивного дочірнього елемента
+DUMMY = '\0dummy'
+
+
+def read_children(path):
+    """Прочитати вміст папки: (відбиток, ScanEntry за назвою з метаданими)"""
+    stamp = dir_stamp(path)
+    children = list_directory(path)
+    for item in children:
+        if item.size is None:
+            fill_stat(item)
+    return stamp, children
+
+
+class LazyTree:
+    """Ієрархічний перегляд папки root на звичайному ttk.Treeview
+
+    Ідентифікатор елемента — повний шлях, format_row(entry) — той самий,
+    що й для плаского списку. Прочитані списки кладуться в cache
+    (ListingCache), тож ними користується і плаский режим.
+    """
+
+    def __init__(self, tree, format_row, cache=None, on_error=None, workers=WORKERS):
+        self.tree = tree
+        self.format_row = format_row
+        self.cache = cache
+        self.on_error = on_error
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tree')
+        self.results = queue.Queue()
+        self.generation = 0
+        self.root = None
+        # Шляхи, що читаються зараз, і ті, які треба показати після читання
+        self.inflight = set()
+        self.want_open = set()
+        # Показані папки: шлях -> відбиток, з яким прочитано вміст
+        self.loaded = {}
+        # Показані елементи: ідентифікатор -> ScanEntry і (text, values)
+        self.entries = {}
+        self.content = {}
+        self.hover = None
+        self.poll_id = None
+        self.check_id = None
+
+        tree.bind('<<TreeviewOpen>>', self._on_open, add='+')
+        tree.bind('<<TreeviewSelect>>', self._on_select, add='+')
+        tree.bind('<Motion>', self._on_motion, add='+')
+
+    # ---- Керування ----
+
+    def set_root(self, path):
+        """Показати дерево папки path (попередні читання відкидаються)"""
+        self.generation += 1
+        self.root = path
+        self.inflight = set()
+        self.want_open = set()
+        self.loaded = {}
+        self.entries = {}
+        self.content = {}
+        self.hover = None
+        self.tree.delete(*self.tree.get_children(''))
+        self._request('', True)
+        if self.check_id is None:
+            self.check_id = self.tree.after(CHECK_INTERVAL_MS, self._check)
+
+    def stop(self):
+        """Зупинити звірку з диском і відкинути незавершені читання"""
+        self.generation += 1
+        self.root = None
+        for timer in (self.poll_id, self.check_id):
+            if timer is not None:
+                self.tree.after_cancel(timer)
+        self.poll_id = None
+        self.check_id = None
+
+    def refresh_rows(self):
+        """Перемалювати показані елементи, чий вміст змінився (напр., розміри папок)"""
+        for iid, entry in self.entries.items():
+            self._update_item(iid, entry)
+
+    def selected_paths(self):
+        return [iid for iid in self.tree.selection() if not iid.endswith(DUMMY)]
+
+    def prefetch(self, node):
+        """Почати читання ще не завантаженої папки заздалегідь"""
+        if node and self.tree.exists(node + DUMMY):
+            self._request(node, False)
+
+    # ---- Події ----
+
+    def _on_open(self, event):
+        node = self.tree.focus()
+        if not node:
+            return
+        if self.tree.exists(node + DUMMY):
+            self._request(node, True)
+        elif node in self.loaded and dir_stamp(node) != self.loaded[node]:
+            self._request(node, True)
+
+    def _on_select(self, event):
+        for node in self.tree.selection():
+            self.prefetch(node)
+
+    def _on_motion(self, event):
+        node = self.tree.identify_row(event.y)
+        if node != self.hover:
+            self.hover = node
+            self.prefetch(node)
+
+    # ---- Читання ----
+
+    def _path(self, node):
+        return self.root if node == '' else node
+
+    def _request(self, node, show):
+        """Прочитати папку node; show — показати вміст, щойно буде готовий"""
+        path = self._path(node)
+        if show:
+            self.want_open.add(node)
+            if self.cache is not None:
+                state, entries = self.cache.lookup(path)
+                # Список з плаского режиму може бути ще без метаданих
+                if state == FRESH and all(entry.size is not None for entry in entries):
+                    self._populate(node, dir_stamp(path), entries)
+                    return
+        if node in self.inflight:
+            return
+        self.inflight.add(node)
+        self.pool.submit(self._load, node, path, self.generation)
+        if self.poll_id is None:
+            self.poll_id = self.tree.after(POLL_INTERVAL_MS, self._poll)
+
+    def _load(self, node, path, generation):
+        try:
+            result = read_children(path)
+        except OSError as e:
+            result = e
+        self.results.put((generation, node, path, result))
+
+    def _poll(self):
+        self.poll_id = None
+        while True:
+            try:
+                generation, node, path, result = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self.generation:
+                continue
+            self.inflight.discard(node)
+            if isinstance(result, OSError):
+                if node in self.want_open:
+                    self.want_open.discard(node)
+                    if self.tree.exists(node + DUMMY):
+                        self.tree.delete(node + DUMMY)
+                    if self.on_error is not None:
+                        self.on_error(path, result)
+                continue
+            stamp, children = result
+            if self.cache is not None:
+                self.cache.put(path, stamp, children)
+            if node in self.want_open or node in self.loaded:
+                self._populate(node, stamp, children)
+        if self.inflight:
+            self.poll_id = self.tree.after(POLL_INTERVAL_MS, self._poll)
+
+    def _check(self):
+        """Звірити розгорнуті папки з диском і перечитати змінені"""
+        self.check_id = None
+        if self.root is None:
+            return
+        for node, stamp in list(self.loaded.items()):
+            if node != '' and not (self.tree.exists(node) and self.tree.item(node, 'open')):
+                continue
+            if node not in self.inflight and dir_stamp(self._path(node)) != stamp:
+                self._request(node, False)
+        self.check_id = self.tree.after(CHECK_INTERVAL_MS, self._check)
+
+    # ---- Вміст дерева ----
+
+    def _populate(self, node, stamp, children):
+        if node != '' and not self.tree.exists(node):
+            self.loaded.pop(node, None)
+            return
+        self.want_open.discard(node)
+        if node in self.loaded:
+            self._merge(node, children)
+        else:
+            if self.tree.exists(node + DUMMY):
+                self.tree.delete(node + DUMMY)
+            for entry in children:
+                self._insert(node, 'end', entry)
+        self.loaded[node] = stamp
+
+    def _insert(self, node, index, entry):
+        content = self.format_row(entry)
+        self.tree.insert(node, index, iid=entry.path, text=content[0], values=content[1])
+        self.entries[entry.path] = entry
+        self.content[entry.path] = content
+        if entry.is_dir:
+            self.tree.insert(entry.path, 'end', iid=entry.path + DUMMY, text="Завантаження…")
+
+    def _update_item(self, iid, entry):
+        self.entries[iid] = entry
+        content = self.format_row(entry)
+        if content != self.content.get(iid):
+            self.tree.item(iid, text=content[0], values=content[1])
+            self.content[iid] = content
+
+    def _forget(self, removed):
+        """Прибрати елементи разом з усім записаним про їхні піддерева"""
+        self.tree.delete(*removed)
+        prefixes = tuple(iid + os.sep for iid in removed)
+        removed = set(removed)
+        for table in (self.loaded, self.entries, self.content):
+            for path in [p for p in table if p in removed or p.startswith(prefixes)]:
+                del table[path]
+
+    def _merge(self, node, children):
+        """Привести вміст показаної папки до нового списку точковими змінами"""
+        wanted = {entry.path for entry in children}
+        current = [iid for iid in self.tree.get_children(node) if not iid.endswith(DUMMY)]
+        removed = [iid for iid in current if iid not in wanted]
+        if removed:
+            self._forget(removed)
+        current = [iid for iid in current if iid in wanted]
+        present = set(current)
+        for i, entry in enumerate(children):
+            iid = entry.path
+            if i < len(current) and current[i] == iid:
+                self._update_item(iid, entry)
+            elif iid in present:
+                self.tree.move(iid, node, i)
+                current.remove(iid)
+                current.insert(i, iid)
+                self._update_item(iid, entry)
+            else:
+                self._insert(node, i, entry)
+                current.insert(i, iid)
+                present.add(iid)
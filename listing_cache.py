@@ -0,0 +1,116 @@
+"""LRU-кеш списків директорій.
+
+Запис кешу прив'язаний до mtime/ctime самої директорії: якщо вони не
+змінились, список можна показати одразу без жодного stat по елементах.
+Застарілий запис теж повертається (для миттєвої перемальовки), а
+перевірка виконується у фоні звичайним скануванням.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import archives
+
+# Приблизний розмір одного ScanEntry у пам'яті без рядків
+ENTRY_OVERHEAD = 200
+
+FRESH = 'fresh'
+STALE = 'stale'
+
+
+def dir_stamp(path):
+    """Відбиток директорії для перевірки актуальності кешу"""
+    try:
+        st = os.stat(path)
+    except NotADirectoryError:
+        # Папка всередині архіву змінюється лише разом з архівом
+        return archives.stamp_for(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_ctime_ns)
+
+
+def estimate_size(entries):
+    """Оцінка пам'яті, яку займає список записів"""
+    return sum(ENTRY_OVERHEAD + len(e.name) + len(e.path) for e in entries)
+
+
+class ListingCache:
+    """Обмежений LRU-кеш: ліміт за кількістю записів і за пам'яттю"""
+
+    def __init__(self, max_entries=1_000_000, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()  # шлях -> (stamp, entries, size)
+        self.total_entries = 0
+        self.total_bytes = 0
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def normalize(path):
+        return os.path.normpath(path)
+
+    def lookup(self, path):
+        """Повернути (стан, копія списку) або (None, None) при промаху"""
+        key = self.normalize(path)
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                self.misses += 1
+                return None, None
+            self.items.move_to_end(key)
+        stamp, entries, _ = item
+        if dir_stamp(key) == stamp:
+            self.hits += 1
+            return FRESH, list(entries)
+        self.stale += 1
+        return STALE, list(entries)
+
+    def peek(self, path):
+        """Стан запису (FRESH, STALE або None) без лічильників і зміни порядку LRU"""
+        with self.lock:
+            item = self.items.get(self.normalize(path))
+        if item is None:
+            return None
+        return FRESH if dir_stamp(path) == item[0] else STALE
+
+    def put(self, path, stamp, entries):
+        """Зберегти список директорії з відбитком, отриманим до сканування"""
+        if stamp is None:
+            return
+        key = self.normalize(path)
+        entries = tuple(entries)
+        size = estimate_size(entries)
+        if len(entries) > self.max_entries or size > self.max_bytes:
+            self.discard(key)
+            return
+        with self.lock:
+            self._discard(key)
+            self.items[key] = (stamp, entries, size)
+            self.total_entries += len(entries)
+            self.total_bytes += size
+            while self.total_entries > self.max_entries or self.total_bytes > self.max_bytes:
+                _, (_, old, old_size) = self.items.popitem(last=False)
+                self.total_entries -= len(old)
+                self.total_bytes -= old_size
+
+    def discard(self, path):
+        """Прибрати запис директорії з кешу"""
+        with self.lock:
+            self._discard(self.normalize(path))
+
+    def _discard(self, key):
+        item = self.items.pop(key, None)
+        if item is not None:
+            self.total_entries -= len(item[1])
+            self.total_bytes -= item[2]
+
+    def stats_text(self):
+        """Лічильники для рядка стану"""
+        text = f"кеш: {self.hits} влучань, {self.misses} промахів"
+        if self.stale:
+            text += f", {self.stale} застарілих"
+        return text
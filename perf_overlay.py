@@ -0,0 +1,50 @@
+"""Рядок над статус-баром з підсумком останньої дії з perf_trace"""
+import tkinter as tk
+
+import perf_trace
+
+
+class PerfOverlay:
+    """Рядок над статус-баром з підсумком останньої дії
+
+    F12 показує/ховає його, Shift+F12 профілює наступну дію (рядок
+    з'являється, щоб було видно, куди збережено профіль).
+    """
+
+    def __init__(self, master, before, tracer=perf_trace.tracer, padx=10, **label_options):
+        self.master = master
+        self.before = before
+        self.tracer = tracer
+        self.padx = padx
+        self.visible = False
+        self.label = tk.Label(master, text="", anchor="w", **label_options)
+        tracer.listeners.append(self.on_action)
+        master.bind('<F12>', lambda e: self.toggle())
+        master.bind('<Shift-F12>', lambda e: self.profile_next())
+        master.bind('<Destroy>', self._on_destroy, add='+')
+
+    def toggle(self):
+        if self.visible:
+            self.label.pack_forget()
+        else:
+            self.label.pack(fill="x", padx=self.padx, before=self.before)
+            self.label.configure(text=f"Журнал: {self.tracer.trace_path()}")
+        self.visible = not self.visible
+
+    def profile_next(self):
+        self.tracer.arm_profile()
+        if not self.visible:
+            self.toggle()
+        self.label.configure(text="Профіль буде знято для наступної дії")
+
+    def on_action(self, action):
+        if not self.visible:
+            return
+        text = action.summary()
+        if action.fields.get('profile'):
+            text += f"  |  профіль: {action.fields['profile']}"
+        self.label.configure(text=text)
+
+    def _on_destroy(self, event):
+        if event.widget is self.master and self.on_action in self.tracer.listeners:
+            self.tracer.listeners.remove(self.on_action)
@@ -0,0 +1,238 @@
+"""Легке трасування гарячих шляхів провідників.
+
+Модулі, що виконують роботу (сканування, stat, малювання списку,
+сортування), додають її час і кількість операцій у загальні лічильники:
+add('stat', seconds, stat=n) чи `with span('sort'):`. Це безпечно з
+будь-якого потоку і коштує одне захоплення lock на порцію.
+
+Провідник відкриває дію (start('load', path=...)), ставить у ній позначки
+(mark('load', 'listed') — час від початку) і закриває її (finish('load')).
+Дія отримує різницю лічильників за свій час, пишеться рядком у
+ротований JSONL-журнал у каталозі кешу і передається слухачам
+(perf_overlay). Нова дія з тією ж назвою закриває попередню як перервану.
+
+arm_profile() вмикає cProfile на наступну дію; профіль головного потоку
+зберігається поруч із журналом (profiles/*.prof).
+"""
+import contextlib
+import cProfile
+import datetime
+import json
+import os
+import threading
+import time
+
+from app_dirs import cache_dir
+
+TRACE_FILE = 'trace.jsonl'
+PROFILE_DIR = 'profiles'
+# Ротація журналу: розмір одного файла і кількість старих копій
+MAX_BYTES = 1024 * 1024
+BACKUPS = 3
+
+
+class Action:
+    """Одна дія: етапи (с), позначки (с від початку) і лічильники"""
+
+    def __init__(self, name, fields, seconds, counts, started=None):
+        self.name = name
+        self.fields = fields
+        now = time.perf_counter()
+        self.started = now if started is None else started
+        self.wall = time.time() - (now - self.started)
+        self.total = None
+        self.marks = {}
+        self.stages = {}
+        self.counts = {}
+        self.base_seconds = seconds
+        self.base_counts = counts
+        self.profiler = None
+
+    def mark(self, label):
+        """Позначка часу від початку (зберігається лише перша)"""
+        self.marks.setdefault(label, time.perf_counter() - self.started)
+
+    def close(self, seconds, counts, fields):
+        self.total = time.perf_counter() - self.started
+        self.fields.update(fields)
+        self.stages = {k: v - self.base_seconds.get(k, 0.0) for k, v in seconds.items()
+                       if v > self.base_seconds.get(k, 0.0)}
+        self.counts = {k: v - self.base_counts.get(k, 0) for k, v in counts.items()
+                       if v > self.base_counts.get(k, 0)}
+
+    def record(self):
+        """Запис для JSONL"""
+        record = {
+            'ts': datetime.datetime.fromtimestamp(self.wall).isoformat(timespec='milliseconds'),
+            'action': self.name,
+            'total_ms': round(self.total * 1000, 2),
+            'marks_ms': {k: round(v * 1000, 2) for k, v in self.marks.items()},
+            'stages_ms': {k: round(v * 1000, 2) for k, v in self.stages.items()},
+            'counts': self.counts,
+        }
+        record.update(self.fields)
+        return record
+
+    def summary(self):
+        """Короткий рядок для оверлею"""
+        parts = [f"{self.name} {self.total * 1000:.0f} мс"]
+        if self.marks:
+            parts.append(" ".join(f"{k} {v * 1000:.0f}" for k, v in self.marks.items()))
+        if self.stages:
+            parts.append(" · ".join(f"{k} {v * 1000:.1f}" for k, v in
+                                    sorted(self.stages.items(), key=lambda kv: -kv[1])))
+        if self.counts:
+            parts.append(", ".join(f"{k} {v}" for k, v in self.counts.items()))
+        if self.fields.get('interrupted'):
+            parts.append("перервано")
+        return "  |  ".join(parts)
+
+
+class Tracer:
+    """Лічильники, відкриті дії за назвою, журнал і слухачі"""
+
+    def __init__(self, path=None, max_bytes=MAX_BYTES, backups=BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lock = threading.Lock()
+        self.seconds = {}
+        self.counts = {}
+        self.actions = {}
+        self.listeners = []
+        self.profile_armed = False
+        self.enabled = True
+
+    # ---- Лічильники (з будь-якого потоку) ----
+
+    def add(self, stage, seconds=0.0, **counts):
+        with self.lock:
+            if seconds:
+                self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+            for name, n in counts.items():
+                self.counts[name] = self.counts.get(name, 0) + n
+
+    @contextlib.contextmanager
+    def span(self, stage, **counts):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started, **counts)
+
+    # ---- Дії (з головного потоку) ----
+
+    def start(self, name, started=None, **fields):
+        """Відкрити дію name, закривши попередню з тією ж назвою як перервану
+
+        started — perf_counter() початку, якщо дія почалась раніше
+        (напр., запуск — з імпорту модуля провідника).
+        """
+        if name in self.actions:
+            self.finish(name, interrupted=True)
+        with self.lock:
+            action = Action(name, fields, dict(self.seconds), dict(self.counts), started)
+        if self.profile_armed:
+            self.profile_armed = False
+            action.profiler = cProfile.Profile()
+            try:
+                action.profiler.enable()
+            except ValueError:
+                # Інший профайлер уже активний
+                action.profiler = None
+        self.actions[name] = action
+        return action
+
+    def mark(self, name, label):
+        action = self.actions.get(name)
+        if action is not None:
+            action.mark(label)
+
+    def active(self, name):
+        return name in self.actions
+
+    def marked(self, name, label):
+        action = self.actions.get(name)
+        return action is not None and label in action.marks
+
+    def finish(self, name, **fields):
+        """Закрити дію name (якщо відкрита), записати і сповістити слухачів"""
+        action = self.actions.pop(name, None)
+        if action is None:
+            return None
+        if action.profiler is not None:
+            action.profiler.disable()
+            action.fields['profile'] = self._save_profile(action)
+        with self.lock:
+            action.close(self.seconds, self.counts, fields)
+        self._publish(action)
+        return action
+
+    def log(self, name, seconds, stages=None, counts=None, **fields):
+        """Записати вже завершену дію (напр., фонове завдання) з готовими цифрами"""
+        action = Action(name, fields, {}, {})
+        action.total = seconds
+        action.stages = dict(stages or {})
+        action.counts = dict(counts or {})
+        self._publish(action)
+        return action
+
+    def arm_profile(self):
+        """Профілювати наступну дію"""
+        self.profile_armed = True
+
+    def _publish(self, action):
+        if self.enabled:
+            self._write(action.record())
+        for listener in list(self.listeners):
+            listener(action)
+
+    # ---- Журнал ----
+
+    def trace_path(self):
+        if self.path is None:
+            self.path = os.path.join(cache_dir(), TRACE_FILE)
+        return self.path
+
+    def _write(self, record):
+        try:
+            path = self.trace_path()
+            if os.path.exists(path) and os.path.getsize(path) >= self.max_bytes:
+                self._rotate(path)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError:
+            # Журнал — допоміжний: помилка запису не має заважати роботі
+            pass
+
+    def _rotate(self, path):
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f'{path}.{i}'):
+                os.replace(f'{path}.{i}', f'{path}.{i + 1}')
+        if self.backups:
+            os.replace(path, f'{path}.1')
+        else:
+            os.remove(path)
+
+    def _save_profile(self, action):
+        folder = os.path.join(os.path.dirname(self.trace_path()), PROFILE_DIR)
+        stamp = datetime.datetime.fromtimestamp(action.wall).strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(folder, f'{stamp}-{action.name}.prof')
+        try:
+            os.makedirs(folder, exist_ok=True)
+            action.profiler.dump_stats(path)
+        except OSError:
+            return None
+        return path
+
+
+tracer = Tracer()
+add = tracer.add
+span = tracer.span
+start = tracer.start
+mark = tracer.mark
+active = tracer.active
+marked = tracer.marked
+finish = tracer.finish
+log = tracer.log
+
@@ -0,0 +1,132 @@
+"""Вікно підтвердження плану вставлення (з пробним запуском)"""
+import os
+import tkinter as tk
+
+from transfer_plan import OVERWRITE, RENAME, SKIP
+
+POLICY_LABELS = (
+    (RENAME, "Перейменувати (додати номер)"),
+    (SKIP, "Пропустити"),
+    (OVERWRITE, "Замінити / об'єднати"),
+)
+
+# Скільки рядків показувати у списках конфліктів і пробного запуску
+PREVIEW_LIMIT = 200
+
+
+class PlanDialog(tk.Toplevel):
+    """Показує підсумки плану і вибір дії для конфліктів
+
+    on_confirm(plan, pairs) викликається лише для справжнього запуску;
+    пробний запуск показує, що буде зроблено, і нічого не змінює.
+    """
+
+    def __init__(self, master, plan, format_size, on_confirm, policy=RENAME,
+                 bg='#F0F0F0', fg='black', button_bg='#E1E1E1', font=('Arial', 9)):
+        super().__init__(master, bg=bg)
+        self.plan = plan
+        self.format_size = format_size
+        self.on_confirm = on_confirm
+        self.colors = {'bg': bg, 'fg': fg, 'button_bg': button_bg}
+        self.font = font
+        self.policy = tk.StringVar(self, value=policy)
+        self.dry_run = tk.BooleanVar(self, value=False)
+
+        self.title("Вставлення")
+        self.transient(master)
+        self.resizable(False, False)
+
+        container = tk.Frame(self, bg=bg, padx=15, pady=15)
+        container.pack(fill="both", expand=True)
+        label_opts = {"bg": bg, "fg": fg, "font": font, "anchor": "w", "justify": "left"}
+
+        action = "Переміщення" if plan.operation == 'cut' else "Копіювання"
+        tk.Label(container, text=f"{action} у {plan.dest_dir}", **label_opts).pack(fill="x")
+        tk.Label(
+            container,
+            text=(f"Файлів: {plan.files_total}, папок: {plan.dirs_total}, "
+                  f"обсяг: {format_size(plan.bytes_total)}"),
+            **label_opts
+        ).pack(fill="x")
+        if plan.renames:
+            tk.Label(container, text=f"Перейменуванням (без копіювання): {len(plan.renames)}",
+                     **label_opts).pack(fill="x")
+        if plan.free_bytes is not None:
+            free_opts = dict(label_opts)
+            if not plan.enough_space:
+                free_opts["fg"] = "#D13438"
+            text = f"Вільно в призначенні: {format_size(plan.free_bytes)}"
+            if not plan.enough_space:
+                text += " — недостатньо місця!"
+            tk.Label(container, text=text, **free_opts).pack(fill="x")
+
+        if plan.errors:
+            errors = "\n".join(f"{path}: {error}" for path, error in plan.errors[:5])
+            tk.Label(container, text=f"Помилки ({len(plan.errors)}):\n{errors}",
+                     wraplength=420, **label_opts).pack(fill="x", pady=(5, 0))
+
+        if plan.conflicts:
+            tk.Label(container, text=f"Вже існують ({len(plan.conflicts)}):",
+                     **label_opts).pack(fill="x", pady=(5, 0))
+            listbox = tk.Listbox(container, height=min(6, len(plan.conflicts)), font=font,
+                                 bg=button_bg, fg=fg, relief="flat")
+            for name in plan.conflicts[:PREVIEW_LIMIT]:
+                listbox.insert("end", name)
+            listbox.pack(fill="x")
+            for value, text in POLICY_LABELS:
+                tk.Radiobutton(container, text=text, value=value, variable=self.policy,
+                               bg=bg, fg=fg, selectcolor=button_bg, activebackground=bg,
+                               font=font, anchor="w").pack(fill="x")
+
+        tk.Checkbutton(container, text="Пробний запуск (нічого не змінювати)",
+                       variable=self.dry_run, bg=bg, fg=fg, selectcolor=button_bg,
+                       activebackground=bg, font=font, anchor="w").pack(fill="x", pady=(5, 0))
+
+        buttons = tk.Frame(container, bg=bg)
+        buttons.pack(fill="x", pady=(10, 0))
+        btn_opts = {"bg": button_bg, "fg": fg, "relief": "flat", "font": font, "padx": 10}
+        tk.Button(buttons, text="Скасувати", command=self.destroy, **btn_opts).pack(side="right")
+        tk.Button(buttons, text="Почати", command=self.start, **btn_opts).pack(side="right", padx=5)
+
+        self.bind("<Escape>", lambda e: self.destroy())
+        self.grab_set()
+
+    def start(self):
+        pairs = self.plan.resolve(self.policy.get())
+        if self.dry_run.get():
+            self.show_dry_run(pairs)
+            return
+        self.destroy()
+        if pairs:
+            self.on_confirm(self.plan, pairs)
+
+    def show_dry_run(self, pairs):
+        """Показати, що буде зроблено з кожним джерелом"""
+        plan = self.plan
+        chosen = {src for src, _ in pairs}
+        lines = []
+        for src, dest in pairs:
+            if src in plan.renames:
+                action = "перейменування"
+            else:
+                action = "переміщення" if plan.operation == 'cut' else "копіювання"
+            if os.path.basename(dest) in plan.existing:
+                action += ", заміна"
+            lines.append(f"[{action}] {src} → {dest}")
+        for src in plan.sources:
+            if src not in chosen:
+                lines.append(f"[пропущено] {src}")
+        nbytes, nfiles = plan.totals_for(pairs)
+        lines.append("")
+        lines.append(f"Разом: {nfiles} файлів, {self.format_size(nbytes)}")
+
+        c = self.colors
+        win = tk.Toplevel(self, bg=c['bg'])
+        win.title("Пробний запуск")
+        text = tk.Text(win, width=90, height=20, font=self.font, bg=c['button_bg'],
+                       fg=c['fg'], relief="flat", wrap="none")
+        text.insert("end", "\n".join(lines[:PREVIEW_LIMIT]))
+        if len(lines) > PREVIEW_LIMIT:
+            text.insert("end", f"\n... ще {len(lines) - PREVIEW_LIMIT}")
+        text.configure(state="disabled")
+        text.pack(fill="both", expand=True, padx=10, pady=10)
@@ -0,0 +1,156 @@
+"""Попереднє читання директорій, які, найімовірніше, відкриють наступними.
+
+Поки інтерфейс простоює, окремий потік зі зниженим пріоритетом читає
+кандидатів (вибрану папку, батьківську, сусідні папки й історію) тим
+самим scandir без stat, що й звичайний список, і кладе результат у
+ListingCache. Один прохід обмежений кількістю директорій, записів і
+пам'яттю; будь-яка навігація скасовує його. Влучання рахуються, коли
+відкрита директорія була прочитана заздалегідь і ще актуальна в кеші.
+"""
+import os
+import threading
+
+from dir_scanner import list_directory
+from listing_cache import FRESH, dir_stamp, estimate_size
+
+# Затримка після останньої дії користувача перед початком проходу
+DELAY_MS = 400
+# Бюджет одного проходу
+MAX_DIRS = 24
+MAX_ENTRIES = 100_000
+MAX_BYTES = 32 * 1024 * 1024
+# Скільки прочитаних заздалегідь шляхів пам'ятати для підрахунку влучань
+MAX_TRACKED = 1000
+
+
+class Prefetcher:
+    """Прогріває cache для переданих кандидатів у фоновому потоці
+
+    schedule(candidates) відкладає прохід до паузи в діях (candidates() —
+    функція, що повертає шляхи від найімовірнішого); cancel() зупиняє
+    все незроблене; visited(path) рахує влучання.
+    """
+
+    def __init__(self, widget, cache, max_dirs=MAX_DIRS, max_entries=MAX_ENTRIES,
+                 max_bytes=MAX_BYTES, delay_ms=DELAY_MS):
+        self.widget = widget
+        self.cache = cache
+        self.max_dirs = max_dirs
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.delay_ms = delay_ms
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.cancelled = threading.Event()
+        self.candidates = None
+        self.after_id = None
+        self.thread = None
+        # Прочитані заздалегідь і ще не відкриті: шлях -> відбиток
+        self.prefetched = {}
+        self.dirs_read = 0
+        self.entries_read = 0
+        self.hits = 0
+        self.visits = 0
+
+    def schedule(self, candidates):
+        """Почати прохід після паузи; повторний виклик відкладає його знову"""
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+        self.after_id = self.widget.after(self.delay_ms, self._submit, candidates)
+
+    def cancel(self):
+        """Скасувати очікуваний і поточний прохід (почалась навігація)"""
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self.after_id = None
+        with self.lock:
+            self.candidates = None
+            self.cancelled.set()
+
+    def visited(self, path):
+        """Врахувати перехід у path: влучання, якщо його прочитано заздалегідь"""
+        path = os.path.normpath(path)
+        self.visits += 1
+        with self.lock:
+            stamp = self.prefetched.pop(path, None)
+        if stamp is not None and self.cache.peek(path) == FRESH:
+            self.hits += 1
+
+    def stats(self):
+        """Лічильники для налаштування бюджету"""
+        return {
+            'visits': self.visits,
+            'hits': self.hits,
+            'hit_rate': self.hits / self.visits if self.visits else 0.0,
+            'dirs_read': self.dirs_read,
+            'entries_read': self.entries_read,
+            'useful': self.hits / self.dirs_read if self.dirs_read else 0.0,
+        }
+
+    def stats_text(self):
+        stats = self.stats()
+        return (f"передвибірка: {stats['hits']}/{stats['visits']} переходів "
+                f"({stats['hit_rate']:.0%}), прочитано {stats['dirs_read']} папок")
+
+    def _submit(self, candidates):
+        self.after_id = None
+        paths = candidates()
+        with self.lock:
+            self.cancelled.set()
+            self.cancelled = threading.Event()
+            self.candidates = paths
+            self.wakeup.set()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def _run(self):
+        try:
+            # Нижчий пріоритет лише для цього потоку (Linux)
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 15)
+        except (AttributeError, OSError):
+            pass
+        while True:
+            self.wakeup.wait()
+            with self.lock:
+                paths, cancelled = self.candidates, self.cancelled
+                self.candidates = None
+                self.wakeup.clear()
+            if paths:
+                self._pass(paths, cancelled)
+
+    def _pass(self, paths, cancelled):
+        dirs = 0
+        entries_left = self.max_entries
+        bytes_left = self.max_bytes
+        seen = set()
+        for path in paths:
+            if cancelled.is_set() or dirs >= self.max_dirs or entries_left <= 0:
+                return
+            path = os.path.normpath(path)
+            if path in seen or self.cache.peek(path) == FRESH:
+                continue
+            seen.add(path)
+            stamp = dir_stamp(path)
+            try:
+                items = list_directory(path, cancelled, entries_left)
+            except OSError:
+                continue
+            dirs += 1
+            if items is None:
+                # Скасовано або завелика: прочитане вже вичерпало бюджет записів
+                return
+            size = estimate_size(items)
+            if size > bytes_left:
+                continue
+            if cancelled.is_set():
+                return
+            self.cache.put(path, stamp, items)
+            entries_left -= len(items)
+            bytes_left -= size
+            with self.lock:
+                self.prefetched[path] = stamp
+                if len(self.prefetched) > MAX_TRACKED:
+                    del self.prefetched[next(iter(self.prefetched))]
+                self.dirs_read += 1
+                self.entries_read += len(items)
@@ -0,0 +1,120 @@
+"""Панель попереднього перегляду: мініатюра зображення або початок тексту"""
+import queue
+import threading
+import tkinter as tk
+
+from thumbnails import NORMAL_SIZE, ThumbnailRenderer, is_image, read_text_head
+
+POLL_INTERVAL_MS = 30
+
+
+class PreviewPane(tk.Frame):
+    """Показує вибраний файл; мініатюри готує ThumbnailRenderer у фоні
+
+    prioritize(rows) — передати рядки, що зараз на екрані, щоб їхні
+    мініатюри були готові до того, як їх виберуть.
+    """
+
+    def __init__(self, master, format_size, bg='#F0F0F0', fg='black',
+                 text_bg='white', font=('Arial', 9), width=260):
+        super().__init__(master, bg=bg, width=width)
+        self.format_size = format_size
+        self.renderer = ThumbnailRenderer(self, self.on_thumbnail)
+        self.current = None
+        self.photo = None
+        self.generation = 0
+        self.text_results = queue.Queue()
+
+        # Місце під мініатюру фіксоване, щоб панель не стрибала
+        image_box = tk.Frame(self, bg=bg, width=NORMAL_SIZE, height=NORMAL_SIZE)
+        image_box.pack(pady=(10, 5))
+        image_box.pack_propagate(False)
+        self.image_label = tk.Label(image_box, bg=bg, fg=fg, font=font, wraplength=NORMAL_SIZE)
+        self.image_label.pack(fill="both", expand=True)
+        self.caption = tk.Label(self, text="", bg=bg, fg=fg, font=font,
+                                wraplength=width - 20, justify="left", anchor="w")
+        self.caption.pack(fill="x", padx=10)
+        self.text = tk.Text(self, bg=text_bg, fg=fg, relief="flat", wrap="none",
+                            font=('Courier', 8), height=20, width=1)
+        self.text.pack(fill="both", expand=True, padx=10, pady=10)
+        self.text.configure(state="disabled")
+        self.pack_propagate(False)
+
+    def prioritize(self, rows):
+        self.renderer.prioritize([row.path for row in rows if not row.is_dir and is_image(row.name)])
+
+    def show(self, entry):
+        """Показати ScanEntry (None — очистити панель)"""
+        self.generation += 1
+        self.current = entry
+        self.photo = None
+        self.image_label.configure(image="", text="")
+        self._set_text("")
+        if entry is None:
+            self.caption.configure(text="")
+            return
+        caption = entry.name
+        if entry.size is not None and not entry.is_dir:
+            caption += f"\n{self.format_size(entry.size)}"
+        self.caption.configure(text=caption)
+        if entry.is_dir:
+            self.image_label.configure(text="📁")
+        elif is_image(entry.name):
+            thumb = self.renderer.lookup(entry.path, entry.mtime)
+            if thumb is not None:
+                self._show_image(thumb)
+            else:
+                self.image_label.configure(text="Готується мініатюра…")
+                self.renderer.request(entry.path)
+        else:
+            threading.Thread(target=self._read_text, args=(entry.path, self.generation),
+                             daemon=True).start()
+            self.after(POLL_INTERVAL_MS, self._poll_text, self.generation)
+
+    def on_thumbnail(self, path, thumb):
+        entry = self.current
+        if entry is None or entry.path != path:
+            return
+        if thumb is None:
+            self.image_label.configure(text="Не вдалося прочитати зображення")
+        else:
+            self._show_image(thumb)
+
+    def _show_image(self, thumb):
+        try:
+            # Готова мініатюра маленька, тож завантаження займає мілісекунди
+            self.photo = tk.PhotoImage(file=thumb)
+        except tk.TclError:
+            self.image_label.configure(text="Не вдалося прочитати мініатюру")
+            return
+        self.image_label.configure(image=self.photo, text="")
+
+    def _read_text(self, path, generation):
+        try:
+            head = read_text_head(path)
+        except (OSError, ValueError):
+            head = False
+        self.text_results.put((generation, head))
+
+    def _poll_text(self, generation):
+        if generation != self.generation:
+            return
+        while True:
+            try:
+                done, head = self.text_results.get_nowait()
+            except queue.Empty:
+                break
+            if done == generation:
+                if head is None:
+                    head = "(двійковий файл)"
+                elif head is False:
+                    head = "(не вдалося прочитати)"
+                self._set_text(head)
+                return
+        self.after(POLL_INTERVAL_MS, self._poll_text, generation)
+
+    def _set_text(self, text):
+        self.text.configure(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.insert("1.0", text)
+        self.text.configure(state="disabled")
@@ -0,0 +1,90 @@
+"""Вікно параметрів рекурсивного пошуку «тут»"""
+import re
+import tkinter as tk
+from tkinter import messagebox
+
+from tree_search import SearchCriteria
+
+
+class SearchHereDialog(tk.Toplevel):
+    """Збирає шаблон і умови пошуку; on_start(criteria) запускає пошук"""
+
+    def __init__(self, master, root_path, on_start, pattern='',
+                 bg='#F0F0F0', fg='black', button_bg='#E1E1E1', font=('Arial', 9)):
+        super().__init__(master, bg=bg)
+        self.on_start = on_start
+        self.title("Пошук тут")
+        self.transient(master)
+        self.resizable(False, False)
+
+        self.pattern = tk.StringVar(self, value=pattern)
+        self.regex = tk.BooleanVar(self, value=False)
+        self.follow = tk.BooleanVar(self, value=True)
+        self.max_depth = tk.StringVar(self)
+        self.min_size = tk.StringVar(self)
+        self.max_size = tk.StringVar(self)
+        self.days = tk.StringVar(self)
+
+        container = tk.Frame(self, bg=bg, padx=15, pady=15)
+        container.pack(fill="both", expand=True)
+        label_opts = {"bg": bg, "fg": fg, "font": font, "anchor": "w"}
+        entry_opts = {"bg": button_bg, "fg": fg, "insertbackground": fg, "relief": "flat", "font": font}
+        check_opts = {"bg": bg, "fg": fg, "selectcolor": button_bg, "activebackground": bg,
+                      "font": font, "anchor": "w"}
+
+        tk.Label(container, text=f"У: {root_path}", **label_opts).grid(row=0, column=0, columnspan=2, sticky="w")
+        fields = (
+            ("Назва (підрядок, glob *.py або regex):", self.pattern, 30),
+            ("Глибина (порожньо — без обмеження):", self.max_depth, 8),
+            ("Розмір від, КБ:", self.min_size, 8),
+            ("Розмір до, КБ:", self.max_size, 8),
+            ("Змінено за останні N днів:", self.days, 8),
+        )
+        for row, (text, var, width) in enumerate(fields, start=1):
+            tk.Label(container, text=text, **label_opts).grid(row=row, column=0, sticky="w", pady=2)
+            entry = tk.Entry(container, textvariable=var, width=width, **entry_opts)
+            entry.grid(row=row, column=1, sticky="w", padx=(5, 0), pady=2)
+            if row == 1:
+                entry.focus_set()
+                entry.bind("<Return>", lambda e: self.start())
+        tk.Checkbutton(container, text="Регулярний вираз", variable=self.regex,
+                       **check_opts).grid(row=6, column=0, columnspan=2, sticky="w")
+        tk.Checkbutton(container, text="Заходити в посилання на папки", variable=self.follow,
+                       **check_opts).grid(row=7, column=0, columnspan=2, sticky="w")
+
+        buttons = tk.Frame(container, bg=bg)
+        buttons.grid(row=8, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+        btn_opts = {"bg": button_bg, "fg": fg, "relief": "flat", "font": font, "padx": 10}
+        tk.Button(buttons, text="Скасувати", command=self.destroy, **btn_opts).pack(side="right")
+        tk.Button(buttons, text="Шукати", command=self.start, **btn_opts).pack(side="right", padx=5)
+
+        self.bind("<Escape>", lambda e: self.destroy())
+        self.grab_set()
+
+    def _number(self, var, scale=1):
+        text = var.get().strip()
+        return None if not text else float(text.replace(',', '.')) * scale
+
+    def start(self):
+        pattern = self.pattern.get().strip()
+        if not pattern:
+            return
+        try:
+            depth = self._number(self.max_depth)
+            criteria = SearchCriteria(
+                pattern,
+                regex=self.regex.get(),
+                min_size=self._number(self.min_size, 1024),
+                max_size=self._number(self.max_size, 1024),
+                modified_within=self._number(self.days, 86400),
+                max_depth=None if depth is None else int(depth),
+                follow_symlinks=self.follow.get(),
+            )
+        except ValueError:
+            messagebox.showerror("Помилка", "Глибина, розмір і дні мають бути числами", parent=self)
+            return
+        except re.error as e:
+            messagebox.showerror("Помилка", f"Невірний регулярний вираз:\n{e}", parent=self)
+            return
+        self.destroy()
+        self.on_start(criteria)
@@ -0,0 +1,42 @@
+"""Знімок сесії провідника між запусками.
+
+При виході зберігається DirectoryModel.snapshot(): остання директорія,
+історія переходів, сортування і рядки списку. При запуску знімок
+показується одразу (DirectoryModel.restore), ще до сканування, а
+директорія перевіряється у фоні. Знімок — лише кеш: будь-яка помилка
+читання означає звичайний запуск.
+"""
+import json
+import os
+
+from app_dirs import cache_dir
+
+SESSION_FILE = 'session.json'
+
+
+def session_path():
+    return os.path.join(cache_dir(), SESSION_FILE)
+
+
+def read(path=None):
+    """Знімок минулої сесії або None"""
+    try:
+        with open(path or session_path(), encoding='utf-8', errors='surrogateescape') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return snapshot if isinstance(snapshot, dict) else None
+
+
+def write(snapshot, path=None):
+    """Зберегти знімок (атомарно: через тимчасовий файл)"""
+    try:
+        path = path or session_path()
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8', errors='surrogateescape') as f:
+            # Без пробілів: знімок великого списку читається при кожному запуску
+            json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, path)
+    except (OSError, ValueError):
+        # Знімок допоміжний: без нього наступний запуск просто сканує
+        pass
@@ -0,0 +1,56 @@
+import os
+import time
+
+import pytest
+
+import inotify_watch
+import perf_trace
+from benchmark import StubRoot
+from dir_scanner import ScanEntry
+from directory_model import WATCH_INTERVAL_MS, DirectoryModel
+
+WATCH_SETTLE = 3 * WATCH_INTERVAL_MS / 1000
+
+
+@pytest.fixture(autouse=True)
+def app_dirs_in_tmp(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    monkeypatch.setenv('XDG_DATA_HOME', str(tmp_path / 'data'))
+    monkeypatch.setattr(perf_trace.tracer, 'enabled', False)
+
+
+def pump_until(root, done, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not done():
+        assert time.monotonic() < deadline
+        root.pump()
+
+
+def names(model):
+    return sorted(row.name for row in model.rows.full_rows)
+
+
+@pytest.mark.skipif(not inotify_watch.available(), reason="потрібен inotify")
+def test_search_results_are_not_cached_as_listing(tmp_path):
+    folder = tmp_path / 'folder'
+    folder.mkdir()
+    for name in ('a.txt', 'hit.py'):
+        (folder / name).touch()
+    root = StubRoot()
+    model = DirectoryModel(root, path=str(folder))
+    model.load()
+    pump_until(root, lambda: not model.busy)
+
+    # Список змінено на місці, а потім замінено результатами пошуку
+    model.create_file('new.txt')
+    # Подію inotify про новий файл застосовано — кешу нічого не заважає
+    deadline = time.monotonic() + WATCH_SETTLE
+    pump_until(root, lambda: time.monotonic() > deadline)
+    model.enter_search()
+    hit = str(folder / 'hit.py')
+    model.rows.set_rows([ScanEntry('hit.py', hit, False, 0, 0)])
+
+    # Escape: повернення до директорії з кешу
+    model.load(use_cache=True)
+    pump_until(root, lambda: not model.busy)
+    assert names(model) == ['a.txt', 'hit.py', 'new.txt']
@@ -0,0 +1,56 @@
+import os
+import time
+
+from transfer_plan import OVERWRITE, build_plan
+from transfers import DONE, FAILED, TransferJob, TransferManager
+
+
+def run(job, timeout=10):
+    manager = TransferManager()
+    manager.submit(job)
+    deadline = time.monotonic() + timeout
+    while not job.is_finished:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return job
+
+
+def make_file(path, data):
+    with open(path, 'w') as f:
+        f.write(data)
+
+
+def read_file(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_overwrite_with_vanished_source_keeps_destination(tmp_path):
+    src_dir, dest_dir = tmp_path / 'src', tmp_path / 'dest'
+    src_dir.mkdir()
+    dest_dir.mkdir()
+    make_file(src_dir / 'a.txt', 'new')
+    make_file(dest_dir / 'a.txt', 'existing')
+
+    plan = build_plan([str(src_dir / 'a.txt')], str(dest_dir), 'copy')
+    os.remove(src_dir / 'a.txt')
+    job = run(TransferJob(plan.resolve(OVERWRITE), 'copy', plan=plan))
+
+    assert job.state == FAILED
+    assert read_file(dest_dir / 'a.txt') == 'existing'
+    assert os.listdir(dest_dir) == ['a.txt']
+
+
+def test_overwrite_replaces_destination(tmp_path):
+    src_dir, dest_dir = tmp_path / 'src', tmp_path / 'dest'
+    src_dir.mkdir()
+    dest_dir.mkdir()
+    make_file(src_dir / 'a.txt', 'new')
+    make_file(dest_dir / 'a.txt', 'existing')
+
+    plan = build_plan([str(src_dir / 'a.txt')], str(dest_dir), 'copy')
+    job = run(TransferJob(plan.resolve(OVERWRITE), 'copy', plan=plan))
+
+    assert job.state == DONE
+    assert read_file(dest_dir / 'a.txt') == 'new'
+    assert os.listdir(dest_dir) == ['a.txt']
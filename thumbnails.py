@@ -0,0 +1,297 @@
+"""Мініатюри зображень у спільному кеші freedesktop і початок текстових файлів.
+
+Мініатюри лежать у ~/.cache/thumbnails/normal/<md5(URI)>.png і несуть
+у PNG поля Thumb::URI і Thumb::MTime, тож ними користуються й інші
+програми. Декодування і зменшення робить Tk (PhotoImage розуміє PNG, GIF
+і PPM/PGM), але не в процесі інтерфейсу: завдання виконує пул процесів,
+у кожному з яких свій прихований Tk. Головний потік лише керує чергою і
+завантажує готову маленьку мініатюру.
+
+Черга віддає перевагу рядкам, які щойно з'явились на екрані: запити
+зберігаються в порядку останнього показу, береться найсвіжіший, а
+найстаріші (давно прокручені) відкидаються.
+"""
+import hashlib
+import mmap
+import os
+import queue
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from urllib.parse import quote
+
+IMAGE_EXTENSIONS = frozenset({'.png', '.gif', '.ppm', '.pgm'})
+NORMAL_SIZE = 128
+WORKERS = 2
+# Скільки запитів одночасно в пулі і скільки чекає в черзі
+MAX_INFLIGHT = 4
+MAX_WANTED = 512
+# Ліміт розміру кешу мініатюр і як часто його перевіряти (у записаних файлах)
+CACHE_LIMIT = 256 * 1024 * 1024
+EVICT_EVERY = 200
+# Початок текстового файлу для перегляду
+TEXT_HEAD_BYTES = 16 * 1024
+TEXT_HEAD_LINES = 60
+SOFTWARE = 'StarExplor'
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def thumbnails_root():
+    """~/.cache/thumbnails (спільний для всіх програм)"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'thumbnails')
+
+
+def file_uri(path):
+    return 'file://' + quote(os.path.abspath(path))
+
+
+def thumbnail_path(uri, flavor='normal'):
+    return os.path.join(thumbnails_root(), flavor, hashlib.md5(uri.encode('utf-8')).hexdigest() + '.png')
+
+
+def is_image(name):
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+
+
+def _chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def add_png_text(data, fields):
+    """Вставити поля tEXt одразу після IHDR"""
+    if not data.startswith(_PNG_SIGNATURE):
+        raise ValueError('не PNG')
+    ihdr_end = len(_PNG_SIGNATURE) + 12 + struct.unpack('>I', data[8:12])[0]
+    text = b''.join(_chunk(b'tEXt', f'{key}\0{value}'.encode('latin-1', 'replace'))
+                    for key, value in fields.items())
+    return data[:ihdr_end] + text + data[ihdr_end:]
+
+
+def read_png_text(path):
+    """Поля tEXt з PNG (читаються лише заголовні блоки до IDAT)"""
+    fields = {}
+    with open(path, 'rb') as f:
+        if f.read(8) != _PNG_SIGNATURE:
+            return fields
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                break
+            length, kind = struct.unpack('>I4s', header)
+            if kind in (b'IDAT', b'IEND'):
+                break
+            data = f.read(length)
+            f.read(4)
+            if kind == b'tEXt' and b'\0' in data:
+                key, value = data.split(b'\0', 1)
+                fields[key.decode('latin-1')] = value.decode('latin-1')
+    return fields
+
+
+def valid_thumbnail(thumb, uri, mtime):
+    """Чи є для файлу актуальна мініатюра (за Thumb::URI і Thumb::MTime)"""
+    try:
+        fields = read_png_text(thumb)
+    except OSError:
+        return False
+    return fields.get('Thumb::URI') == uri and fields.get('Thumb::MTime') == str(int(mtime))
+
+
+_tk = None
+
+
+def _interp():
+    """Прихований Tk цього процесу пулу (лише для декодування зображень)"""
+    global _tk
+    if _tk is None:
+        import tkinter
+        _tk = tkinter.Tk()
+        _tk.withdraw()
+    return _tk
+
+
+def render_thumbnail(path, size=NORMAL_SIZE):
+    """Завдання пулу: мініатюра для path
+
+    Повертає (path, mtime, файл мініатюри, чи її щойно записано).
+    """
+    st = os.stat(path)
+    uri = file_uri(path)
+    thumb = thumbnail_path(uri)
+    if valid_thumbnail(thumb, uri, st.st_mtime):
+        return path, st.st_mtime, thumb, False
+    tk = _interp()
+    tmp = f'{thumb}.{os.getpid()}.tmp'
+    os.makedirs(os.path.dirname(thumb), mode=0o700, exist_ok=True)
+    source = tk.call('image', 'create', 'photo', '-file', path)
+    small = tk.call('image', 'create', 'photo')
+    try:
+        width = int(tk.call('image', 'width', source))
+        height = int(tk.call('image', 'height', source))
+        # Tk зменшує лише в ціле число разів; менші за size не збільшуються
+        factor = max(1, -(-max(width, height) // size))
+        tk.call(small, 'copy', source, '-subsample', factor, factor)
+        tk.call(small, 'write', tmp, '-format', 'png')
+        with open(tmp, 'rb') as f:
+            data = add_png_text(f.read(), {
+                'Thumb::URI': uri,
+                'Thumb::MTime': int(st.st_mtime),
+                'Thumb::Size': st.st_size,
+                'Thumb::Image::Width': width,
+                'Thumb::Image::Height': height,
+                'Software': SOFTWARE,
+            })
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, thumb)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    finally:
+        tk.call('image', 'delete', source, small)
+    return path, st.st_mtime, thumb, True
+
+
+def evict(max_bytes=CACHE_LIMIT, root=None):
+    """Видаляти найдавніші мініатюри, поки кеш більший за max_bytes"""
+    root = root or thumbnails_root()
+    files = []
+    total = 0
+    for flavor in ('normal', 'large', 'x-large', 'xx-large'):
+        try:
+            with os.scandir(os.path.join(root, flavor)) as entries:
+                for entry in entries:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    files.append((max(st.st_atime, st.st_mtime), st.st_size, entry.path))
+                    total += st.st_size
+        except OSError:
+            continue
+    if total <= max_bytes:
+        return 0
+    files.sort()
+    removed = 0
+    for _, size, path in files:
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def read_text_head(path, max_bytes=TEXT_HEAD_BYTES, max_lines=TEXT_HEAD_LINES):
+    """Початок текстового файлу (через mmap) або None для двійкового"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return ''
+        with mmap.mmap(f.fileno(), min(size, max_bytes), access=mmap.ACCESS_READ) as mm:
+            head = mm[:]
+    if b'\0' in head:
+        return None
+    lines = head.decode('utf-8', 'replace').splitlines()[:max_lines]
+    return '\n'.join(lines)
+
+
+class ThumbnailRenderer:
+    """Черга мініатюр з пріоритетом щойно видимих файлів
+
+    prioritize(paths) ставить шляхи в кінець черги (їх буде взято
+    першими), lookup(path, mtime) повертає готову мініатюру або None.
+    on_ready(path, thumb) викликається в головному потоці, коли мініатюру
+    готово (thumb — None, якщо зображення не вдалося прочитати).
+    """
+
+    def __init__(self, widget, on_ready, workers=WORKERS, max_inflight=MAX_INFLIGHT,
+                 max_wanted=MAX_WANTED, cache_limit=CACHE_LIMIT, interval_ms=50):
+        self.widget = widget
+        self.on_ready = on_ready
+        self.workers = workers
+        self.max_inflight = max_inflight
+        self.max_wanted = max_wanted
+        self.cache_limit = cache_limit
+        self.interval_ms = interval_ms
+        self.pool = None
+        self.results = queue.Queue()
+        self.wanted = OrderedDict()
+        self.inflight = set()
+        # Відомі результати: шлях -> (mtime, мініатюра або None)
+        self.ready = OrderedDict()
+        self.max_ready = 20000
+        self.written = 0
+        self.after_id = None
+
+    def lookup(self, path, mtime=None):
+        """Готова мініатюра (якщо mtime задано — лише актуальна) або None"""
+        known = self.ready.get(path)
+        if known is None or (mtime is not None and int(known[0]) != int(mtime)):
+            return None
+        return known[1]
+
+    def prioritize(self, paths):
+        """Поставити шляхи попереду черги (останній переданий — першим)"""
+        for path in paths:
+            if path in self.inflight or path in self.ready:
+                continue
+            self.wanted[path] = True
+            self.wanted.move_to_end(path)
+        while len(self.wanted) > self.max_wanted:
+            # Давно прокручені з поля зору — відкинути
+            self.wanted.popitem(last=False)
+        self._dispatch()
+
+    def request(self, path):
+        """Мініатюра потрібна зараз (напр., файл вибрано): першою в черзі"""
+        self.ready.pop(path, None)
+        self.prioritize([path])
+
+    def _dispatch(self):
+        while self.wanted and len(self.inflight) < self.max_inflight:
+            path, _ = self.wanted.popitem(last=True)
+            if self.pool is None:
+                # multiprocessing — лише з першою мініатюрою, а не при запуску провідника
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                mp_context=multiprocessing.get_context('spawn'))
+            self.inflight.add(path)
+            future = self.pool.submit(render_thumbnail, path)
+            future.add_done_callback(lambda f, p=path: self.results.put((p, f)))
+        if self.inflight and self.after_id is None:
+            self.after_id = self.widget.after(self.interval_ms, self._poll)
+
+    def _poll(self):
+        self.after_id = None
+        while True:
+            try:
+                path, future = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.inflight.discard(path)
+            try:
+                _, mtime, thumb, written = future.result()
+            except Exception:
+                mtime, thumb, written = 0, None, False
+            self.ready[path] = (mtime, thumb)
+            self.ready.move_to_end(path)
+            if len(self.ready) > self.max_ready:
+                self.ready.popitem(last=False)
+            if written:
+                self.written += 1
+                if self.written % EVICT_EVERY == 0:
+                    threading.Thread(target=evict, args=(self.cache_limit,), daemon=True).start()
+            self.on_ready(path, thumb)
+        self._dispatch()
@@ -0,0 +1,111 @@
+"""Панель прогресу для фонових операцій копіювання/переміщення/видалення"""
+import tkinter as tk
+from tkinter import ttk
+
+import perf_trace
+from transfers import PAUSED, QUEUED, format_eta
+
+POLL_INTERVAL_MS = 250
+
+OPERATION_TITLES = {'copy': "Копіювання", 'cut': "Переміщення", 'delete': "Видалення"}
+
+
+class TransferPanel(tk.Frame):
+    """Показує по рядку на завдання: лічильники, швидкість, ETA, пауза і скасування
+
+    Панель сама опитує завдання через after() і викликає on_finished(job)
+    у головному потоці, коли завдання завершилось.
+    """
+
+    def __init__(self, master, manager, format_size, on_finished, before=None,
+                 bg='#F0F0F0', fg='black', button_bg='#E1E1E1', font=('Arial', 9)):
+        super().__init__(master, bg=bg)
+        self.manager = manager
+        self.format_size = format_size
+        self.on_finished = on_finished
+        self.before = before
+        self.colors = {'bg': bg, 'fg': fg, 'button_bg': button_bg}
+        self.font = font
+        self.rows = {}
+        self.after_id = None
+
+    def add_job(self, job):
+        """Додати рядок для нового завдання і почати опитування"""
+        c = self.colors
+        frame = tk.Frame(self, bg=c['bg'])
+        frame.pack(fill="x", pady=2)
+        label = tk.Label(frame, text="", anchor="w", bg=c['bg'], fg=c['fg'], font=self.font)
+        label.pack(side="top", fill="x")
+        # Для видалення загальна кількість елементів наперед невідома
+        mode = 'indeterminate' if job.operation == 'delete' else 'determinate'
+        bar = ttk.Progressbar(frame, mode=mode, maximum=1000)
+        bar.pack(side="left", fill="x", expand=True)
+        btn_opts = {"bg": c['button_bg'], "fg": c['fg'], "relief": "flat", "font": self.font}
+        pause_btn = tk.Button(frame, text="Пауза", width=10, **btn_opts)
+        pause_btn.configure(command=lambda: self.toggle_pause(job))
+        pause_btn.pack(side="left", padx=3)
+        tk.Button(frame, text="Скасувати", command=job.cancel, **btn_opts).pack(side="left")
+        self.rows[job] = (frame, label, bar, pause_btn)
+
+        if not self.winfo_ismapped():
+            self.pack(fill="x", padx=10, before=self.before)
+        self.update_rows()
+
+    def toggle_pause(self, job):
+        if job.state == PAUSED:
+            job.resume()
+        else:
+            job.pause()
+        self.update_rows()
+
+    def update_rows(self):
+        """Оновити рядки і передати завершені завдання у on_finished"""
+        if self.after_id is not None:
+            self.after_cancel(self.after_id)
+            self.after_id = None
+        for job, (frame, label, bar, pause_btn) in list(self.rows.items()):
+            if job.is_finished:
+                frame.destroy()
+                del self.rows[job]
+                self.manager.forget(job)
+                self.log_job(job)
+                self.on_finished(job)
+                continue
+            label.configure(text=self.describe(job))
+            if job.bytes_total:
+                bar.configure(value=1000 * job.bytes_done / job.bytes_total)
+            elif job.operation == 'delete' and job.state != PAUSED:
+                bar.step(40)
+            pause_btn.configure(text="Продовжити" if job.state == PAUSED else "Пауза")
+        if self.rows:
+            self.after_id = self.after(POLL_INTERVAL_MS, self.update_rows)
+        else:
+            self.pack_forget()
+
+    def log_job(self, job):
+        """Записати завершене завдання в журнал perf_trace"""
+        if job.started is None or job.finished is None:
+            return
+        counts = {'files': job.files_done, 'bytes': job.bytes_done}
+        if job.errors:
+            counts['errors'] = len(job.errors)
+        perf_trace.log(job.operation, job.finished - job.started, counts=counts,
+                       state=job.state, methods=dict(job.methods))
+
+    def describe(self, job):
+        title = OPERATION_TITLES.get(job.operation, job.operation)
+        if job.state == QUEUED:
+            return f"{title}: у черзі ({len(job.pairs)} елементів)"
+        if job.operation == 'delete':
+            text = f"{title}: видалено {job.files_done} елементів"
+            if job.errors:
+                text += f", помилок: {len(job.errors)}"
+            if job.state == PAUSED:
+                return text + " — пауза"
+            return text + f", {job.item_rate():.0f}/с"
+        text = (f"{title}: {job.files_done}/{job.files_total} файлів, "
+                f"{self.format_size(job.bytes_done)} з {self.format_size(job.bytes_total)}")
+        if job.state == PAUSED:
+            return text + " — пауза"
+        rate = job.throughput()
+        return text + f", {self.format_size(rate)}/с, залишилось {format_eta(job.eta())}"
@@ -0,0 +1,237 @@
+"""Планування вставлення до того, як буде передано хоч один байт.
+
+Джерела обходяться один раз потоковим scandir: рахуються байти, файли і
+директорії, перевіряється вільне місце в призначенні. Конфлікти імен
+шукаються за одним списком директорії призначення і вирішуються пакетно
+(перейменувати з суфіксом, пропустити або замінити) без перевірки
+os.path.exists для кожного кандидата.
+"""
+import os
+import queue
+import stat
+import threading
+import time
+
+import archives
+import fastcopy
+import perf_trace
+
+RENAME = 'rename'
+SKIP = 'skip'
+OVERWRITE = 'overwrite'
+
+
+class SourceWalk:
+    """Результат обходу одного джерела (шляхи відносно нього)
+
+    dirs — відносні шляхи директорій (першою — сама директорія, ''),
+    files — (відносний шлях, розмір); розмір -1 означає посилання на
+    директорію, яке відтворюється як посилання.
+    """
+
+    def __init__(self, src, is_dir):
+        self.src = src
+        self.is_dir = is_dir
+        self.dirs = []
+        self.files = []
+        self.bytes = 0
+        self.errors = []
+
+
+def walk_archive(src):
+    """Обхід файлу чи папки всередині архіву за індексом (без розпакування)"""
+    dirs, files = archives.walk(src)
+    walk = SourceWalk(src, bool(dirs))
+    walk.dirs = dirs
+    walk.files = files
+    walk.bytes = sum(size for _, size in files)
+    return walk
+
+
+def walk_source(src, checkpoint=None):
+    """Обійти джерело потоковим scandir (без рекурсії Python)"""
+    if archives.is_member(src):
+        return walk_archive(src)
+    st = os.stat(src)
+    if not stat.S_ISDIR(st.st_mode):
+        walk = SourceWalk(src, False)
+        walk.files.append(('', st.st_size))
+        walk.bytes = st.st_size
+        return walk
+    walk = SourceWalk(src, True)
+    stack = ['']
+    while stack:
+        if checkpoint:
+            checkpoint()
+        rel_dir = stack.pop()
+        walk.dirs.append(rel_dir)
+        abs_dir = os.path.join(src, rel_dir) if rel_dir else src
+        try:
+            with os.scandir(abs_dir) as entries:
+                for entry in entries:
+                    rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                    try:
+                        if entry.is_symlink() and entry.is_dir():
+                            walk.files.append((rel, -1))
+                        elif entry.is_dir():
+                            stack.append(rel)
+                        else:
+                            size = entry.stat().st_size
+                            walk.files.append((rel, size))
+                            walk.bytes += size
+                    except OSError as e:
+                        walk.errors.append((entry.path, str(e)))
+        except OSError as e:
+            walk.errors.append((abs_dir, str(e)))
+    return walk
+
+
+class TransferPlan:
+    """План вставлення: обходи джерел, конфлікти, підсумки і вільне місце"""
+
+    def __init__(self, sources, dest_dir, operation):
+        self.sources = list(sources)
+        self.dest_dir = dest_dir
+        self.operation = operation
+        self.walks = {}        # джерело -> SourceWalk (немає для перейменувань)
+        self.renames = set()   # джерела, що переміщуються перейменуванням
+        self.conflicts = []    # назви, що вже є в призначенні
+        self.self_copies = set()  # джерела, що копіюються у власну папку
+        self.existing = set()
+        self.errors = []
+        self.bytes_total = 0
+        self.files_total = 0
+        self.dirs_total = 0
+        self.free_bytes = None
+
+    @property
+    def enough_space(self):
+        return self.free_bytes is None or self.bytes_total <= self.free_bytes
+
+    def resolve(self, policy):
+        """Пакетно вирішити конфлікти і повернути пари (джерело, призначення)"""
+        taken = set(self.existing)
+        pairs = []
+        for src in self.sources:
+            if src not in self.walks and src not in self.renames:
+                continue
+            name = os.path.basename(src.rstrip(os.sep))
+            if src in self.self_copies:
+                # Копія поруч з оригіналом — завжди під новою назвою,
+                # інакше призначення збіглося б із джерелом
+                name = unique_name(name, taken)
+            elif name in taken:
+                if policy == SKIP:
+                    continue
+                if policy == RENAME:
+                    name = unique_name(name, taken)
+            taken.add(name)
+            pairs.append((src, os.path.join(self.dest_dir, name)))
+        return pairs
+
+    def totals_for(self, pairs):
+        """Байти і файли для вибраних пар (після пропусків)"""
+        walks = [self.walks[src] for src, _ in pairs if src in self.walks]
+        return sum(w.bytes for w in walks), sum(len(w.files) for w in walks)
+
+
+def unique_name(name, taken):
+    """Назва з суфіксом « (N)», якої ще немає серед taken"""
+    base, ext = os.path.splitext(name)
+    if name.startswith('.') and not ext:
+        base, ext = name, ''
+    counter = 1
+    candidate = f"{base} ({counter}){ext}"
+    while candidate in taken:
+        counter += 1
+        candidate = f"{base} ({counter}){ext}"
+    return candidate
+
+
+def same_file(src, dest):
+    """Чи dest — той самий файл, що й src (False, якщо dest немає)"""
+    try:
+        return os.path.samefile(src, dest)
+    except OSError:
+        return False
+
+
+def build_plan(sources, dest_dir, operation, checkpoint=None):
+    """Скласти план: один список призначення і один обхід кожного джерела"""
+    started = time.perf_counter()
+    plan = TransferPlan(sources, dest_dir, operation)
+    try:
+        plan.existing = set(os.listdir(dest_dir))
+    except OSError as e:
+        plan.errors.append((dest_dir, str(e)))
+        return plan
+
+    real_dest = os.path.realpath(dest_dir)
+    for src in plan.sources:
+        if checkpoint:
+            checkpoint()
+        in_archive = archives.is_member(src)
+        if not in_archive and not os.path.lexists(src):
+            continue
+        if in_archive and operation == 'cut':
+            plan.errors.append((src, "Архів лише для читання: вміст можна тільки копіювати"))
+            continue
+        real_src = os.path.realpath(src)
+        if os.path.isdir(src) and (real_dest == real_src or real_dest.startswith(real_src + os.sep)):
+            plan.errors.append((src, "Не можна вставити папку саму в себе"))
+            continue
+        name = os.path.basename(src.rstrip(os.sep))
+        if name in plan.existing:
+            if same_file(src, os.path.join(dest_dir, name)):
+                if operation == 'cut':
+                    # Переміщення в ту саму папку нічого не змінює
+                    continue
+                plan.self_copies.add(src)
+            else:
+                plan.conflicts.append(name)
+        if operation == 'cut' and fastcopy.same_device(src, dest_dir):
+            # Байти не переносяться — обхід і місце не потрібні
+            plan.renames.add(src)
+            continue
+        try:
+            walk = walk_source(src, checkpoint)
+        except OSError as e:
+            plan.errors.append((src, str(e)))
+            continue
+        plan.walks[src] = walk
+        plan.errors.extend(walk.errors)
+        plan.bytes_total += walk.bytes
+        plan.files_total += len(walk.files)
+        plan.dirs_total += len(walk.dirs)
+
+    try:
+        vfs = os.statvfs(dest_dir)
+        plan.free_bytes = vfs.f_bavail * vfs.f_frsize
+    except (OSError, AttributeError):
+        plan.free_bytes = None
+    perf_trace.add('plan', time.perf_counter() - started, walked=plan.files_total)
+    return plan
+
+
+def plan_async(widget, sources, dest_dir, operation, on_ready, interval_ms=50):
+    """Скласти план у фоновому потоці і передати його в on_ready(plan) через after()"""
+    result = queue.Queue()
+
+    def worker():
+        try:
+            result.put(build_plan(sources, dest_dir, operation))
+        except Exception as e:
+            plan = TransferPlan(sources, dest_dir, operation)
+            plan.errors.append((dest_dir, str(e)))
+            result.put(plan)
+
+    def poll():
+        try:
+            plan = result.get_nowait()
+        except queue.Empty:
+            widget.after(interval_ms, poll)
+            return
+        on_ready(plan)
+
+    threading.Thread(target=worker, daemon=True).start()
+    widget.after(interval_ms, poll)
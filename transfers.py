@@ -0,0 +1,333 @@
+"""Асинхронне копіювання і переміщення файлів.
+
+Завдання ставляться в чергу і виконуються по одному у фоновому потоці.
+Дрібні файли копіюються паралельно пулом потоків, великі — послідовно
+потоковим читанням блоками, з перевіркою паузи/скасування між блоками.
+Самі байти передає fastcopy (reflink, copy_file_range, sendfile, буфер),
+а кожне завдання рахує, скільки файлів пройшло яким шляхом.
+Інтерфейс лише читає лічильники завдання і нічого не чекає.
+"""
+import collections
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import archives
+import fastcopy
+from transfer_plan import same_file, walk_source
+
+# Файли до цього розміру копіюються паралельно
+SMALL_FILE_LIMIT = 8 * 1024 * 1024
+WORKERS = 4
+
+QUEUED = 'queued'
+RUNNING = 'running'
+PAUSED = 'paused'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class TransferCancelled(Exception):
+    """Завдання скасовано користувачем"""
+
+
+class TransferJob:
+    """Завдання: скопіювати або перемістити пари (джерело, призначення)
+
+    Лічильники байтів і файлів оновлюються робочими потоками і читаються
+    інтерфейсом без блокувань. plan — TransferPlan з уже зробленими
+    обходами джерел, щоб не обходити їх удруге. completed — шляхи призначення верхнього
+    рівня, що з'явились; removed — джерела, що зникли при переміщенні.
+    """
+
+    def __init__(self, pairs, operation, plan=None):
+        self.pairs = list(pairs)
+        self.operation = operation
+        self.plan = plan
+        self.state = QUEUED
+        self.bytes_total = 0
+        self.bytes_done = 0
+        self.files_total = 0
+        self.files_done = 0
+        self.errors = []
+        self.methods = collections.Counter()
+        self.completed = []
+        self.removed = []
+        self.started = None
+        self.finished = None
+        self.lock = threading.Lock()
+        self.running = threading.Event()
+        self.running.set()
+        self.cancelled = threading.Event()
+        self.samples = collections.deque(maxlen=20)
+
+    @property
+    def is_finished(self):
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    def pause(self):
+        if self.state in (QUEUED, RUNNING):
+            self.running.clear()
+            self.state = PAUSED
+
+    def resume(self):
+        if self.state == PAUSED:
+            self.state = RUNNING if self.started is not None else QUEUED
+            self.running.set()
+
+    def cancel(self):
+        self.cancelled.set()
+        self.running.set()
+
+    def checkpoint(self):
+        """Зачекати, поки завдання на паузі; перервати, якщо скасовано"""
+        if not self.running.is_set():
+            self.running.wait()
+        if self.cancelled.is_set():
+            raise TransferCancelled()
+
+    def add_progress(self, nbytes, files=0):
+        with self.lock:
+            self.bytes_done += nbytes
+            self.files_done += files
+            now = time.monotonic()
+            if not self.samples or now - self.samples[-1][0] >= 0.25:
+                self.samples.append((now, self.bytes_done))
+
+    def record_method(self, method, count=1):
+        """Запам'ятати, яким примітивом перенесено файл(и)"""
+        with self.lock:
+            self.methods[method] += count
+
+    def method_summary(self):
+        """Рядок «метод: кількість» для перевірки використаних шляхів"""
+        return ", ".join(f"{name}: {count}" for name, count in self.methods.most_common())
+
+    def add_error(self, path, error):
+        with self.lock:
+            self.errors.append((path, str(error)))
+
+    def throughput(self):
+        """Швидкість за останні кілька секунд (байт/с)"""
+        if self.state == PAUSED or len(self.samples) < 2:
+            return 0.0
+        (t0, b0), (t1, b1) = self.samples[0], self.samples[-1]
+        if time.monotonic() - t1 > 2:
+            return 0.0
+        return (b1 - b0) / (t1 - t0) if t1 > t0 else 0.0
+
+    def eta(self):
+        """Орієнтовний залишок часу (с) або None"""
+        rate = self.throughput()
+        if rate <= 0:
+            return None
+        return max(0.0, (self.bytes_total - self.bytes_done) / rate)
+
+
+class TransferManager:
+    """Черга завдань перенесення з пулом робочих потоків"""
+
+    def __init__(self, workers=WORKERS, small_file_limit=SMALL_FILE_LIMIT):
+        self.small_file_limit = small_file_limit
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='transfer')
+        self.queue = queue.Queue()
+        self.jobs = []
+        self.thread = threading.Thread(target=self._dispatch, daemon=True)
+        self.thread.start()
+
+    def submit(self, job):
+        """Поставити завдання в чергу"""
+        self.jobs.append(job)
+        self.queue.put(job)
+        return job
+
+    def active_jobs(self):
+        return [job for job in self.jobs if not job.is_finished]
+
+    def forget(self, job):
+        """Прибрати завершене завдання зі списку"""
+        if job in self.jobs:
+            self.jobs.remove(job)
+
+    def _dispatch(self):
+        while True:
+            job = self.queue.get()
+            if job.cancelled.is_set():
+                job.state = CANCELLED
+                continue
+            try:
+                job.checkpoint()
+            except TransferCancelled:
+                job.state = CANCELLED
+                continue
+            self._run(job)
+
+    # ---- Виконання завдання ----
+
+    def _run(self, job):
+        job.state = RUNNING
+        job.started = time.monotonic()
+        try:
+            dirs = []
+            files = []
+            copied_pairs = []
+            for src, dest in job.pairs:
+                job.checkpoint()
+                if job.operation == 'cut' and self._try_rename(job, src, dest):
+                    continue
+                try:
+                    self._collect(job, src, dest, dirs, files)
+                    copied_pairs.append((src, dest))
+                except OSError as e:
+                    job.add_error(src, e)
+
+            for path, src in dirs:
+                job.checkpoint()
+                try:
+                    os.makedirs(path, exist_ok=True)
+                except OSError as e:
+                    job.add_error(src, e)
+
+            small = [f for f in files if f[2] < self.small_file_limit]
+            large = [f for f in files if f[2] >= self.small_file_limit]
+            futures = [self.pool.submit(self._copy_small, job, *f) for f in small]
+            try:
+                # Великі файли — послідовно, щоб не розпорошувати диск
+                for f in large:
+                    job.checkpoint()
+                    self._copy_large(job, *f)
+            finally:
+                wait(futures)
+
+            job.checkpoint()
+            # Атрибути директорій — після файлів, щоб не збити mtime
+            for path, src in reversed(dirs):
+                try:
+                    shutil.copystat(src, path)
+                except OSError:
+                    pass
+
+            failed = {path for path, _ in job.errors}
+            for src, dest in copied_pairs:
+                job.completed.append(dest)
+                if job.operation == 'cut' and not any(p == src or p.startswith(src + os.sep) for p in failed):
+                    self._remove_source(job, src)
+            job.state = FAILED if job.errors else DONE
+        except TransferCancelled:
+            job.state = CANCELLED
+            # Перейменовані до скасування вже є в completed
+            done = set(job.completed)
+            job.completed.extend(dest for _, dest in job.pairs if dest not in done and os.path.lexists(dest))
+        except Exception as e:
+            job.add_error('', e)
+            job.state = FAILED
+        finally:
+            job.finished = time.monotonic()
+
+    def _try_rename(self, job, src, dest):
+        """Переміщення в межах одного пристрою — атомарне перейменування"""
+        if not fastcopy.move_if_same_device(src, dest):
+            return False
+        job.record_method(fastcopy.RENAME)
+        job.completed.append(dest)
+        job.removed.append(src)
+        return True
+
+    def _collect(self, job, src, dest, dirs, files):
+        """Скласти списки директорій і файлів до копіювання
+
+        Обхід береться з плану, якщо його вже зроблено перед підтвердженням,
+        інакше джерело обходиться тут.
+        """
+        if same_file(src, dest):
+            # Копіювання файлу в самого себе обнулило б джерело
+            raise shutil.SameFileError(f"{src} і {dest} — той самий файл")
+        walk = job.plan.walks.get(src) if job.plan is not None else None
+        if walk is None:
+            walk = walk_source(src, job.checkpoint)
+        for path, error in walk.errors:
+            job.add_error(path, error)
+        for rel in walk.dirs:
+            dirs.append((os.path.join(dest, rel) if rel else dest,
+                         os.path.join(src, rel) if rel else src))
+        for rel, size in walk.files:
+            files.append((os.path.join(src, rel) if rel else src,
+                          os.path.join(dest, rel) if rel else dest, size))
+        job.bytes_total += walk.bytes
+        job.files_total += len(walk.files)
+
+    def _copy_small(self, job, src, dest, size):
+        try:
+            job.checkpoint()
+            if size < 0:
+                # Посилання на директорію відтворюється як посилання
+                os.symlink(os.readlink(src), dest)
+                job.record_method(fastcopy.SYMLINK)
+                job.add_progress(0, 1)
+                return
+            job.record_method(copy_with_attrs(src, dest))
+            job.add_progress(size, 1)
+        except TransferCancelled:
+            pass
+        except OSError as e:
+            job.add_error(src, e)
+
+    def _copy_large(self, job, src, dest, size):
+        """Потокове копіювання блоками з перевіркою паузи і скасування"""
+        try:
+            job.record_method(copy_with_attrs(src, dest, progress=job.add_progress,
+                                              checkpoint=job.checkpoint))
+            job.add_progress(0, 1)
+        except OSError as e:
+            job.add_error(src, e)
+
+    def _remove_source(self, job, src):
+        try:
+            if os.path.isdir(src) and not os.path.islink(src):
+                shutil.rmtree(src)
+            else:
+                os.remove(src)
+            job.removed.append(src)
+        except OSError as e:
+            job.add_error(src, e)
+
+
+def copy_with_attrs(src, dest, progress=None, checkpoint=None):
+    """Скопіювати файл з атрибутами; член архіву розпаковується потоково
+
+    Дані пишуться в тимчасовий файл поруч і замінюють dest лише після
+    успіху, тож наявний dest (політика OVERWRITE) переживе невдалу копію
+    чи скасування.
+    """
+    folder, name = os.path.split(dest)
+    tmp = os.path.join(folder, f".{name}.{uuid.uuid4().hex[:8]}.part")
+    try:
+        if archives.is_member(src):
+            archives.copy_member(src, tmp, progress, checkpoint)
+            method = archives.EXTRACT
+        else:
+            method = fastcopy.copy_file(src, tmp, progress=progress, checkpoint=checkpoint)
+            shutil.copystat(src, tmp)
+        os.replace(tmp, dest)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return method
+
+
+def format_eta(seconds):
+    """Залишок часу у вигляді г:хх:сс або хв:сс"""
+    if seconds is None:
+        return "—"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02}:{secs:02}" if hours else f"{minutes}:{secs:02}"
@@ -0,0 +1,182 @@
+"""Рекурсивний пошук «тут» без індексу, з потоковою видачею результатів.
+
+Обхід починається з поточної директорії і розходиться по піддиректоріях
+обмеженим пулом потоків (одне завдання — одна директорія). Назви
+перевіряються за підрядком, glob або регулярним виразом; stat робиться
+лише для тих записів, чия назва вже підійшла, і лише якщо задано умови
+на розмір чи час зміни. Посилання на директорії обходяться, але кожна
+директорія відвідується один раз за (st_dev, st_ino) — петлі неможливі.
+"""
+import fnmatch
+import os
+import re
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dir_scanner import ScanEntry
+
+WORKERS = 8
+GLOB_CHARS = set('*?[')
+
+
+class SearchCriteria:
+    """Умови пошуку; розміри в байтах, modified_within — в секундах"""
+
+    def __init__(self, pattern, regex=False, min_size=None, max_size=None,
+                 modified_within=None, max_depth=None, follow_symlinks=True):
+        self.pattern = pattern
+        self.min_size = min_size
+        self.max_size = max_size
+        self.modified_within = modified_within
+        self.max_depth = max_depth
+        self.follow_symlinks = follow_symlinks
+        if regex:
+            self.match_name = re.compile(pattern, re.IGNORECASE).search
+        elif GLOB_CHARS & set(pattern):
+            self.match_name = re.compile(fnmatch.translate(pattern), re.IGNORECASE).match
+        else:
+            needle = pattern.lower()
+            self.match_name = lambda name: needle in name.lower()
+
+    @property
+    def needs_stat(self):
+        return (self.min_size is not None or self.max_size is not None
+                or self.modified_within is not None)
+
+    def match_stat(self, st, now):
+        if self.min_size is not None and st.st_size < self.min_size:
+            return False
+        if self.max_size is not None and st.st_size > self.max_size:
+            return False
+        if self.modified_within is not None and now - st.st_mtime > self.modified_within:
+            return False
+        return True
+
+
+def name_filter(pattern):
+    """Предикат рядка для швидкого фільтра списку: підрядок або glob у назві"""
+    match_name = SearchCriteria(pattern).match_name
+    return lambda row: match_name(row.name)
+
+
+def narrows(old, new):
+    """Чи новий запит фільтра лише звужує старий (старий підрядок — його частина)"""
+    return bool(old) and not GLOB_CHARS & set(old + new) and old.lower() in new.lower()
+
+
+class RecursiveSearch:
+    """Пошук у піддереві root; знайдене забирається через take()
+
+    Назви результатів — шляхи відносно root. done стає True, коли обхід
+    завершено або скасовано.
+    """
+
+    def __init__(self, root, criteria, workers=WORKERS):
+        self.root = root
+        self.criteria = criteria
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.results = []
+        self.visited = set()
+        self.found = 0
+        self.dirs_scanned = 0
+        self.errors = 0
+        self.pending = 0
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+        self.started = None
+        self.elapsed = None
+        self.pool = None
+
+    def start(self):
+        self.started = time.monotonic()
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='search')
+        self.pending = 1
+        self.pool.submit(self._visit, self.root, 0)
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+
+    @property
+    def done(self):
+        return self.finished.is_set()
+
+    def take(self):
+        """Забрати результати, знайдені з минулого виклику"""
+        with self.lock:
+            results, self.results = self.results, []
+        return results
+
+    def rate(self):
+        """Результатів за секунду від початку пошуку"""
+        elapsed = self.elapsed if self.elapsed is not None else time.monotonic() - self.started
+        return self.found / elapsed if elapsed > 0 else 0.0
+
+    def _visit(self, path, depth):
+        try:
+            if not self.cancelled.is_set():
+                self._scan(path, depth)
+        except OSError:
+            with self.lock:
+                self.errors += 1
+        finally:
+            with self.lock:
+                self.pending -= 1
+                last = self.pending == 0
+            if last:
+                self.elapsed = time.monotonic() - self.started
+                self.finished.set()
+                self.pool.shutdown(wait=False)
+
+    def _scan(self, path, depth):
+        st = os.stat(path)
+        key = (st.st_dev, st.st_ino)
+        with self.lock:
+            if key in self.visited:
+                return
+            self.visited.add(key)
+            self.dirs_scanned += 1
+
+        criteria = self.criteria
+        descend = criteria.max_depth is None or depth < criteria.max_depth
+        now = time.time()
+        matches = []
+        subdirs = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if self.cancelled.is_set():
+                    return
+                try:
+                    is_dir = entry.is_dir()
+                    if descend and is_dir and (criteria.follow_symlinks or not entry.is_symlink()):
+                        subdirs.append(entry.path)
+                    if not criteria.match_name(entry.name):
+                        continue
+                    entry_st = None
+                    if criteria.needs_stat:
+                        entry_st = entry.stat()
+                        if not criteria.match_stat(entry_st, now):
+                            continue
+                    matches.append(self._make_entry(entry, is_dir, entry_st))
+                except OSError:
+                    with self.lock:
+                        self.errors += 1
+
+        with self.lock:
+            self.results.extend(matches)
+            self.found += len(matches)
+            self.pending += len(subdirs)
+        for sub in subdirs:
+            self.pool.submit(self._visit, sub, depth + 1)
+
+    def _make_entry(self, entry, is_dir, st):
+        if st is None:
+            try:
+                st = entry.stat()
+            except OSError:
+                st = entry.stat(follow_symlinks=False)
+        size = 0 if stat.S_ISDIR(st.st_mode) else st.st_size
+        return ScanEntry(os.path.relpath(entry.path, self.root), entry.path, is_dir, size, st.st_mtime)
@@ -0,0 +1,412 @@
+"""Віртуалізований список на основі ttk.Treeview.
+
+Повний список рядків живе у Python-моделі, а в самому Treeview існує лише
+невеликий пул елементів на видиму область (плюс кілька рядків запасу).
+При прокручуванні елементи пулу перевикористовуються, тож кількість
+Tk-елементів не залежить від розміру директорії.
+
+Самі рядки, індекс, сортування і фільтр — у RowList (directory_model),
+тут до них додаються прокрутка, виділення і малювання.
+"""
+import time
+from tkinter import ttk
+
+import perf_trace
+from directory_model import RowList
+
+DEFAULT_ROW_HEIGHT = 20
+
+
+class VirtualTreeview(RowList):
+    """Показує великий список рядків через фіксований пул елементів Treeview
+
+    format_row(row) повертає (text, values) для рядка моделі,
+    key(row) — стабільний ключ рядка для збереження виділення,
+    on_visible(rows) викликається після кожного перемальовування з
+    рядками, що зараз на екрані (напр., щоб дочитати їх метадані першими).
+    """
+
+    def __init__(self, tree, scrollbar, format_row, key=None,
+                 on_select=None, overscan=4, on_visible=None):
+        super().__init__(key)
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.format_row = format_row
+        self.on_select = on_select
+        self.on_visible = on_visible
+        self.overscan = overscan
+
+        self.offset = 0
+        self.visible = 1
+        self.slots = []
+        self.slot_content = []
+        self.shown_selection = ()
+
+        # Виділення зберігається у моделі: ключ -> рядок (у порядку вибору)
+        self.selected = {}
+        self.anchor = None
+        self.cursor = None
+        self.multiple = str(tree.cget('selectmode')) == 'extended'
+
+        if scrollbar is not None:
+            scrollbar.configure(command=self.yview)
+        tree.configure(yscrollcommand='')
+
+        tree.bind('<Configure>', self._on_configure, add='+')
+        tree.bind('<MouseWheel>', self._on_wheel)
+        tree.bind('<Button-4>', lambda e: self._scroll_units(-3))
+        tree.bind('<Button-5>', lambda e: self._scroll_units(3))
+        tree.bind('<Button-1>', self._on_click)
+        tree.bind('<Control-Button-1>', self._on_ctrl_click)
+        tree.bind('<Shift-Button-1>', self._on_shift_click)
+        for key, step in (('Up', -1), ('Down', 1)):
+            tree.bind(f'<{key}>', lambda e, s=step: self._move_cursor(s, False))
+            tree.bind(f'<Shift-{key}>', lambda e, s=step: self._move_cursor(s, True))
+        tree.bind('<Prior>', lambda e: self._move_cursor(-self.visible, False))
+        tree.bind('<Next>', lambda e: self._move_cursor(self.visible, False))
+        tree.bind('<Home>', lambda e: self._move_cursor(-len(self.rows), False))
+        tree.bind('<End>', lambda e: self._move_cursor(len(self.rows), False))
+        tree.bind('<Control-a>', self._select_all)
+
+        self._ensure_slots()
+
+    # ---- Модель ----
+
+    def set_rows(self, rows, keep_view=False):
+        """Замінити всі рядки моделі
+
+        keep_view=True зберігає прокрутку і виділення наявних рядків.
+        """
+        super().set_rows(rows)
+        if not keep_view:
+            self.offset = 0
+            self.selected = {}
+            self.anchor = None
+            self.cursor = None
+        elif self.selected:
+            visible = self.index if self.row_filter is None else {self.key(row): row for row in self.rows}
+            self.selected = {
+                key: visible[key] for key in self.selected if key in visible
+            }
+        if self.cursor is not None and self.cursor >= len(self.rows):
+            self.cursor = None
+        if self.anchor is not None and self.anchor >= len(self.rows):
+            self.anchor = None
+        self.refresh()
+
+    def append_rows(self, rows):
+        """Додати рядки в кінець моделі"""
+        start = len(self.rows)
+        super().append_rows(rows)
+        if start < self.offset + len(self.slots):
+            self.refresh()
+        else:
+            self._update_scrollbar()
+
+    def apply_changes(self, upserts=(), removals=()):
+        """Точково оновити модель: додати/замінити рядки і прибрати ключі
+
+        Видима область зсувається так, щоб показані рядки не «стрибали»;
+        виділення лишається за ключами, що залишились показаними.
+        """
+        for key in removals:
+            self.selected.pop(key, None)
+        super().apply_changes(upserts, removals)
+        if self.selected:
+            match = self.row_filter
+            self.selected = {
+                key: self.index[key] for key in self.selected
+                if key in self.index and (match is None or match(self.index[key]))
+            }
+        self.refresh()
+
+    def set_filter(self, match, narrow=False):
+        """Показати лише рядки, для яких match(row) істинне (None — усі)
+
+        Перемальовуються лише елементи пулу, чий вміст змінився.
+        """
+        if match is None and self.row_filter is None:
+            return
+        super().set_filter(match, narrow)
+        if match is not None:
+            self.selected = {key: row for key, row in self.selected.items() if match(row)}
+        self.offset = 0
+        self.anchor = None
+        self.cursor = None
+        self.refresh()
+
+    def sort_by(self, name, key, reverse=False):
+        """Відсортувати модель за ключем колонки і перемалювати одним проходом
+
+        Виділення зберігається (воно в моделі), курсор іде за своїм рядком.
+        """
+        cursor_row = self.rows[self.cursor] if self.cursor is not None else None
+        super().sort_by(name, key, reverse)
+        self.anchor = None
+        self.cursor = self.find_index(cursor_row) if cursor_row is not None else None
+        self.offset = 0
+        if self.cursor is not None:
+            self.see(self.cursor)
+        self.refresh()
+
+    def _insert_at(self, idx, row):
+        self.rows.insert(idx, row)
+        if idx < self.offset:
+            self.offset += 1
+        if self.cursor is not None and idx <= self.cursor:
+            self.cursor += 1
+        if self.anchor is not None and idx <= self.anchor:
+            self.anchor += 1
+
+    def _remove_at(self, idx):
+        del self.rows[idx]
+        if idx < self.offset:
+            self.offset -= 1
+        if self.cursor is not None and idx <= self.cursor:
+            self.cursor = self.cursor - 1 if idx < self.cursor else None
+        if self.anchor is not None and idx <= self.anchor:
+            self.anchor = self.anchor - 1 if idx < self.anchor else None
+
+    def row_at(self, iid):
+        """Рядок моделі, показаний елементом iid"""
+        try:
+            idx = self.offset + self.slots.index(iid)
+        except ValueError:
+            return None
+        return self.rows[idx] if idx < len(self.rows) else None
+
+    def row_at_y(self, y):
+        """Рядок моделі під координатою y"""
+        iid = self.tree.identify_row(y)
+        return self.row_at(iid) if iid else None
+
+    def selected_rows(self):
+        """Виділені рядки моделі"""
+        return list(self.selected.values())
+
+    def select_at(self, y):
+        """Виділити рядок під координатою y (для контекстного меню)"""
+        idx = self._index_at_y(y)
+        if idx is not None and self.key(self.rows[idx]) not in self.selected:
+            self._select_range(idx, idx)
+
+    # ---- Прокручування ----
+
+    def yview(self, *args):
+        """Обробник команд смуги прокручування"""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * len(self.rows)))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= max(1, self.visible - 1)
+            self._scroll_units(amount)
+
+    def scroll_to(self, offset):
+        """Показати рядки починаючи з offset"""
+        offset = max(0, min(offset, len(self.rows) - self.visible))
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+
+    def see(self, idx):
+        """Прокрутити так, щоб рядок idx був видимим"""
+        if idx < self.offset:
+            self.scroll_to(idx)
+        elif idx >= self.offset + self.visible:
+            self.scroll_to(idx - self.visible + 1)
+
+    def _scroll_units(self, amount):
+        self.scroll_to(self.offset + amount)
+        return "break"
+
+    def _on_wheel(self, event):
+        return self._scroll_units(-3 if event.delta > 0 else 3)
+
+    # ---- Відображення ----
+
+    def refresh(self):
+        """Перемалювати видимі елементи пулу, змінюючи лише те, що змінилось"""
+        started = time.perf_counter()
+        tree = self.tree
+        n = len(self.rows)
+        if self.offset > max(0, n - self.visible):
+            self.offset = max(0, n - self.visible)
+        # Час format_row і кількість викликів Tk — для perf_trace
+        formatting = 0.0
+        calls = 0
+        for i, slot in enumerate(self.slots):
+            idx = self.offset + i
+            if idx < n:
+                t = time.perf_counter()
+                content = self.format_row(self.rows[idx])
+                formatting += time.perf_counter() - t
+                if self.slot_content[i] is None:
+                    tree.move(slot, '', i)
+                    calls += 1
+                if content != self.slot_content[i]:
+                    tree.item(slot, text=content[0], values=content[1])
+                    self.slot_content[i] = content
+                    calls += 1
+            elif self.slot_content[i] is not None:
+                tree.detach(slot)
+                self.slot_content[i] = None
+                calls += 1
+        self._show_selection()
+        self._update_scrollbar()
+        perf_trace.add('format', formatting)
+        perf_trace.add('render', time.perf_counter() - started - formatting, tk=calls)
+        if self.on_visible is not None and n:
+            self.on_visible(self.rows[self.offset:self.offset + len(self.slots)])
+
+    def _ensure_slots(self):
+        """Створити достатньо елементів пулу для поточної висоти"""
+        needed = self.visible + self.overscan
+        while len(self.slots) < needed:
+            slot = f"slot{len(self.slots)}"
+            self.tree.insert('', 'end', iid=slot)
+            self.tree.detach(slot)
+            self.slots.append(slot)
+            self.slot_content.append(None)
+
+    def _on_configure(self, event):
+        # Висоту рядка і заголовка краще виміряти на вже показаному елементі
+        bbox = self.tree.bbox(self.slots[0]) if self.slot_content[0] is not None else None
+        if bbox:
+            top, row_height = bbox[1], bbox[3]
+        else:
+            top, row_height = self._heading_height(), self._row_height()
+        visible = max(1, (event.height - top) // max(1, row_height))
+        if visible != self.visible:
+            self.visible = visible
+            self._ensure_slots()
+            self.refresh()
+
+    def _row_height(self):
+        height = ttk.Style(self.tree).lookup('Treeview', 'rowheight')
+        try:
+            return int(height) if height else DEFAULT_ROW_HEIGHT
+        except ValueError:
+            return DEFAULT_ROW_HEIGHT
+
+    def _heading_height(self):
+        if 'headings' not in str(self.tree.cget('show')):
+            return 0
+        return DEFAULT_ROW_HEIGHT + 4
+
+    def _update_scrollbar(self):
+        if self.scrollbar is None:
+            return
+        n = len(self.rows)
+        if n <= self.visible:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / n, min(1.0, (self.offset + self.visible) / n))
+
+    def _show_selection(self):
+        shown = tuple(
+            slot for i, slot in enumerate(self.slots)
+            if self.slot_content[i] is not None
+            and self.key(self.rows[self.offset + i]) in self.selected
+        )
+        if shown != self.shown_selection:
+            self.tree.selection_set(shown)
+            self.shown_selection = shown
+        if self.cursor is not None and 0 <= self.cursor - self.offset < len(self.slots):
+            slot = self.slots[self.cursor - self.offset]
+            if self.slot_content[self.cursor - self.offset] is not None:
+                self.tree.focus(slot)
+
+    # ---- Виділення ----
+
+    def _index_at_y(self, y):
+        iid = self.tree.identify_row(y)
+        if not iid:
+            return None
+        try:
+            idx = self.offset + self.slots.index(iid)
+        except ValueError:
+            return None
+        return idx if idx < len(self.rows) else None
+
+    def _select_range(self, start, end, extend=False):
+        if not extend:
+            self.selected = {}
+        lo, hi = min(start, end), max(start, end)
+        for row in self.rows[lo:hi + 1]:
+            self.selected[self.key(row)] = row
+        self.cursor = end
+        self.see(end)
+        self._show_selection()
+        self._notify()
+
+    def _notify(self):
+        if self.on_select:
+            self.on_select(None)
+
+    def _in_cells(self, event):
+        return self.tree.identify_region(event.x, event.y) in ('tree', 'cell')
+
+    def _on_click(self, event):
+        if not self._in_cells(event):
+            return None
+        self.tree.focus_set()
+        idx = self._index_at_y(event.y)
+        if idx is None:
+            return "break"
+        self.anchor = idx
+        self._select_range(idx, idx)
+        return "break"
+
+    def _on_ctrl_click(self, event):
+        if not self.multiple:
+            return self._on_click(event)
+        if not self._in_cells(event):
+            return None
+        idx = self._index_at_y(event.y)
+        if idx is None:
+            return "break"
+        row = self.rows[idx]
+        key = self.key(row)
+        if key in self.selected:
+            del self.selected[key]
+        else:
+            self.selected[key] = row
+        self.anchor = self.cursor = idx
+        self._show_selection()
+        self._notify()
+        return "break"
+
+    def _on_shift_click(self, event):
+        if not self.multiple or self.anchor is None:
+            return self._on_click(event)
+        if not self._in_cells(event):
+            return None
+        idx = self._index_at_y(event.y)
+        if idx is not None:
+            self._select_range(self.anchor, idx)
+            self.cursor = idx
+        return "break"
+
+    def _move_cursor(self, step, extend):
+        if not self.rows:
+            return "break"
+        if self.cursor is None:
+            idx = self.offset
+        else:
+            idx = max(0, min(len(self.rows) - 1, self.cursor + step))
+        if extend and self.multiple and self.anchor is not None:
+            self._select_range(self.anchor, idx)
+        else:
+            self.anchor = idx
+            self._select_range(idx, idx)
+        return "break"
+
+    def _select_all(self, event=None):
+        if self.multiple and self.rows:
+            self.selected = {self.key(row): row for row in self.rows}
+            self._show_selection()
+            self._notify()
+        return "break"